@@ -0,0 +1,91 @@
+"""Micro-benchmark: FastAPI's default JSON path vs the response classes in json_responses.
+
+Run from the repository root:
+
+    python backend/benchmarks/bench_json_responses.py
+
+"default" is what a route returning a dict costs today: ``jsonable_encoder``
+followed by ``JSONResponse.render`` (stdlib json). "stdlib" and "orjson" are
+the response classes rendering the same payload directly.
+"""
+import sys
+import timeit
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "backend"))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+
+from json_responses import ORJSONResponse, StdlibJSONResponse, orjson  # noqa: E402
+
+
+def content_page(n=500):
+    """GET /content: a full page of content documents."""
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    return {"content": [{
+        "id": str(uuid.uuid4()),
+        "title": f"Golden hour session #{i}",
+        "caption": "Chasing the last light of the day with this lovely couple. " * 4,
+        "hashtags": ["#weddingphotography", "#goldenhour", "#bridetobe", "#weddinginspo", "#love"] * 2,
+        "niche": "wedding",
+        "media_id": str(uuid.uuid4()),
+        "media_url": f"/api/media/{uuid.uuid4()}/raw",
+        "media_type": "ai_generated",
+        "created_at": (start + timedelta(minutes=i)).isoformat(),
+        "scheduled_date": "2026-02-14",
+        "status": "scheduled",
+    } for i in range(n)], "next_cursor": "WyIyMDI2LTAxLTAxVDAwOjAwOjAwIiwiYWJjIl0"}
+
+
+def calendar(n=100):
+    """GET /calendar: scheduled posts with their content embedded."""
+    page = content_page(n)["content"]
+    return {"calendar": [{
+        "id": str(uuid.uuid4()),
+        "content_id": item["id"],
+        "scheduled_date": "2026-02-14",
+        "scheduled_time": "18:00",
+        "status": "scheduled",
+        "content": item,
+    } for item in page]}
+
+
+def model_objects(n=500):
+    """A route returning native datetimes and UUIDs rather than stored strings."""
+    now = datetime.now(timezone.utc)
+    return [{"id": uuid.uuid4(), "created_at": now, "title": f"Idea {i}", "tags": ["#a", "#b"]} for i in range(n)]
+
+
+def bench(name, render, payload, number=50):
+    seconds = min(timeit.repeat(lambda: render(payload), number=number, repeat=5))
+    size = len(render(payload))
+    print(f"  {name:<8} {seconds / number * 1e3:8.3f} ms/response   {size:>9} bytes")
+    return seconds
+
+
+if __name__ == "__main__":
+    paths = {
+        "default": lambda payload: JSONResponse(jsonable_encoder(payload)).body,
+        "stdlib": lambda payload: StdlibJSONResponse(payload).body,
+    }
+    if orjson is not None:
+        paths["orjson"] = lambda payload: ORJSONResponse(payload).body
+    else:
+        print("orjson is not installed; comparing the stdlib paths only\n")
+
+    for label, payload in (
+        ("content page (500 docs)", content_page()),
+        ("calendar (100 posts with content)", calendar()),
+        ("native datetime/UUID objects (500)", model_objects()),
+    ):
+        print(label)
+        baseline = None
+        for name, render in paths.items():
+            seconds = bench(name, render, payload)
+            baseline = baseline or seconds
+            if name != "default":
+                print(f"  {'':<8} {baseline / seconds:8.1f}x faster than default")
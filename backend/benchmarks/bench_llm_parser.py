@@ -0,0 +1,84 @@
+"""Micro-benchmark: shared LLM response parser vs the old fence-splitting code.
+
+Run from the repository root:
+
+    python backend/benchmarks/bench_llm_parser.py
+
+Uses the malformed-response corpus from tests/fixtures/llm_responses.json and
+reports per-parse time and how many responses each approach recovered.
+"""
+import json
+import sys
+import timeit
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "backend"))
+
+from llm_parser import JsonArrayStream, LlmParseError, parse_array  # noqa: E402
+
+CORPUS = json.loads((ROOT / "tests" / "fixtures" / "llm_responses.json").read_text())
+FENCE = "`" * 3
+
+
+def legacy_parse(response):
+    """The block that used to be copied into every /generate route."""
+    response_text = response.strip()
+    if FENCE + "json" in response_text:
+        response_text = response_text.split(FENCE + "json")[1].split(FENCE)[0]
+    elif FENCE in response_text:
+        response_text = response_text.split(FENCE)[1].split(FENCE)[0]
+    return json.loads(response_text)
+
+
+def shared_parse(response):
+    return parse_array(response)
+
+
+def streamed_parse(response, chunk_size=16):
+    stream = JsonArrayStream()
+    elements = []
+    for i in range(0, len(response), chunk_size):
+        elements.extend(stream.feed(response[i:i + chunk_size]))
+    return elements
+
+
+def recovered(parse):
+    count = 0
+    for case in CORPUS:
+        try:
+            if case["expected_titles"] and parse(case["text"]):
+                count += 1
+        except (ValueError, LlmParseError, IndexError):
+            pass
+    return count
+
+
+def bench(name, parse, texts, number=2000):
+    def run():
+        for text in texts:
+            try:
+                parse(text)
+            except (ValueError, IndexError):
+                pass
+
+    seconds = min(timeit.repeat(run, number=number, repeat=3))
+    per_parse_us = seconds / (number * len(texts)) * 1e6
+    print(f"{name:<10} {per_parse_us:8.2f} us/parse   recovered {recovered(parse)}/{sum(1 for c in CORPUS if c['expected_titles'])}")
+
+
+if __name__ == "__main__":
+    texts = [case["text"] for case in CORPUS]
+    # A realistic full-size response: 10 ideas with long captions inside a fence
+    idea = {"title": "Golden hour session", "description": "x" * 200, "suggested_caption": "y" * 400,
+            "suggested_hashtags": ["#wedding"] * 5, "best_time_to_post": "6 PM", "content_type": "reel"}
+    large = [FENCE + "json\n" + json.dumps([idea] * 10, indent=2) + "\n" + FENCE]
+
+    print("Corpus of malformed responses")
+    bench("legacy", legacy_parse, texts)
+    bench("shared", shared_parse, texts)
+    bench("streamed", streamed_parse, texts)
+    print("\nLarge well-formed response (10 ideas)")
+    for name, parse in (("legacy", legacy_parse), ("shared", shared_parse), ("streamed", streamed_parse)):
+        seconds = min(timeit.repeat(lambda: parse(large[0]), number=500, repeat=3))
+        print(f"{name:<10} {seconds / 500 * 1e6:8.2f} us/parse")
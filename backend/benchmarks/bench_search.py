@@ -0,0 +1,116 @@
+"""Benchmark: GET /api/search latency at 100k documents, with and without the facet cap.
+
+Needs a MongoDB server. Run from the repository root:
+
+    MONGO_URL=mongodb://localhost:27017 python backend/benchmarks/bench_search.py
+
+Seeds ``--docs`` content documents into a scratch database (dropped at the
+end unless ``--keep``), creates the API's indexes and reports p50/p95 per
+query shape for ``run_search`` as served (``FACET_SCAN_MAX``) and uncapped.
+The target is a p95 under 50 ms at 100k documents.
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "backend"))
+
+from motor.motor_asyncio import AsyncIOMotorClient  # noqa: E402
+
+from indexes import ensure_indexes  # noqa: E402
+from search import FACET_SCAN_MAX, date_range, run_search  # noqa: E402
+
+NICHES = ["wedding", "portrait", "family", "newborn", "landscape", "street", "product", "boudoir"]
+STATUSES = ["draft", "scheduled", "published"]
+MEDIA_TYPES = ["image", "carousel", "reel", "ai_generated"]
+WORDS = ("golden hour light couple bride love session natural candid sunset beach studio smile "
+         "family baby story moment city street portrait colour film detail laugh").split()
+TAGS = [f"#{word}" for word in WORDS] + [f"#{niche}photography" for niche in NICHES]
+
+QUERIES = {
+    "no filters": {},
+    "one common word": {"q": "light"},
+    "two words + niche": {"q": "golden hour", "filters": {"niche": "wedding"}},
+    "hashtag": {"hashtags": ["#sunset"]},
+    "status + date range": {"filters": {"status": "published"}, "dates": "last_90_days"},
+    "deep page": {"offset": 1000},
+}
+
+
+def documents(count, seed=7):
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    for i in range(count):
+        niche = rng.choice(NICHES)
+        yield {
+            "id": f"bench-{i}",
+            "title": " ".join(rng.sample(WORDS, 4)).title(),
+            "caption": " ".join(rng.choices(WORDS, k=30)),
+            "hashtags": rng.sample(TAGS, 8) + [f"#{niche}photography"],
+            "niche": niche,
+            "status": rng.choice(STATUSES),
+            "media_type": rng.choice(MEDIA_TYPES),
+            "created_at": (start + timedelta(minutes=7 * i)).isoformat(),
+        }
+
+
+async def seed(db, count):
+    await db.content.drop()
+    batch = []
+    for doc in documents(count):
+        batch.append(doc)
+        if len(batch) == 5000:
+            await db.content.insert_many(batch)
+            batch = []
+    if batch:
+        await db.content.insert_many(batch)
+    await ensure_indexes(db)
+
+
+async def measure(db, params, scan_max, runs):
+    params = dict(params)
+    if params.get("dates") == "last_90_days":
+        params["dates"] = date_range((datetime.now(timezone.utc) - timedelta(days=90)).date(), None)
+    await run_search(db, "content", scan_max=scan_max, **params)  # warm the cache and plan
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = await run_search(db, "content", scan_max=scan_max, **params)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return timings[len(timings) // 2], timings[int(len(timings) * 0.95) - 1], result["total"]
+
+
+async def main(args):
+    client = AsyncIOMotorClient(os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+    db = client[args.db]
+    try:
+        if args.reseed or await db.content.estimated_document_count() != args.docs:
+            print(f"seeding {args.docs} documents into {args.db}...")
+            await seed(db, args.docs)
+        print(f"{'query':<22} {'cap':>8} {'p50 ms':>8} {'p95 ms':>8} {'total':>8}")
+        for label, params in QUERIES.items():
+            for scan_max in (FACET_SCAN_MAX, None):
+                p50, p95, total = await measure(db, params, scan_max, args.runs)
+                flag = "  over target" if p95 > 50 else ""
+                print(f"{label:<22} {scan_max or 'none':>8} {p50:8.1f} {p95:8.1f} {total:>8}{flag}")
+    finally:
+        if not args.keep:
+            await client.drop_database(args.db)
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--docs", type=int, default=100_000)
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--db", default="bench_search")
+    parser.add_argument("--keep", action="store_true", help="keep the seeded database for the next run")
+    parser.add_argument("--reseed", action="store_true")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,267 @@
+"""Static content catalog: tips, content mix ideas, hooks, reels, templates and hashtags.
+
+The catalog data lives in ``catalog_data.json``. ``Catalog`` turns it
+into immutable records once: every lookup the routes need (by category,
+niche, month and content type) is prebuilt, each fallback item is fixed
+except for its id, and every ``/static`` style body is serialized and gzipped
+up front in a ``StaticResponseCache``. Request handlers therefore only do
+dict lookups and slices.
+
+``CatalogStore`` holds the current ``Catalog``. ``reload()`` builds a
+complete new one from the data file and swaps the reference, so requests
+already in flight keep the snapshot they started with and a bad file leaves
+the old catalog serving.
+"""
+import json
+import logging
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from http_cache import StaticResponseCache
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_SECTIONS = (
+    "niches", "tips", "content_mix", "seasonal", "viral_hooks", "reel_ideas",
+    "bio_templates", "cta_templates", "client_magnets", "hashtag_strategy", "niche_hashtags",
+)
+
+TIP_HASHTAGS = ("#photographytips", "#phototips", "#learnphotography", "#photographylife")
+CONTENT_MIX_HASHTAGS = ("#photographybusiness", "#contentcreator", "#instagramtips", "#photographerlife", "#socialmediatips")
+HOOK_HASHTAGS = ("#photography", "#photographer")
+
+
+class CatalogError(ValueError):
+    """Raised when catalog data is missing sections or has the wrong shape."""
+
+
+@dataclass(frozen=True, slots=True)
+class TipRecord:
+    category: str
+    tip: str
+    caption_idea: str
+    hashtags: Tuple[str, ...]
+
+    def item(self) -> dict:
+        return {"id": str(uuid.uuid4()), "category": self.category, "tip": self.tip,
+                "caption_idea": self.caption_idea, "hashtags": list(self.hashtags)}
+
+
+@dataclass(frozen=True, slots=True)
+class ContentMixRecord:
+    category: str
+    idea: str
+    description: str
+    caption: str
+    hashtags: Tuple[str, ...]
+    content_type: str
+
+    def item(self) -> dict:
+        return {"id": str(uuid.uuid4()), "category": self.category, "idea": self.idea,
+                "description": self.description, "caption": self.caption,
+                "hashtags": list(self.hashtags), "content_type": self.content_type}
+
+
+@dataclass(frozen=True, slots=True)
+class HookRecord:
+    hook_type: str
+    hook: str
+    full_caption: str
+    hashtags: Tuple[str, ...]
+    best_for: str = "post"
+
+    def item(self) -> dict:
+        return {"hook": self.hook, "full_caption": self.full_caption,
+                "hashtags": list(self.hashtags), "best_for": self.best_for}
+
+
+@dataclass(frozen=True, slots=True)
+class ReelRecord:
+    category: str
+    title: str
+    description: str
+    duration: str
+
+    def item(self) -> dict:
+        return {"title": self.title, "description": self.description, "duration": self.duration}
+
+
+@dataclass(frozen=True, slots=True)
+class SeasonalRecord:
+    month: str
+    idea: str
+
+
+def _frozen(mapping: Dict[str, list]) -> Mapping[str, tuple]:
+    return MappingProxyType({key: tuple(values) for key, values in mapping.items()})
+
+
+class Catalog:
+    """One immutable snapshot of the catalog data and everything derived from it."""
+
+    def __init__(self, data: dict, source: Optional[str] = None):
+        missing = [section for section in REQUIRED_SECTIONS if section not in data]
+        if missing:
+            raise CatalogError(f"Catalog data is missing sections: {', '.join(missing)}")
+        self.data = data
+        self.source = source
+        self.loaded_at = datetime.now(timezone.utc).isoformat()
+        try:
+            self._build(data)
+        except (AttributeError, KeyError, TypeError) as e:
+            raise CatalogError(f"Malformed catalog data: {str(e)}") from e
+
+    def _build(self, data: dict) -> None:
+        self.niches: Tuple[str, ...] = tuple(data["niches"])
+        self.hashtag_strategy = data["hashtag_strategy"]
+
+        self.tips_by_category = _frozen({
+            category: [TipRecord(
+                category=category,
+                tip=text,
+                caption_idea=f"📸 Pro Tip: {text}\n\nDouble tap if this helped! 💡",
+                hashtags=TIP_HASHTAGS[:2] + (f"#{category}tips",) + TIP_HASHTAGS[2:],
+            ) for text in tips]
+            for category, tips in data["tips"].items()
+        })
+        self.content_mix_by_category = _frozen({
+            category: [ContentMixRecord(
+                category=category,
+                idea=text,
+                description=f"Create content around: {text}",
+                caption=f"✨ {text}\n\nWhat content would you like to see more of? Comment below! 👇",
+                hashtags=CONTENT_MIX_HASHTAGS,
+                content_type="carousel",
+            ) for text in ideas]
+            for category, ideas in data["content_mix"].items()
+        })
+        self.hooks_by_type = _frozen({
+            hook_type: [HookRecord(
+                hook_type=hook_type,
+                hook=text,
+                full_caption=f"{text}\n\n[Your story here]\n\nFollow for more!",
+                hashtags=HOOK_HASHTAGS,
+            ) for text in hooks]
+            for hook_type, hooks in data["viral_hooks"].items()
+        })
+        self.reels_by_category = _frozen({
+            category: [ReelRecord(category=category, **reel) for reel in reels]
+            for category, reels in data["reel_ideas"].items()
+        })
+        self.seasonal_by_month = _frozen({
+            month.lower(): [SeasonalRecord(month=month.lower(), idea=idea) for idea in ideas]
+            for month, ideas in data["seasonal"].items()
+        })
+        self.hashtags_by_niche = _frozen(data["niche_hashtags"])
+        self.bio_templates_by_niche = _frozen(data["bio_templates"])
+        self.cta_templates_by_type = _frozen(data["cta_templates"])
+        self.client_magnets = _frozen(data["client_magnets"])
+
+        # Every fallback record, grouped by the content type it produces
+        by_content_type: Dict[str, list] = {}
+        for records in self.content_mix_by_category.values():
+            for record in records:
+                by_content_type.setdefault(record.content_type, []).append(record)
+        for records in self.hooks_by_type.values():
+            by_content_type.setdefault("post", []).extend(records)
+        for records in self.reels_by_category.values():
+            by_content_type.setdefault("reel", []).extend(records)
+        self.records_by_content_type = _frozen(by_content_type)
+
+        self.responses = self._build_responses(data)
+
+    def _build_responses(self, data: dict) -> StaticResponseCache:
+        responses = StaticResponseCache()
+        responses.add("niches", {"niches": data["niches"]})
+        responses.add("tips", {"tips": data["tips"]})
+        responses.add("tips_categories", {"categories": list(data["tips"])})
+        responses.add("content_mix", {"ideas": data["content_mix"]})
+        responses.add("content_mix_categories", {"categories": list(data["content_mix"])})
+        responses.add("viral_hooks", {"hooks": data["viral_hooks"]})
+        responses.add("viral_hook_types", {"types": list(data["viral_hooks"])})
+        responses.add("reel_ideas", {"ideas": data["reel_ideas"]})
+        responses.add("reel_categories", {"categories": list(data["reel_ideas"])})
+        responses.add("cta_types", {"types": list(data["cta_templates"])})
+        responses.add(("seasonal", None), {"seasonal_content": data["seasonal"]})
+        for month, ideas in data["seasonal"].items():
+            responses.add(("seasonal", month.lower()), {"month": month.lower(), "ideas": ideas})
+        for niche, hashtags in data["niche_hashtags"].items():
+            responses.add(("hashtags", niche), {"niche": niche, "hashtags": hashtags})
+        for niche, templates in data["bio_templates"].items():
+            responses.add(("bio_templates", niche), {"niche": niche, "templates": templates})
+        for cta_type, templates in data["cta_templates"].items():
+            responses.add(("cta", cta_type), {"type": cta_type, "templates": templates})
+        for account_size, strategy in data["hashtag_strategy"].items():
+            responses.add(("hashtag_strategy", account_size), {"account_size": account_size, "strategy": strategy})
+        return responses
+
+    # Fallback items: prebuilt records, only the ids are generated per request
+
+    def tip_items(self, categories: Optional[List[str]], count: int) -> List[dict]:
+        categories = categories or list(self.tips_by_category)
+        per_category = count // len(categories) + 1
+        items = []
+        for category in categories:
+            for record in self.tips_by_category.get(category, ())[:per_category]:
+                items.append(record.item())
+        return items[:count]
+
+    def content_mix_items(self, categories: Optional[List[str]], count: int) -> List[dict]:
+        categories = categories or list(self.content_mix_by_category)
+        per_category = count // len(categories) + 1
+        items = []
+        for category in categories:
+            for record in self.content_mix_by_category.get(category, ())[:per_category]:
+                items.append(record.item())
+        return items[:count]
+
+    def hook_records(self, hook_type: str) -> Tuple[HookRecord, ...]:
+        return self.hooks_by_type.get(hook_type) or self.hooks_by_type["curiosity"]
+
+    def reel_records(self, category: Optional[str]) -> Tuple[ReelRecord, ...]:
+        return self.reels_by_category.get(category or "trending") or self.reels_by_category["trending"]
+
+    def client_magnet_templates(self, template_type: str) -> Tuple[str, ...]:
+        return self.client_magnets.get(f"{template_type}_templates", self.client_magnets["portfolio_templates"])
+
+    def snapshot(self) -> dict:
+        return {
+            "source": self.source,
+            "loaded_at": self.loaded_at,
+            "records": {
+                "tips": sum(len(r) for r in self.tips_by_category.values()),
+                "content_mix": sum(len(r) for r in self.content_mix_by_category.values()),
+                "viral_hooks": sum(len(r) for r in self.hooks_by_type.values()),
+                "reel_ideas": sum(len(r) for r in self.reels_by_category.values()),
+                "seasonal": sum(len(r) for r in self.seasonal_by_month.values()),
+            },
+            "content_types": {name: len(records) for name, records in self.records_by_content_type.items()},
+            "prebuilt_responses": len(self.responses),
+        }
+
+
+class CatalogStore:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._current: Optional[Catalog] = None
+
+    @property
+    def current(self) -> Catalog:
+        if self._current is None:
+            self.reload()
+        return self._current
+
+    def reload(self) -> Catalog:
+        """Build a new catalog from the data file and swap it in; raises CatalogError on bad data."""
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            raise CatalogError(f"Could not read catalog data from {self.path}: {str(e)}") from e
+        catalog = Catalog(data, source=str(self.path))
+        self._current = catalog
+        logger.info(f"Catalog loaded from {self.path}")
+        return catalog
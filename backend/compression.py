@@ -0,0 +1,269 @@
+"""ASGI middleware that compresses JSON and text responses.
+
+The encoding is negotiated from ``Accept-Encoding`` among the codecs that are
+installed: zstd (``zstandard``) and brotli (``brotli``) are optional, and
+gzip is always available. Only allowlisted content types above
+``minimum_size`` are compressed. Responses are skipped when they already
+carry a ``Content-Encoding`` (e.g. the prebuilt catalog bodies), are partial
+(206), or are server-sent event streams, which must reach the client
+unbuffered.
+
+A single-message body is compressed in one shot. Above ``offload_size`` that
+work runs in a thread so a multi-megabyte list response does not stall the
+event loop. Streamed bodies are compressed chunk by chunk and flushed after
+each one. Bytes in and out are counted per route template in
+``CompressionStats``.
+"""
+import asyncio
+import gzip
+import zlib
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+DEFAULT_CONTENT_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+    "text/",
+)
+_SKIPPED_STATUSES = {204, 206, 304}
+
+
+class _Codec:
+    def __init__(self, name: str, compress: Callable[[bytes], bytes], streaming: Callable[[], Tuple[Callable, Callable]]):
+        self.name = name
+        self.compress = compress
+        # Returns (compress_chunk, finish) for one streamed body
+        self.streaming = streaming
+
+
+def _gzip_codec(level: int) -> _Codec:
+    def streaming():
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+        return (
+            lambda chunk: compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH),
+            compressor.flush,
+        )
+    return _Codec("gzip", lambda body: gzip.compress(body, compresslevel=level), streaming)
+
+
+def _brotli_codec(quality: int) -> _Codec:
+    def streaming():
+        compressor = brotli.Compressor(quality=quality)
+        return (lambda chunk: compressor.process(chunk) + compressor.flush(), compressor.finish)
+    return _Codec("br", lambda body: brotli.compress(body, quality=quality), streaming)
+
+
+def _zstd_codec(level: int) -> _Codec:
+    def streaming():
+        compressor = zstandard.ZstdCompressor(level=level).compressobj()
+        return (
+            lambda chunk: compressor.compress(chunk) + compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK),
+            compressor.flush,
+        )
+    return _Codec("zstd", lambda body: zstandard.ZstdCompressor(level=level).compress(body), streaming)
+
+
+def available_codecs(gzip_level: int = 6, brotli_quality: int = 4, zstd_level: int = 3) -> List[_Codec]:
+    """Installed codecs, most preferred first."""
+    codecs = []
+    if zstandard is not None:
+        codecs.append(_zstd_codec(zstd_level))
+    if brotli is not None:
+        codecs.append(_brotli_codec(brotli_quality))
+    codecs.append(_gzip_codec(gzip_level))
+    return codecs
+
+
+def negotiate(accept_encoding: Optional[str], codecs: List[_Codec]) -> Optional[_Codec]:
+    """Highest-q codec the client accepts; ties go to the server's preference order."""
+    if not accept_encoding:
+        return None
+    weights = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if coding:
+            weights[coding] = q
+    best, best_q = None, 0.0
+    for codec in codecs:
+        q = weights.get(codec.name, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = codec, q
+    return best
+
+
+class CompressionStats:
+    def __init__(self):
+        self.routes: Dict[str, Dict[str, int]] = {}
+        self.skipped: Dict[str, int] = {}
+
+    def record(self, route: str, encoding: str, bytes_in: int, bytes_out: int) -> None:
+        counters = self.routes.setdefault(route, {"responses": 0, "bytes_in": 0, "bytes_out": 0})
+        counters["responses"] += 1
+        counters["bytes_in"] += bytes_in
+        counters["bytes_out"] += bytes_out
+        counters[encoding] = counters.get(encoding, 0) + 1
+
+    def record_skip(self, reason: str) -> None:
+        self.skipped[reason] = self.skipped.get(reason, 0) + 1
+
+    def snapshot(self) -> dict:
+        routes = {}
+        for route, counters in self.routes.items():
+            saved = counters["bytes_in"] - counters["bytes_out"]
+            routes[route] = {
+                **counters,
+                "bytes_saved": saved,
+                "ratio": round(counters["bytes_out"] / counters["bytes_in"], 3) if counters["bytes_in"] else None,
+            }
+        return {
+            "routes": routes,
+            "bytes_saved": sum(r["bytes_saved"] for r in routes.values()),
+            "skipped": dict(self.skipped),
+        }
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app,
+        stats: Optional[CompressionStats] = None,
+        minimum_size: int = 1024,
+        offload_size: int = 256 * 1024,
+        content_types: Iterable[str] = DEFAULT_CONTENT_TYPES,
+        codecs: Optional[List[_Codec]] = None,
+    ):
+        self.app = app
+        self.stats = stats or CompressionStats()
+        self.minimum_size = minimum_size
+        self.offload_size = offload_size
+        self.content_types = tuple(content_types)
+        self.codecs = codecs if codecs is not None else available_codecs()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope.get("headers") or [])
+        codec = negotiate(headers.get(b"accept-encoding", b"").decode("latin-1"), self.codecs)
+        if codec is None:
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, _CompressingSend(self, scope, codec, send))
+
+    def _skip_reason(self, status: int, headers: Dict[bytes, bytes]) -> Optional[str]:
+        if status in _SKIPPED_STATUSES:
+            return f"status_{status}"
+        if b"content-encoding" in headers:
+            return "already_encoded"
+        content_type = headers.get(b"content-type", b"").decode("latin-1").lower()
+        if content_type.startswith("text/event-stream"):
+            return "event_stream"
+        if not content_type.startswith(self.content_types):
+            return "content_type"
+        return None
+
+
+class _CompressingSend:
+    """Wraps ``send`` for one response, deciding on the first body message."""
+
+    def __init__(self, middleware: CompressionMiddleware, scope, codec: _Codec, send):
+        self.middleware = middleware
+        self.scope = scope
+        self.codec = codec
+        self.send = send
+        self.start_message = None
+        self.mode = None  # "passthrough" or "stream" once decided
+        self.compress_chunk = self.finish = None
+        self.bytes_in = self.bytes_out = 0
+
+    def _route(self) -> str:
+        # FastAPI records the matched route on the scope; fall back to the raw path
+        route = self.scope.get("route")
+        return getattr(route, "path", None) or self.scope.get("path", "")
+
+    def _encoded_headers(self, content_length: Optional[int]) -> List[Tuple[bytes, bytes]]:
+        headers = []
+        for name, value in self.start_message.get("headers", []):
+            lower = name.lower()
+            if lower in (b"content-length", b"vary"):
+                continue
+            if lower == b"etag" and not value.startswith(b"W/"):
+                # The encoded bytes differ from what the strong validator described
+                value = b"W/" + value
+            headers.append((name, value))
+        headers.append((b"content-encoding", self.codec.name.encode()))
+        headers.append((b"vary", self._vary()))
+        if content_length is not None:
+            headers.append((b"content-length", str(content_length).encode()))
+        return headers
+
+    def _vary(self) -> bytes:
+        existing = [value for name, value in self.start_message.get("headers", []) if name.lower() == b"vary"]
+        values = [v.strip() for value in existing for v in value.split(b",") if v.strip()]
+        if b"accept-encoding" not in (v.lower() for v in values):
+            values.append(b"Accept-Encoding")
+        return b", ".join(values)
+
+    async def __call__(self, message):
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            return
+        if message["type"] != "http.response.body" or self.mode == "passthrough":
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        stats = self.middleware.stats
+        if self.mode is None:
+            headers = {name.lower(): value for name, value in self.start_message.get("headers", [])}
+            reason = self.middleware._skip_reason(self.start_message["status"], headers)
+            if reason is None and not more_body and len(body) < self.middleware.minimum_size:
+                reason = "below_minimum"
+            if reason is not None:
+                stats.record_skip(reason)
+                self.mode = "passthrough"
+                await self.send(self.start_message)
+                await self.send(message)
+                return
+            if not more_body:
+                if len(body) >= self.middleware.offload_size:
+                    compressed = await asyncio.to_thread(self.codec.compress, body)
+                else:
+                    compressed = self.codec.compress(body)
+                stats.record(self._route(), self.codec.name, len(body), len(compressed))
+                self.mode = "passthrough"
+                await self.send({**self.start_message, "headers": self._encoded_headers(len(compressed))})
+                await self.send({"type": "http.response.body", "body": compressed})
+                return
+            self.mode = "stream"
+            self.compress_chunk, self.finish = self.codec.streaming()
+            await self.send({**self.start_message, "headers": self._encoded_headers(None)})
+
+        self.bytes_in += len(body)
+        chunk = self.compress_chunk(body) if body else b""
+        if not more_body:
+            chunk += self.finish()
+            stats.record(self._route(), self.codec.name, self.bytes_in, self.bytes_out + len(chunk))
+        self.bytes_out += len(chunk)
+        await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
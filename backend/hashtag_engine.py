@@ -0,0 +1,212 @@
+"""Hashtag co-occurrence statistics and tiered recommendations.
+
+``HashtagStats`` counts, over the ``hashtags`` of saved content and the
+``suggested_hashtags`` of saved ideas:
+
+* how many posts use each tag,
+* how many posts per niche use each tag,
+* how often each pair of tags appears on the same post (a sparse, symmetric
+  co-occurrence matrix stored as a dict of Counters, so a tag's neighbours
+  are one lookup).
+
+Writes apply +1/-1 deltas, so the counts stay current without rescans. At
+startup ``HashtagEngine`` builds a fresh ``HashtagStats`` from the database
+off the event loop, replays the writes that arrived meanwhile and swaps it in.
+A post written while the load is reading may be counted twice until the next
+restart. These are ranking statistics, so that is tolerated.
+
+Popularity tiers are relative to this corpus, since the app has no global
+Instagram post counts. Tags are ranked by use, and the top 2% are "mega", the
+next 8% "large", the next 30% "medium" and the rest "small". A
+recommendation fills the per-tier slots of the account size's
+``hashtag_strategy`` entry. Within each tier, candidates are ordered by how
+often they appear with the seed tags (P(tag | seed)), then by how common they
+are in the niche, then by the catalog's niche list. A tier the corpus is
+too thin for is topped up with the next most relevant tags of any tier. Slots
+no tag can fill, such as location and branded tags, are returned as
+placeholders.
+"""
+import time
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+MAX_TAGS_PER_POST = 30
+# Cumulative share of the ranked tags that falls in each tier
+TIER_SHARES = (("mega", 0.02), ("large", 0.10), ("medium", 0.40), ("small", 1.0))
+TIER_REFRESH_SECONDS = 5.0
+# Weights of the relevance signals: seed co-occurrence, niche share, catalog prior
+SEED_WEIGHT = 1.0
+NICHE_WEIGHT = 0.5
+CATALOG_WEIGHT = 0.1
+
+
+def normalize_tags(tags: Optional[Iterable[str]]) -> List[str]:
+    """Lowercased, ``#``-prefixed, de-duplicated tags in first-seen order."""
+    seen = []
+    for tag in tags or ():
+        if not isinstance(tag, str):
+            continue
+        tag = tag.strip().lower().lstrip("#")
+        if tag:
+            tag = f"#{tag}"
+            if tag not in seen:
+                seen.append(tag)
+        if len(seen) >= MAX_TAGS_PER_POST:
+            break
+    return seen
+
+
+class HashtagStats:
+    def __init__(self):
+        self.posts = 0
+        self.uses = Counter()
+        self.niche_posts = Counter()
+        self.niche_uses: Dict[str, Counter] = defaultdict(Counter)
+        self.cooccurrence: Dict[str, Counter] = defaultdict(Counter)
+        self.version = 0
+
+    def apply(self, tags: Sequence[str], niche: Optional[str], sign: int = 1) -> None:
+        """Add (sign=1) or remove (sign=-1) one post's normalized tags."""
+        if not tags:
+            return
+        self.posts += sign
+        self.uses.update({tag: sign for tag in tags})
+        if niche:
+            self.niche_posts[niche] += sign
+            self.niche_uses[niche].update({tag: sign for tag in tags})
+        for tag in tags:
+            self.cooccurrence[tag].update({other: sign for other in tags if other != tag})
+        self.version += 1
+
+    def apply_docs(self, docs: Iterable[dict], field: str) -> None:
+        """Count stored documents' ``field`` tags (run off the event loop at startup)."""
+        for doc in docs:
+            self.apply(normalize_tags(doc.get(field)), doc.get("niche"))
+
+
+class HashtagEngine:
+    def __init__(self):
+        self.stats = HashtagStats()
+        self._journal: Optional[List[Tuple[List[str], Optional[str], int]]] = None
+        self._tiers: Dict[str, str] = {}
+        self._tiers_version = -1
+        self._tiers_at = 0.0
+        self.ready = False
+
+    def record(self, tags: Optional[Iterable[str]], niche: Optional[str], sign: int = 1) -> None:
+        tags = normalize_tags(tags)
+        if not tags:
+            return
+        self.stats.apply(tags, niche, sign)
+        if self._journal is not None:
+            self._journal.append((tags, niche, sign))
+
+    def record_change(self, before: Optional[dict], after: Optional[dict], field: str = "hashtags") -> None:
+        """Move the counts from ``before`` to ``after`` (either may be None)."""
+        if before is not None and after is not None:
+            after = {field: before.get(field), "niche": before.get("niche"), **after}
+            if normalize_tags(before.get(field)) == normalize_tags(after.get(field)) and before.get("niche") == after.get("niche"):
+                return
+        if before is not None:
+            self.record(before.get(field), before.get("niche"), -1)
+        if after is not None:
+            self.record(after.get(field), after.get("niche"), 1)
+
+    def begin_load(self) -> None:
+        self._journal = []
+
+    def finish_load(self, fresh: HashtagStats) -> None:
+        """Swap in statistics built by a load, after replaying writes made during it."""
+        for tags, niche, sign in self._journal or ():
+            fresh.apply(tags, niche, sign)
+        self.stats = fresh
+        self._journal = None
+        self._tiers_version = -1
+        self.ready = True
+
+    def abort_load(self) -> None:
+        self._journal = None
+
+    def tiers(self) -> Dict[str, str]:
+        """tag -> tier, recomputed at most every TIER_REFRESH_SECONDS while counts change."""
+        stats = self.stats
+        now = time.monotonic()
+        if self._tiers_version != stats.version and (self._tiers_version < 0 or now - self._tiers_at >= TIER_REFRESH_SECONDS):
+            ranked = [tag for tag, count in stats.uses.most_common() if count > 0]
+            tiers, start = {}, 0
+            for name, share in TIER_SHARES:
+                end = max(start + 1, round(len(ranked) * share)) if name != "small" else len(ranked)
+                for tag in ranked[start:end]:
+                    tiers[tag] = name
+                start = max(start, min(end, len(ranked)))
+            self._tiers, self._tiers_version, self._tiers_at = tiers, stats.version, now
+        return self._tiers
+
+    def relevance(self, niche: str, seeds: Sequence[str], catalog_tags: Sequence[str]) -> Dict[str, float]:
+        stats = self.stats
+        scores: Dict[str, float] = defaultdict(float)
+        present = [seed for seed in seeds if stats.uses[seed] > 0]
+        for seed in present:
+            seed_uses = stats.uses[seed]
+            for tag, together in stats.cooccurrence[seed].items():
+                if together > 0:
+                    scores[tag] += SEED_WEIGHT * together / seed_uses / len(present)
+        niche_posts = stats.niche_posts[niche]
+        if niche_posts > 0:
+            for tag, count in stats.niche_uses[niche].items():
+                if count > 0:
+                    scores[tag] += NICHE_WEIGHT * count / niche_posts
+        for position, tag in enumerate(catalog_tags):
+            scores[tag] += CATALOG_WEIGHT * (1 - position / max(len(catalog_tags), 1))
+        for seed in seeds:
+            scores.pop(seed, None)
+        return scores
+
+    def recommend(self, niche: str, seeds: Sequence[str], mix: Dict[str, int], catalog_tags: Sequence[str]) -> dict:
+        """Fill ``mix`` ({tier: slots}) with the most relevant tags of each tier."""
+        seeds = normalize_tags(seeds)
+        catalog_tags = normalize_tags(catalog_tags)
+        scores = self.relevance(niche, seeds, catalog_tags)
+        tiers = self.tiers()
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        by_tier: Dict[str, List[Tuple[str, float]]] = defaultdict(list)
+        for tag, score in ranked:
+            by_tier[tiers.get(tag, "small")].append((tag, score))
+
+        picked, placeholders, shortfalls, chosen = [], {}, [], set()
+        for slot, count in mix.items():
+            if slot not in dict(TIER_SHARES):
+                placeholders[slot] = count
+                continue
+            for tag, score in by_tier[slot][:count]:
+                picked.append(self._entry(tag, slot, tiers.get(tag, "small"), score))
+                chosen.add(tag)
+            shortfalls.extend([slot] * (count - len(by_tier[slot][:count])))
+        # Tiers the corpus is too thin for take the next most relevant tags of any tier
+        leftovers = iter([(tag, score) for tag, score in ranked if tag not in chosen])
+        for slot in shortfalls:
+            tag, score = next(leftovers, (None, None))
+            if tag is None:
+                placeholders[slot] = placeholders.get(slot, 0) + 1
+                continue
+            picked.append(self._entry(tag, slot, tiers.get(tag, "small"), score))
+        return {
+            "seed": seeds,
+            "hashtags": picked,
+            "placeholders": placeholders,
+            "unmatched_seed": [seed for seed in seeds if self.stats.uses[seed] <= 0],
+        }
+
+    def _entry(self, tag: str, slot: str, tier: str, score: float) -> dict:
+        return {"tag": tag, "slot": slot, "tier": tier, "uses": max(self.stats.uses[tag], 0), "score": round(score, 4)}
+
+    def snapshot(self) -> dict:
+        stats = self.stats
+        return {
+            "ready": self.ready,
+            "loading": self._journal is not None,
+            "posts": stats.posts,
+            "tags": sum(1 for count in stats.uses.values() if count > 0),
+            "pairs": sum(len(neighbours) for neighbours in stats.cooccurrence.values()) // 2,
+            "niches": {niche: count for niche, count in stats.niche_posts.items() if count > 0},
+        }
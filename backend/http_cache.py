@@ -0,0 +1,123 @@
+"""Conditional-request and caching helpers for read-mostly routes.
+
+Static catalog bodies never change while the process runs, so
+``StaticResponseCache`` serializes each one once, gzips it once and keeps a
+strong ETag for it. Serving a catalog is then a dict lookup plus an
+``If-None-Match`` comparison. Media bytes are immutable once stored and use
+their content hash as the ETag.
+"""
+import gzip
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import Any, Dict, Hashable, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from json_responses import dumps
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+# Catalogs only change on deploy; clients revalidate hourly with If-None-Match
+CATALOG_CACHE_CONTROL = "public, max-age=3600"
+REVALIDATE = "no-cache"
+
+
+def strong_etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match uses the weak comparison, so ``W/`` prefixes are ignored."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        if coding.strip().lower() in ("gzip", "*"):
+            q = params.strip()
+            try:
+                return not (q.startswith("q=") and float(q[2:] or 0) == 0)
+            except ValueError:
+                return True
+    return False
+
+
+def http_date(value: str) -> Optional[str]:
+    """IMF-fixdate for a stored ISO timestamp (naive ones are UTC), or None if unparseable."""
+    try:
+        parsed = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return format_datetime(parsed.astimezone(timezone.utc), usegmt=True)
+
+
+def not_modified(etag: str, cache_control: str, extra_headers: Optional[dict] = None) -> Response:
+    headers = {"ETag": etag, "Cache-Control": cache_control, **(extra_headers or {})}
+    return Response(status_code=304, headers=headers)
+
+
+def serialize(payload: Any) -> bytes:
+    return dumps(payload)
+
+
+class PreparedBody:
+    """A serialized body, optionally gzipped up front.
+
+    The two encodings are different representations, so each gets its own
+    strong ETag; a client holding either one gets a 304.
+    """
+    __slots__ = ("body", "gzipped", "etag", "gzip_etag")
+
+    def __init__(self, body: bytes, precompress: bool = True):
+        self.body = body
+        # Compressed once at the highest level, since the cost is paid only at startup
+        self.gzipped = gzip.compress(body, compresslevel=9) if precompress else None
+        self.etag = strong_etag(body)
+        self.gzip_etag = self.etag[:-1] + '-gzip"'
+
+    def respond(self, request: Request, cache_control: str = CATALOG_CACHE_CONTROL) -> Response:
+        use_gzip = (
+            self.gzipped is not None
+            and len(self.gzipped) < len(self.body)
+            and accepts_gzip(request.headers.get("accept-encoding"))
+        )
+        etag = self.gzip_etag if use_gzip else self.etag
+        headers = {"ETag": etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+        if_none_match = request.headers.get("if-none-match")
+        if etag_matches(if_none_match, self.etag) or etag_matches(if_none_match, self.gzip_etag):
+            return not_modified(etag, cache_control, {"Vary": "Accept-Encoding"})
+        if use_gzip:
+            headers["Content-Encoding"] = "gzip"
+            return Response(self.gzipped, media_type="application/json", headers=headers)
+        return Response(self.body, media_type="application/json", headers=headers)
+
+
+class StaticResponseCache:
+    """Prepared JSON bodies keyed by route (and path parameter)."""
+
+    def __init__(self):
+        self._bodies: Dict[Hashable, PreparedBody] = {}
+
+    def add(self, key: Hashable, payload: Any) -> None:
+        self._bodies[key] = PreparedBody(serialize(payload))
+
+    def respond(self, key: Hashable, request: Request) -> Optional[Response]:
+        prepared = self._bodies.get(key)
+        return prepared.respond(request) if prepared is not None else None
+
+    def __len__(self) -> int:
+        return len(self._bodies)
+
+
+def respond_json(request: Request, payload: Any, cache_control: str = REVALIDATE) -> Response:
+    """One-off JSON response with a strong ETag and If-None-Match handling."""
+    return PreparedBody(serialize(payload), precompress=False).respond(request, cache_control)
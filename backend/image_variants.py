@@ -0,0 +1,200 @@
+"""Resized and re-encoded derivatives of stored images.
+
+``VARIANTS`` names every derivative the API can serve. ``render_variants``
+decodes the source once and encodes each requested variant from it. It is pure
+CPU work on bytes in and bytes out, so ``VariantPipeline`` runs it in a process
+pool, stores the results next to the original in the media store and records
+them under ``variants.<name>`` on the media document. Thumbnails are rendered
+right after an image is stored; any other variant is rendered the first time
+it is requested and served from the store after that.
+"""
+import asyncio
+import io
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Set
+
+from PIL import Image, ImageOps, features
+
+from singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+try:
+    # Pillow reads/writes AVIF natively from 11.2; older builds need the plugin
+    AVIF_SUPPORTED = bool(features.check_module("avif"))
+except ValueError:
+    try:
+        import pillow_avif  # noqa: F401
+        AVIF_SUPPORTED = True
+    except ImportError:
+        AVIF_SUPPORTED = False
+
+
+@dataclass(frozen=True)
+class VariantSpec:
+    width: int
+    format: str  # Pillow format name
+    content_type: str
+    quality: int = 82
+
+
+VARIANTS = {
+    "thumb_320": VariantSpec(320, "JPEG", "image/jpeg"),
+    "thumb_640": VariantSpec(640, "JPEG", "image/jpeg"),
+    "webp_640": VariantSpec(640, "WEBP", "image/webp", quality=80),
+    "webp_1080": VariantSpec(1080, "WEBP", "image/webp", quality=80),
+}
+if AVIF_SUPPORTED:
+    VARIANTS["avif_640"] = VariantSpec(640, "AVIF", "image/avif", quality=60)
+    VARIANTS["avif_1080"] = VariantSpec(1080, "AVIF", "image/avif", quality=60)
+
+# Rendered as soon as an image is stored; the rest wait until first requested
+EAGER_VARIANTS = ("thumb_320", "thumb_640")
+
+# Formats Pillow may not decode (or that are not raster images at all)
+_UNRENDERABLE_TYPES = {"image/svg+xml"}
+
+
+def is_renderable(media: dict) -> bool:
+    content_type = media.get("content_type") or ""
+    return content_type.startswith("image/") and content_type not in _UNRENDERABLE_TYPES
+
+
+def render_variants(data: bytes, names: Iterable[str]) -> Dict[str, dict]:
+    """Returns ``{name: {"data", "content_type", "width", "height"}}`` for each name."""
+    with Image.open(io.BytesIO(data)) as original:
+        original.load()
+        # Bake the EXIF orientation into the pixels; the variants are saved without EXIF
+        source = ImageOps.exif_transpose(original)
+        rendered = {}
+        for name in names:
+            spec = VARIANTS[name]
+            image = source.copy()
+            # thumbnail() keeps the aspect ratio and never upscales
+            image.thumbnail((spec.width, spec.width * 4))
+            if spec.format == "JPEG" and image.mode not in ("RGB", "L"):
+                image = image.convert("RGB")
+            out = io.BytesIO()
+            image.save(out, format=spec.format, quality=spec.quality)
+            rendered[name] = {
+                "data": out.getvalue(),
+                "content_type": spec.content_type,
+                "width": image.width,
+                "height": image.height,
+            }
+        return rendered
+
+
+class VariantNotAvailable(Exception):
+    """Raised for unknown variant names or media that cannot be rendered."""
+
+
+class VariantPipeline:
+    def __init__(self, media_store, collection, max_workers: int = 2):
+        self.media_store = media_store
+        self.collection = collection
+        self.max_workers = max_workers
+        self.single_flight = SingleFlight()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._background: Set[asyncio.Task] = set()
+        self.stats = {"rendered": 0, "served_cached": 0, "failures": 0}
+
+    def start(self) -> None:
+        # spawn: forking would copy the running event loop and motor's threads into the workers
+        self._pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+
+    def stop(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def render(self, data: bytes, names: Iterable[str]) -> Dict[str, dict]:
+        # Before start() (scripts, tests) fall back to the default thread pool
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, render_variants, data, tuple(names))
+
+    async def store(self, rendered: Dict[str, dict], filename: str) -> Dict[str, dict]:
+        """Write rendered variants to the media store; returns their ``variants`` entries."""
+        entries = {}
+        for name, variant in rendered.items():
+            entries[name] = {
+                "file_id": await self.media_store.put(variant["data"], f"{filename}-{name}", variant["content_type"]),
+                "content_type": variant["content_type"],
+                "size": len(variant["data"]),
+                "width": variant["width"],
+                "height": variant["height"],
+            }
+        return entries
+
+    async def get(self, media: dict, name: str) -> dict:
+        """The ``variants`` entry for ``name``, rendering and caching it on first use."""
+        if name not in VARIANTS or not is_renderable(media):
+            raise VariantNotAvailable(f"Variant {name} is not available for this media")
+        cached = media.get("variants", {}).get(name)
+        if cached:
+            self.stats["served_cached"] += 1
+            return cached
+        entries = await self.single_flight.do(
+            "variants", f"{media['id']}:{name}", lambda: self._render_and_cache(media, (name,))
+        )
+        return entries[name]
+
+    def prerender(self, media: dict, names: Iterable[str] = EAGER_VARIANTS) -> None:
+        """Render ``names`` in the background, e.g. right after an upload."""
+        if not is_renderable(media):
+            return
+        task = asyncio.create_task(self._prerender(media, tuple(names)))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _prerender(self, media: dict, names: tuple) -> None:
+        try:
+            await self._render_and_cache(media, names)
+        except VariantNotAvailable:
+            pass  # already logged; the variant will be retried lazily when requested
+        except Exception as e:
+            logger.warning(f"Storing variants for media {media['id']} failed: {str(e)}")
+
+    async def _render_and_cache(self, media: dict, names: tuple) -> Dict[str, dict]:
+        try:
+            rendered = await self.render(await self._source_bytes(media), names)
+        except Exception as e:
+            self.stats["failures"] += 1
+            logger.warning(f"Rendering {', '.join(names)} for media {media['id']} failed: {str(e)}")
+            raise VariantNotAvailable(f"Could not render {', '.join(names)}") from e
+        self.stats["rendered"] += len(rendered)
+        entries = await self.store(rendered, media.get("filename") or media["id"])
+
+        result = {}
+        for name, entry in entries.items():
+            # Only the first writer's files are kept; a concurrent render from another worker loses
+            updated = await self.collection.update_one(
+                {"id": media["id"], f"variants.{name}": {"$exists": False}},
+                {"$set": {f"variants.{name}": entry}}
+            )
+            if updated.matched_count:
+                result[name] = entry
+                continue
+            await self.media_store.delete(entry["file_id"])
+            current = await self.collection.find_one({"id": media["id"]}, {"_id": 0, f"variants.{name}": 1})
+            if not current or name not in current.get("variants", {}):
+                raise VariantNotAvailable("Media was deleted while rendering")
+            result[name] = current["variants"][name]
+        return result
+
+    async def _source_bytes(self, media: dict) -> bytes:
+        if "file_id" not in media:
+            raise VariantNotAvailable("Media has no stored original")
+        return b"".join([chunk async for chunk in self.media_store.stream(media["file_id"])])
+
+    def snapshot(self) -> dict:
+        return {
+            "variants": sorted(VARIANTS),
+            "avif_supported": AVIF_SUPPORTED,
+            "workers": self.max_workers,
+            "pending_background": len(self._background),
+            **self.stats,
+        }
@@ -0,0 +1,144 @@
+"""Index bootstrap and query-plan diagnostics.
+
+``INDEXES`` lists every index the API relies on, per collection, shaped after the
+queries the routes issue. ``ensure_indexes`` runs at startup and is idempotent:
+``create_indexes`` is a no-op for indexes that already exist with the same spec.
+``QUERY_SHAPES`` mirrors those queries so ``explain_query_shapes`` can report any
+that fall back to a collection scan.
+"""
+import logging
+from typing import List
+
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger(__name__)
+
+INDEXES = {
+    "content": [
+        IndexModel([("id", ASCENDING)], unique=True, name="id_unique"),
+        # GET /content with status and/or niche filters, newest first, keyset on (created_at, id)
+        IndexModel([("status", ASCENDING), ("niche", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="status_niche_created_id"),
+        IndexModel([("status", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="status_created_id"),
+        IndexModel([("niche", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="niche_created_id"),
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)], name="created_id_desc"),
+        # GET /search: words in title/caption/hashtags, exact hashtag filters
+        IndexModel(
+            [("title", TEXT), ("caption", TEXT), ("hashtags", TEXT)],
+            weights={"title": 10, "hashtags": 5, "caption": 1}, name="search_text"
+        ),
+        IndexModel([("hashtags", ASCENDING), ("created_at", DESCENDING)], name="hashtags_created"),
+    ],
+    "content_ideas": [
+        IndexModel([("id", ASCENDING)], unique=True, name="id_unique"),
+        IndexModel(
+            [("title", TEXT), ("description", TEXT), ("suggested_caption", TEXT), ("suggested_hashtags", TEXT)],
+            weights={"title": 10, "suggested_hashtags": 5, "description": 2, "suggested_caption": 1}, name="search_text"
+        ),
+        IndexModel([("suggested_hashtags", ASCENDING), ("created_at", DESCENDING)], name="hashtags_created"),
+        IndexModel([("niche", ASCENDING), ("created_at", DESCENDING)], name="niche_created"),
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)], name="created_id_desc"),
+    ],
+    "scheduled_posts": [
+        IndexModel([("id", ASCENDING)], unique=True, name="id_unique"),
+        # GET /calendar: scheduled_date range, ordered by date then time
+        IndexModel([("scheduled_date", ASCENDING), ("scheduled_time", ASCENDING), ("status", ASCENDING)], name="date_time_status"),
+        IndexModel([("content_id", ASCENDING)], name="content_id"),
+    ],
+    "media": [
+        IndexModel([("id", ASCENDING)], unique=True, name="id_unique"),
+        # Content-addressed lookups; the unique key also settles concurrent duplicate uploads
+        IndexModel(
+            [("sha256", ASCENDING)], unique=True, name="sha256_unique",
+            partialFilterExpression={"sha256": {"$exists": True}}
+        ),
+    ],
+    "jobs": [
+        IndexModel([("id", ASCENDING)], unique=True, name="id_unique"),
+        # Workers claim the oldest queued (or lease-expired) job for their provider
+        IndexModel([("provider", ASCENDING), ("status", ASCENDING), ("created_at", ASCENDING)], name="provider_status_created"),
+        # At most one queued/running job per dedup key
+        IndexModel(
+            [("active_key", ASCENDING)], unique=True, name="active_key_unique",
+            partialFilterExpression={"active_key": {"$exists": True}}
+        ),
+        IndexModel([("dedup_key", ASCENDING), ("finished_at", DESCENDING)], name="dedup_finished"),
+        IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0, name="expires_ttl"),
+    ],
+    "llm_cache": [
+        IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0, name="expires_ttl"),
+    ],
+}
+
+CONTENT_SORT = [("created_at", DESCENDING), ("id", DESCENDING)]
+CONTENT_CURSOR = {"$or": [
+    {"created_at": {"$lt": "2026-01-01T00:00:00"}},
+    {"created_at": "2026-01-01T00:00:00", "id": {"$lt": "probe"}},
+]}
+
+# (route, collection, filter, sort) for the reads each route performs
+QUERY_SHAPES = [
+    ("GET /content", "content", {}, CONTENT_SORT),
+    ("GET /content?cursor=", "content", CONTENT_CURSOR, CONTENT_SORT),
+    ("GET /content?status=", "content", {"status": "draft"}, CONTENT_SORT),
+    ("GET /content?niche=", "content", {"niche": "wedding"}, CONTENT_SORT),
+    ("GET /content?status=&niche=", "content", {"status": "draft", "niche": "wedding"}, CONTENT_SORT),
+    ("GET /content/{id}", "content", {"id": "probe"}, None),
+    ("GET /calendar", "scheduled_posts", {"scheduled_date": {"$gte": "2026-01-01", "$lte": "2026-01-31"}},
+     [("scheduled_date", ASCENDING), ("scheduled_time", ASCENDING)]),
+    ("GET /calendar ($lookup content)", "content", {"id": "probe"}, None),
+    ("DELETE /calendar/{id}", "scheduled_posts", {"id": "probe"}, None),
+    ("GET /media/{id}", "media", {"id": "probe"}, None),
+    ("POST /content/upload-media (dedup)", "media", {"sha256": "probe"}, None),
+    ("GET /jobs/{id}", "jobs", {"id": "probe"}, None),
+    ("GET /search?q=", "content", {"$text": {"$search": "golden hour"}}, None),
+    ("GET /search?hashtags=", "content", {"hashtags": {"$all": ["#goldenhour"]}}, CONTENT_SORT),
+    ("GET /search?source=ideas&q=", "content_ideas", {"$text": {"$search": "golden hour"}}, None),
+    ("GET /search?source=ideas", "content_ideas", {}, CONTENT_SORT),
+    ("GET /search?source=scheduled", "scheduled_posts", {"content_id": {"$in": ["probe"]}},
+     [("scheduled_date", ASCENDING), ("scheduled_time", ASCENDING)]),
+    ("job worker claim", "jobs", {"provider": "gemini", "status": "queued"}, [("created_at", ASCENDING)]),
+]
+
+
+async def ensure_indexes(db) -> None:
+    for collection, models in INDEXES.items():
+        try:
+            await db[collection].create_indexes(models)
+        except PyMongoError as e:
+            # e.g. legacy duplicate ids block a unique index; keep serving and say so
+            logger.error(f"Index creation failed for {collection}: {str(e)}")
+
+
+def _plan_stages(plan) -> List[str]:
+    """Every ``stage`` name in an explain plan tree, classic or SBE shaped."""
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(_plan_stages(value))
+    elif isinstance(plan, list):
+        for item in plan:
+            stages.extend(_plan_stages(item))
+    return stages
+
+
+async def explain_query_shapes(db) -> List[dict]:
+    report = []
+    for route, collection, query, sort in QUERY_SHAPES:
+        cursor = db[collection].find(query, {"_id": 0})
+        if sort:
+            cursor = cursor.sort(sort)
+        explain = await cursor.explain()
+        winning_plan = explain.get("queryPlanner", {}).get("winningPlan", {})
+        stages = _plan_stages(winning_plan)
+        report.append({
+            "route": route,
+            "collection": collection,
+            "filter": query,
+            "stages": stages,
+            "collection_scan": "COLLSCAN" in stages,
+            "in_memory_sort": "SORT" in stages,
+        })
+    return report
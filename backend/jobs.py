@@ -0,0 +1,311 @@
+"""Background jobs for slow generations, backed by the ``jobs`` collection.
+
+A request enqueues a job and gets its id back immediately; workers in every
+API process claim queued jobs from Mongo, run the handler registered for the
+job's kind and record the result on the job document. Clients poll
+``GET /api/jobs/{id}`` or pass a ``callback_url`` that receives the finished
+job as a JSON POST. Callback URLs must be http(s) and resolve to public
+addresses only; they are checked again before each POST and never returned
+to clients.
+
+Each provider gets its own fixed set of workers, so the number of workers is
+the per-process concurrency cap for that provider. A claimed job carries a
+lease; if its process dies mid-run the lease expires and another worker picks
+it up again, up to ``max_attempts`` runs.
+
+Jobs are deduplicated on a hash of (kind, provider, params): while an
+identical job is queued or running, or finished successfully within
+``reuse_seconds``, enqueueing returns that job instead of creating another.
+The duplicate's callback URL is added to the job's ``callback_urls``; if the
+job has already finished it is called right away.
+"""
+import asyncio
+import hashlib
+import ipaddress
+import json
+import logging
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+# Fields kept for bookkeeping only; never returned to clients
+_BOOKKEEPING_FIELDS = {"_id": 0, "active_key": 0, "lease_expires_at": 0, "expires_at": 0}
+# callback_url is the single-URL field of jobs queued before callback_urls
+_PRIVATE_FIELDS = {**_BOOKKEEPING_FIELDS, "callback_urls": 0, "callback_url": 0}
+
+Handler = Callable[[dict], Awaitable[dict]]
+
+
+def dedup_key(kind: str, provider: str, params: dict) -> str:
+    canonical = json.dumps(
+        {"kind": kind, "provider": provider, "params": params},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def check_callback_url(url: str) -> str:
+    """Raise ValueError unless ``url`` is http(s) and its host resolves only to public addresses.
+
+    Blocking (it resolves the host); call it through ``asyncio.to_thread``.
+    """
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        raise ValueError("Invalid callback_url")
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise ValueError("callback_url must be an http or https URL")
+    try:
+        infos = socket.getaddrinfo(parts.hostname, port or (443 if parts.scheme == "https" else 80), proto=socket.IPPROTO_TCP)
+    except (socket.gaierror, UnicodeError):
+        raise ValueError(f"callback_url host does not resolve: {parts.hostname}")
+    for info in infos:
+        address = ipaddress.ip_address(info[4][0].split("%", 1)[0])
+        if isinstance(address, ipaddress.IPv6Address) and address.ipv4_mapped:
+            address = address.ipv4_mapped
+        if not address.is_global or address.is_multicast:
+            raise ValueError(f"callback_url must not point at a private, loopback or link-local address: {parts.hostname}")
+    return url
+
+
+class JobQueue:
+    def __init__(
+        self,
+        collection,
+        provider_concurrency: Dict[str, int],
+        poll_interval: float = 2.0,
+        lease_seconds: int = 600,
+        max_attempts: int = 2,
+        reuse_seconds: int = 300,
+        retention_days: int = 7,
+        callback_timeout: float = 10.0,
+    ):
+        self.collection = collection
+        self.provider_concurrency = dict(provider_concurrency)
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.reuse_seconds = reuse_seconds
+        self.retention_days = retention_days
+        self.callback_timeout = callback_timeout
+        self._handlers: Dict[str, Handler] = {}
+        self._wakeups: Dict[str, asyncio.Event] = {}
+        self._workers: List[asyncio.Task] = []
+        self._callbacks: Set[asyncio.Task] = set()
+        self.stats = {"enqueued": 0, "deduplicated": 0, "succeeded": 0, "failed": 0, "requeued": 0, "callbacks_failed": 0}
+
+    def register(self, kind: str, handler: Handler) -> None:
+        self._handlers[kind] = handler
+
+    async def enqueue(self, kind: str, provider: str, params: dict, callback_url: Optional[str] = None) -> Tuple[dict, bool]:
+        """Returns ``(job, deduplicated)``."""
+        if kind not in self._handlers:
+            raise ValueError(f"No handler registered for job kind: {kind}")
+        if provider not in self.provider_concurrency:
+            raise ValueError(f"Unknown provider: {provider}")
+        if callback_url:
+            await asyncio.to_thread(check_callback_url, callback_url)
+        key = dedup_key(kind, provider, params)
+        existing = await self._find_reusable(key)
+        if existing:
+            return await self._reuse(existing, callback_url), True
+
+        now = datetime.now(timezone.utc)
+        job = {
+            "id": str(uuid.uuid4()),
+            "kind": kind,
+            "provider": provider,
+            "params": params,
+            "status": QUEUED,
+            "dedup_key": key,
+            # Only set while queued/running; a unique index on it settles concurrent duplicates
+            "active_key": key,
+            "callback_urls": [callback_url] if callback_url else [],
+            "attempts": 0,
+            "result": None,
+            "error": None,
+            "created_at": now.isoformat(),
+            "started_at": None,
+            "finished_at": None,
+        }
+        try:
+            await self.collection.insert_one(dict(job))
+        except DuplicateKeyError:
+            existing = await self._find_reusable(key)
+            if existing:
+                return await self._reuse(existing, callback_url), True
+            raise
+        self.stats["enqueued"] += 1
+        self._wake(provider)
+        job.pop("active_key")
+        job.pop("callback_urls")
+        return job, False
+
+    async def _reuse(self, job: dict, callback_url: Optional[str]) -> dict:
+        self.stats["deduplicated"] += 1
+        if not callback_url:
+            return job
+        # Atomic with _finish: either _finish sees the URL, or this sees the finished status
+        updated = await self.collection.find_one_and_update(
+            {"id": job["id"]},
+            {"$addToSet": {"callback_urls": callback_url}},
+            projection=_PRIVATE_FIELDS,
+            return_document=ReturnDocument.AFTER
+        )
+        if updated is None:
+            return job
+        if updated["status"] in (SUCCEEDED, FAILED):
+            task = asyncio.create_task(self._send_callbacks(updated, [callback_url]))
+            self._callbacks.add(task)
+            task.add_done_callback(self._callbacks.discard)
+        return updated
+
+    async def _find_reusable(self, key: str) -> Optional[dict]:
+        active = await self.collection.find_one({"active_key": key}, _PRIVATE_FIELDS)
+        if active or not self.reuse_seconds:
+            return active
+        reuse_after = (datetime.now(timezone.utc) - timedelta(seconds=self.reuse_seconds)).isoformat()
+        return await self.collection.find_one(
+            {"dedup_key": key, "status": SUCCEEDED, "finished_at": {"$gte": reuse_after}},
+            _PRIVATE_FIELDS,
+            sort=[("finished_at", -1)]
+        )
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        return await self.collection.find_one({"id": job_id}, _PRIVATE_FIELDS)
+
+    def _wake(self, provider: str) -> None:
+        event = self._wakeups.get(provider)
+        if event is not None:
+            event.set()
+
+    def start(self) -> None:
+        for provider, concurrency in self.provider_concurrency.items():
+            self._wakeups[provider] = asyncio.Event()
+            for _ in range(concurrency):
+                self._workers.append(asyncio.create_task(self._worker(provider)))
+
+    async def stop(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        # A cancelled job stays leased and is retried by another process once the lease lapses
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def _worker(self, provider: str) -> None:
+        wakeup = self._wakeups[provider]
+        while True:
+            try:
+                job = await self._claim(provider)
+            except Exception as e:
+                logger.error(f"Job claim failed for {provider}: {str(e)}")
+                job = None
+            if job is None:
+                wakeup.clear()
+                try:
+                    await asyncio.wait_for(wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(job)
+
+    async def _claim(self, provider: str) -> Optional[dict]:
+        now = datetime.now(timezone.utc)
+        return await self.collection.find_one_and_update(
+            {"provider": provider, "$or": [
+                {"status": QUEUED},
+                {"status": RUNNING, "lease_expires_at": {"$lt": now}},
+            ]},
+            {
+                "$set": {
+                    "status": RUNNING,
+                    "started_at": now.isoformat(),
+                    "lease_expires_at": now + timedelta(seconds=self.lease_seconds),
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("created_at", ASCENDING)],
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def _run(self, job: dict) -> None:
+        if job["attempts"] > self.max_attempts:
+            await self._finish(job, error="Job was interrupted too many times")
+            return
+        if job["attempts"] > 1:
+            self.stats["requeued"] += 1
+        try:
+            result = await self._handlers[job["kind"]](job["params"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Job {job['id']} ({job['kind']}) failed: {str(e)}")
+            await self._finish(job, error=str(e))
+            return
+        await self._finish(job, result=result)
+
+    async def _finish(self, job: dict, result: Optional[dict] = None, error: Optional[str] = None) -> None:
+        now = datetime.now(timezone.utc)
+        status = FAILED if error is not None else SUCCEEDED
+        finished = await self.collection.find_one_and_update(
+            {"id": job["id"]},
+            {
+                "$set": {
+                    "status": status,
+                    "result": result,
+                    "error": error,
+                    "finished_at": now.isoformat(),
+                    "expires_at": now + timedelta(days=self.retention_days),
+                },
+                "$unset": {"active_key": "", "lease_expires_at": ""},
+            },
+            projection=_BOOKKEEPING_FIELDS,
+            return_document=ReturnDocument.AFTER
+        )
+        self.stats[status] += 1
+        if finished:
+            urls = finished.pop("callback_urls", None) or []
+            if finished.get("callback_url"):
+                urls.append(finished.pop("callback_url"))
+            if urls:
+                await self._send_callbacks(finished, urls)
+
+    async def _send_callbacks(self, job: dict, urls: List[str]) -> None:
+        await asyncio.gather(*(self._send_callback(job, url) for url in urls))
+
+    def _post_callback(self, url: str, job: dict) -> None:
+        # The host may resolve differently now than when the job was enqueued
+        check_callback_url(url)
+        response = requests.post(url, json=job, timeout=self.callback_timeout, allow_redirects=False)
+        response.raise_for_status()
+
+    async def _send_callback(self, job: dict, url: str) -> None:
+        try:
+            await asyncio.to_thread(self._post_callback, url, job)
+        except Exception as e:
+            self.stats["callbacks_failed"] += 1
+            logger.warning(f"Callback for job {job['id']} to {url} failed: {str(e)}")
+
+    def snapshot(self) -> dict:
+        return {
+            "workers": dict(self.provider_concurrency),
+            "kinds": sorted(self._handlers),
+            **self.stats,
+        }
@@ -0,0 +1,77 @@
+"""JSON response classes that serialize without ``jsonable_encoder``.
+
+FastAPI normally walks every return value with ``jsonable_encoder`` and then
+hands the result to stdlib ``json``. Both response classes here encode
+``datetime``, ``date``, ``UUID`` and Pydantic models directly.
+``ORJSONResponse`` does it in orjson's native code. ``StdlibJSONResponse`` is
+its stdlib twin with Starlette's output settings. Only ``JSON_RESPONSE=orjson``
+changes the app's response class; otherwise it stays FastAPI's own
+``JSONResponse`` and the output bytes are exactly what they were. Routes that
+return large lists of plain Mongo documents construct ``JSONResponseClass``
+themselves, so the encoder walk FastAPI does for return values is skipped.
+"""
+import json
+import logging
+import uuid
+from datetime import date, datetime
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+
+def _default(obj: Any) -> Any:
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _stdlib_default(obj: Any) -> Any:
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    return _default(obj)
+
+
+def dumps_orjson(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def dumps_stdlib(content: Any) -> bytes:
+    # Starlette's JSONResponse settings, so only the type handling differs
+    return json.dumps(
+        content, default=_stdlib_default, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class StdlibJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps_stdlib(content)
+
+
+class ORJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps_orjson(content)
+
+
+def select_response_class(name: str) -> type:
+    """``ORJSONResponse`` when requested and installed, otherwise FastAPI's ``JSONResponse``."""
+    if name.lower() == "orjson":
+        if orjson is not None:
+            return ORJSONResponse
+        logger.warning("JSON_RESPONSE=orjson but orjson is not installed; using FastAPI's JSONResponse")
+    return JSONResponse
+
+
+def dumps(content: Any) -> bytes:
+    """Compact JSON bytes using the fastest available encoder."""
+    return dumps_orjson(content) if orjson is not None else dumps_stdlib(content)
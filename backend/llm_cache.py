@@ -0,0 +1,161 @@
+"""Response cache for LLM generations.
+
+Keys are a SHA-256 over the canonical form of (model, system message, prompt,
+params), so requests that build the same prompt share an entry regardless of
+incidental whitespace. Lookups go to an in-process LRU first and then, when
+configured, to a shared backend so every worker benefits from a generation.
+``MongoCacheBackend`` is the shared backend; ``MemoryCacheBackend`` implements
+the same interface and stands in for it locally (single worker, dev, tests).
+"""
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Seconds each endpoint's generations stay fresh; 0 disables caching for it.
+# Generated ideas are saved and indexed as near-duplicates, so a cached ideas
+# response would only ever be filtered out again: those are never cached.
+ENDPOINT_TTLS = {
+    "caption": 600,
+    "ideas": 0,
+    "tips": 3600,
+    "mix": 3600,
+    "hooks": 1800,
+    "reels": 1800,
+    "magnet": 600,
+    "batch_caption": 600,
+    "batch_ideas": 0,
+}
+DEFAULT_TTL = 600
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split())
+
+
+def cache_key(model: str, system_message: str, prompt: str, params: Optional[dict] = None) -> str:
+    canonical = json.dumps(
+        {
+            "model": model,
+            "system": _normalize(system_message),
+            "prompt": _normalize(prompt),
+            "params": params or {},
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class MemoryCacheBackend:
+    """Bounded LRU with per-entry expiry."""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: str, ttl: int) -> None:
+        self._entries[key] = (value, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class MongoCacheBackend:
+    """Cache shared by all workers, stored in a collection with a TTL index on ``expires_at``."""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def get(self, key: str) -> Optional[str]:
+        # The TTL monitor only runs once a minute, so filter on expiry as well
+        doc = await self.collection.find_one(
+            {"_id": key, "expires_at": {"$gt": datetime.now(timezone.utc)}},
+            {"value": 1}
+        )
+        return doc["value"] if doc else None
+
+    async def set(self, key: str, value: str, ttl: int) -> None:
+        await self.collection.replace_one(
+            {"_id": key},
+            {"value": value, "expires_at": datetime.now(timezone.utc) + timedelta(seconds=ttl)},
+            upsert=True
+        )
+
+
+class LlmResponseCache:
+    def __init__(self, local: Optional[MemoryCacheBackend] = None, shared=None, ttls: Optional[Dict[str, int]] = None):
+        self.local = local or MemoryCacheBackend()
+        self.shared = shared
+        self.ttls = dict(ENDPOINT_TTLS if ttls is None else ttls)
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    def ttl_for(self, endpoint: str) -> int:
+        return self.ttls.get(endpoint, DEFAULT_TTL)
+
+    def _count(self, endpoint: str, outcome: str) -> None:
+        counters = self.stats.setdefault(endpoint, {"hits": 0, "misses": 0, "bypassed": 0})
+        counters[outcome] += 1
+
+    async def get(self, endpoint: str, key: str) -> Optional[str]:
+        if not self.ttl_for(endpoint):
+            return None
+        value = await self.local.get(key)
+        if value is None and self.shared is not None:
+            try:
+                value = await self.shared.get(key)
+            except Exception as e:
+                # The cache is an optimisation; never fail a generation because of it
+                logger.warning(f"Shared LLM cache read failed: {str(e)}")
+            if value is not None:
+                await self.local.set(key, value, self.ttl_for(endpoint))
+        self._count(endpoint, "hits" if value is not None else "misses")
+        return value
+
+    async def set(self, endpoint: str, key: str, value: str) -> None:
+        ttl = self.ttl_for(endpoint)
+        if not ttl:
+            return
+        await self.local.set(key, value, ttl)
+        if self.shared is not None:
+            try:
+                await self.shared.set(key, value, ttl)
+            except Exception as e:
+                logger.warning(f"Shared LLM cache write failed: {str(e)}")
+
+    def record_bypass(self, endpoint: str) -> None:
+        self._count(endpoint, "bypassed")
+
+    def snapshot(self) -> dict:
+        return {
+            "local_entries": len(self.local),
+            "shared_backend": type(self.shared).__name__ if self.shared is not None else None,
+            "endpoints": {name: dict(counters) for name, counters in self.stats.items()},
+        }
+
+
+def cache_directives(cache_control: Optional[str]) -> set:
+    """Lower-cased directive names from a Cache-Control request header."""
+    if not cache_control:
+        return set()
+    return {part.split("=", 1)[0].strip().lower() for part in cache_control.split(",") if part.strip()}
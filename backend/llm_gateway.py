@@ -0,0 +1,312 @@
+"""Process-wide gateway for every LLM and image-model call.
+
+Endpoints used to read ``EMERGENT_LLM_KEY`` and build their own ``LlmChat`` on
+each request. The gateway owns that instead: the key and per-model settings are
+resolved once, provider clients that are safe to share are created once and
+reused, a semaphore bounds how many calls are in flight against the provider,
+and each call gets a timeout and retry with exponential backoff.
+
+Text completions can be served from an ``LlmResponseCache``; callers pass the
+request's ``Cache-Control`` header through so ``no-cache`` forces a fresh
+generation and ``no-store`` also keeps it out of the cache. Concurrent
+completions with the same cache key are coalesced into one provider call.
+
+The provider SDK (``emergentintegrations``) is imported on first use, so the
+gateway's retry, caching and concurrency logic loads without it.
+
+A failed call is retried only when the failure is transient: a timeout, a
+connection error, HTTP 408/429 or a 5xx. Authentication, other 4xx and
+validation errors reach the caller straight away.
+
+``LlmChat`` keeps conversation history per instance, so a fresh one is still
+created per call (it is a light object); the HTTP connection pooling underneath
+belongs to the provider SDK and is shared across instances.
+
+``LlmChat`` has no token streaming, so ``stream`` goes to the provider's own
+streaming API (see ``llm_streaming``) when a direct key for the profile's
+provider is configured, and otherwise yields the whole completion as one
+delta.
+"""
+import asyncio
+import logging
+import random
+import uuid
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+
+import requests
+from requests.exceptions import ConnectionError as RequestsConnectionError, Timeout as RequestsTimeout
+
+from llm_cache import LlmResponseCache, cache_directives, cache_key
+from llm_streaming import PROVIDERS as STREAMING_PROVIDERS, stream_text
+from singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class LlmNotConfigured(Exception):
+    """Raised when no API key is available for the LLM provider."""
+
+
+RETRYABLE_STATUS = {408, 429}
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    # SDK errors carry status_code; requests' HTTPError carries the response
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def is_retryable(error: Exception) -> bool:
+    """Whether a failed provider call is worth repeating."""
+    status = _status_code(error)
+    if status is not None:
+        return status in RETRYABLE_STATUS or status >= 500
+    return isinstance(error, (asyncio.TimeoutError, TimeoutError, ConnectionError, RequestsConnectionError, RequestsTimeout))
+
+
+@dataclass(frozen=True)
+class ModelProfile:
+    provider: str
+    model: str
+    timeout: float = 60.0
+    max_retries: int = 2
+    params: Dict = field(default_factory=dict)
+
+
+MODEL_PROFILES = {
+    "text": ModelProfile("gemini", "gemini-3-flash-preview", timeout=60.0, max_retries=2),
+    "image_gemini": ModelProfile(
+        "gemini", "gemini-3-pro-image-preview", timeout=180.0, max_retries=1,
+        params={"modalities": ["image", "text"]}
+    ),
+    "image_openai": ModelProfile("openai", "gpt-image-1", timeout=180.0, max_retries=1),
+}
+
+
+class LlmGateway:
+    def __init__(
+        self,
+        api_key: Optional[str],
+        max_concurrency: int = 8,
+        profiles: Optional[Dict[str, ModelProfile]] = None,
+        cache: Optional[LlmResponseCache] = None,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+        stream_api_keys: Optional[Dict[str, Optional[str]]] = None,
+    ):
+        self.api_key = api_key
+        # provider -> direct API key used for token streaming
+        self.stream_api_keys = {provider: key for provider, key in (stream_api_keys or {}).items() if key}
+        self.profiles = dict(profiles or MODEL_PROFILES)
+        self.cache = cache
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._openai_images = None
+        # Pooled connections for the provider streaming APIs
+        self._http = requests.Session()
+        self._http.mount("https://", requests.adapters.HTTPAdapter(pool_maxsize=max_concurrency))
+        self.single_flight = SingleFlight()
+        self.stats = {"calls": 0, "retries": 0, "failures": 0, "timeouts": 0, "streams": 0}
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.api_key)
+
+    def streams(self, profile: str = "text") -> bool:
+        """Whether ``stream`` sends tokens as they are generated for ``profile``."""
+        provider = self.profiles[profile].provider
+        return provider in STREAMING_PROVIDERS and provider in self.stream_api_keys
+
+    def _require_key(self) -> str:
+        if not self.api_key:
+            raise LlmNotConfigured("API key not configured")
+        return self.api_key
+
+    def _chat(self, session_prefix: str, system_message: str, profile: ModelProfile):
+        from emergentintegrations.llm.chat import LlmChat
+
+        chat = LlmChat(
+            api_key=self._require_key(),
+            session_id=f"{session_prefix}-{uuid.uuid4()}",
+            system_message=system_message
+        ).with_model(profile.provider, profile.model)
+        if profile.params:
+            chat = chat.with_params(**profile.params)
+        return chat
+
+    async def _call(self, profile: ModelProfile, make_call: Callable[[], Awaitable[T]]) -> T:
+        """Run ``make_call`` under the concurrency cap with timeout and retries."""
+        self._require_key()
+        attempt = 0
+        while True:
+            self.stats["calls"] += 1
+            try:
+                async with self._semaphore:
+                    return await asyncio.wait_for(make_call(), timeout=profile.timeout)
+            except LlmNotConfigured:
+                raise
+            except Exception as e:
+                if isinstance(e, asyncio.TimeoutError):
+                    self.stats["timeouts"] += 1
+                if attempt >= profile.max_retries or not is_retryable(e):
+                    self.stats["failures"] += 1
+                    raise
+                await self._backoff(profile, attempt, e)
+                attempt += 1
+
+    async def _backoff(self, profile: ModelProfile, attempt: int, error: Exception) -> None:
+        # Exponential backoff with full jitter, outside the semaphore
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        logger.warning(f"LLM call to {profile.model} failed ({type(error).__name__}: {error}); retrying in {delay:.2f}s")
+        self.stats["retries"] += 1
+        await asyncio.sleep(delay)
+
+    async def _cached(self, session_prefix: str, key: str, directives: set) -> Optional[str]:
+        if self.cache is None:
+            return None
+        if directives & {"no-cache", "no-store"}:
+            self.cache.record_bypass(session_prefix)
+            return None
+        return await self.cache.get(session_prefix, key)
+
+    async def complete(
+        self,
+        session_prefix: str,
+        system_message: str,
+        prompt: str,
+        profile: str = "text",
+        cache_control: Optional[str] = None,
+    ) -> str:
+        """Send one prompt and return the model's text response.
+
+        ``session_prefix`` names the endpoint; it selects the cache TTL and the
+        bucket the hit/miss counters are kept under. Callers that arrive while an
+        identical completion is in flight share its response text; each caller
+        still parses it itself, so generated ids stay unique per response.
+        """
+        model_profile = self.profiles[profile]
+        directives = cache_directives(cache_control)
+        key = cache_key(model_profile.model, system_message, prompt, model_profile.params)
+        cached = await self._cached(session_prefix, key, directives)
+        if cached is not None:
+            return cached
+
+        async def make_call():
+            chat = self._chat(session_prefix, system_message, model_profile)
+            from emergentintegrations.llm.chat import UserMessage
+
+            return await chat.send_message(UserMessage(text=prompt))
+
+        async def generate():
+            response = await self._call(model_profile, make_call)
+            if self.cache is not None and "no-store" not in directives:
+                await self.cache.set(session_prefix, key, response)
+            return response
+
+        return await self.single_flight.do(session_prefix, key, generate)
+
+    async def stream(
+        self,
+        session_prefix: str,
+        system_message: str,
+        prompt: str,
+        profile: str = "text",
+        cache_control: Optional[str] = None,
+    ) -> AsyncIterator[str]:
+        """Yield the completion as text deltas.
+
+        With a direct key for the profile's provider the deltas are the
+        provider's own, as generated; a failure before the first delta is
+        retried like ``complete``, one after it is raised. Without one, or on a
+        cache hit, the whole text arrives as a single delta. Streams are not
+        coalesced, but a finished stream is cached like a completion.
+        """
+        if not self.streams(profile):
+            yield await self.complete(session_prefix, system_message, prompt, profile, cache_control)
+            return
+        model_profile = self.profiles[profile]
+        directives = cache_directives(cache_control)
+        key = cache_key(model_profile.model, system_message, prompt, model_profile.params)
+        cached = await self._cached(session_prefix, key, directives)
+        if cached is not None:
+            yield cached
+            return
+
+        # The provider is read by a separate task into an unbounded queue, so
+        # the concurrency slot is held only while the provider is sending,
+        # never while a slow client drains the deltas
+        deltas: asyncio.Queue = asyncio.Queue()
+        reader = asyncio.create_task(self._read_stream(model_profile, system_message, prompt, deltas))
+        chunks: List[str] = []
+        try:
+            while True:
+                delta = await deltas.get()
+                if isinstance(delta, Exception):
+                    raise delta
+                if delta is None:
+                    break
+                chunks.append(delta)
+                yield delta
+        finally:
+            reader.cancel()
+        if self.cache is not None and "no-store" not in directives:
+            await self.cache.set(session_prefix, key, "".join(chunks))
+
+    async def _read_stream(self, profile: ModelProfile, system_message: str, prompt: str, deltas: asyncio.Queue) -> None:
+        """Put the provider's deltas on ``deltas``, then None, or the exception that ended the stream."""
+        sent = False
+        attempt = 0
+        while True:
+            self.stats["calls"] += 1
+            self.stats["streams"] += 1
+            try:
+                async with self._semaphore:
+                    async for delta in stream_text(
+                        profile.provider, profile.model, system_message, prompt,
+                        self.stream_api_keys[profile.provider], profile.timeout, session=self._http
+                    ):
+                        sent = True
+                        deltas.put_nowait(delta)
+                deltas.put_nowait(None)
+                return
+            except Exception as e:
+                if sent or attempt >= profile.max_retries or not is_retryable(e):
+                    self.stats["failures"] += 1
+                    deltas.put_nowait(e)
+                    return
+                await self._backoff(profile, attempt, e)
+                attempt += 1
+
+    async def generate_image_gemini(self, prompt: str, system_message: str) -> Tuple[str, List[dict]]:
+        """Returns ``(text, images)`` where each image is ``{"mime_type", "data"}`` with base64 data."""
+        model_profile = self.profiles["image_gemini"]
+
+        async def make_call():
+            chat = self._chat("image", system_message, model_profile)
+            from emergentintegrations.llm.chat import UserMessage
+
+            return await chat.send_message_multimodal_response(UserMessage(text=prompt))
+
+        return await self._call(model_profile, make_call)
+
+    async def generate_image_openai(self, prompt: str) -> List[bytes]:
+        model_profile = self.profiles["image_openai"]
+        if self._openai_images is None:
+            from emergentintegrations.llm.openai.image_generation import OpenAIImageGeneration
+
+            self._openai_images = OpenAIImageGeneration(api_key=self._require_key())
+
+        async def make_call():
+            return await self._openai_images.generate_images(
+                prompt=prompt,
+                model=model_profile.model,
+                number_of_images=1
+            )
+
+        return await self._call(model_profile, make_call)
@@ -0,0 +1,278 @@
+"""Parsing helpers for JSON that LLMs return as free text.
+
+Model output is rarely clean JSON: it comes wrapped in Markdown fences, led by
+a sentence of prose, sprinkled with trailing commas, or cut off mid-array when
+the response hits a token limit. ``extract_json`` copes with all of those and
+``parse_array`` additionally validates each element through a builder (usually
+a Pydantic model constructor), dropping the ones that do not fit instead of
+failing the whole response. ``JsonArrayStream`` does the same element
+recovery incrementally over a growing buffer for the streaming routes.
+"""
+import json
+import re
+from typing import Any, Callable, List, Optional
+
+# Characters that may follow the "[" of a real JSON array in our responses; this
+# keeps placeholders in prose such as "[Client Name]" from being taken as JSON.
+_ARRAY_FIRST_CHARS = '{["]'
+
+# Scanners jump between interesting characters instead of walking every one:
+# inside a string only escapes and the closing quote matter; outside, only
+# structure and the first character of a scalar.
+_STRING_TOKEN = re.compile(r'\\.|\\$|"', re.S)
+_VALUE_TOKEN = re.compile(r'[^\s]')
+
+
+class LlmParseError(ValueError):
+    """Raised when no JSON value can be recovered from a model response."""
+
+
+def _unfence(text: str) -> str:
+    """Contents of the first Markdown code fence, or the text itself if there is none."""
+    start = text.find("```")
+    if start == -1:
+        return text
+    body_start = text.find("\n", start)
+    if body_start == -1:
+        return text[start + 3:]
+    end = text.find("```", body_start)
+    return text[body_start + 1:] if end == -1 else text[body_start + 1:end]
+
+
+def _next_non_space(text: str, pos: int) -> Optional[str]:
+    while pos < len(text):
+        if not text[pos].isspace():
+            return text[pos]
+        pos += 1
+    return None
+
+
+def _find_json_start(text: str) -> Optional[int]:
+    for i, char in enumerate(text):
+        if char == "{":
+            return i
+        if char == "[" and (_next_non_space(text, i + 1) or "]") in _ARRAY_FIRST_CHARS:
+            return i
+    return None
+
+
+def _matching_close(text: str, start: int) -> Optional[int]:
+    """Index of the bracket closing the one at ``start``, or None if truncated."""
+    depth = 0
+    pos = start
+    while True:
+        match = _VALUE_TOKEN.search(text, pos)
+        if match is None:
+            return None
+        char = match.group()
+        pos = match.end()
+        if char == '"':
+            pos = _string_end(text, pos)
+            if pos is None:
+                return None
+        elif char in "[{":
+            depth += 1
+        elif char in "]}":
+            depth -= 1
+            if depth == 0:
+                return match.start()
+
+
+def _string_end(text: str, pos: int) -> Optional[int]:
+    """Position just past the quote closing a string whose body starts at ``pos``."""
+    while True:
+        match = _STRING_TOKEN.search(text, pos)
+        if match is None or match.group() == "\\":
+            return None
+        pos = match.end()
+        if match.group() == '"':
+            return pos
+
+
+def strip_trailing_commas(text: str) -> str:
+    """Drop commas that directly precede a closing bracket, outside of strings."""
+    out = []
+    in_string = escaped = False
+    for i, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == "," and (_next_non_space(text, i + 1) or "") in "]}":
+            continue
+        out.append(char)
+    return "".join(out)
+
+
+def loads_lenient(text: str) -> Any:
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        return json.loads(strip_trailing_commas(text))
+
+
+def extract_json(text: str) -> Any:
+    """Recover the JSON value from a model response.
+
+    Handles code fences, leading/trailing prose and trailing commas. A truncated
+    top-level array yields the elements that were complete before the cut.
+    """
+    text = text.strip()
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        pass
+
+    body = _unfence(text)
+    if body is not text:
+        try:
+            return json.loads(body)
+        except json.JSONDecodeError:
+            pass
+    start = _find_json_start(body)
+    if start is None:
+        raise LlmParseError("No JSON found in model response")
+
+    end = _matching_close(body, start)
+    if end is not None:
+        try:
+            return loads_lenient(body[start:end + 1])
+        except json.JSONDecodeError:
+            pass
+
+    if body[start] == "[":
+        elements = JsonArrayStream().feed(body[start:])
+        if elements:
+            return elements
+    raise LlmParseError("Malformed JSON in model response")
+
+
+def parse_array(text: str, build: Callable[[dict], Any] = dict, limit: Optional[int] = None) -> List[Any]:
+    """Extract a JSON array of objects and run each through ``build``.
+
+    A single object is treated as a one-element array, and an object wrapping a
+    single array (``{"ideas": [...]}``) is unwrapped. Elements that are not
+    objects, or that ``build`` rejects with a ``ValueError`` (which includes
+    Pydantic's ``ValidationError``), are skipped.
+    """
+    data = extract_json(text)
+    if isinstance(data, dict):
+        arrays = [value for value in data.values() if isinstance(value, list)]
+        data = arrays[0] if len(arrays) == 1 else [data]
+    if not isinstance(data, list):
+        raise LlmParseError("Model response is not a JSON array")
+    return build_items(data, build, limit)
+
+
+def build_items(elements: List[Any], build: Callable[[dict], Any] = dict, limit: Optional[int] = None) -> List[Any]:
+    items = []
+    for element in elements:
+        if limit is not None and len(items) >= limit:
+            break
+        if not isinstance(element, dict):
+            continue
+        try:
+            items.append(build(element))
+        except (ValueError, TypeError):
+            continue
+    return items
+
+
+class JsonArrayStream:
+    """Incrementally pull complete elements out of a JSON array as text arrives.
+
+    Text before the array (prose, a code fence) is skipped. Each call to
+    ``feed`` returns the elements that became complete with that chunk, so the
+    first element is available long before the closing ``]`` arrives. Elements
+    that do not parse, even after dropping trailing commas, are skipped.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._element_start = None
+        self.started = False
+        self.closed = False
+
+    def feed(self, text: str) -> List[Any]:
+        self._buffer += text
+        elements = []
+        buffer = self._buffer
+        pos = self._pos
+        while not self.closed:
+            if not self.started:
+                start = buffer.find("[", pos)
+                if start == -1:
+                    pos = len(buffer)
+                    break
+                follower = _next_non_space(buffer, start + 1)
+                if follower is None:
+                    pos = start  # wait for more text to decide
+                    break
+                pos = start + 1
+                if follower in _ARRAY_FIRST_CHARS:
+                    self.started = True
+                    self._depth = 1
+                continue
+            if self._in_string:
+                end = _string_end(buffer, pos)
+                if end is None:
+                    # Resume at a dangling escape, otherwise at the end of the buffer
+                    pos = len(buffer) - 1 if buffer.endswith("\\") and self._odd_escape(buffer) else len(buffer)
+                    break
+                self._in_string = False
+                pos = end
+                continue
+            match = _VALUE_TOKEN.search(buffer, pos)
+            if match is None:
+                pos = len(buffer)
+                break
+            char = match.group()
+            index = match.start()
+            pos = match.end()
+            if char == '"':
+                self._in_string = True
+                if self._depth == 1 and self._element_start is None:
+                    self._element_start = index
+            elif char in "[{":
+                if self._depth == 1 and self._element_start is None:
+                    self._element_start = index
+                self._depth += 1
+            elif char in "]}":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._emit(buffer, index, elements)
+                    self.closed = True
+            elif char == "," and self._depth == 1:
+                self._emit(buffer, index, elements)
+            elif self._depth == 1 and self._element_start is None:
+                self._element_start = index
+        # Drop consumed text so a long stream does not keep growing the buffer
+        keep_from = min(pos, self._element_start if self._element_start is not None else pos)
+        self._buffer = buffer[keep_from:]
+        self._pos = pos - keep_from
+        if self._element_start is not None:
+            self._element_start -= keep_from
+        return elements
+
+    @staticmethod
+    def _odd_escape(buffer: str) -> bool:
+        trailing = len(buffer) - len(buffer.rstrip("\\"))
+        return trailing % 2 == 1
+
+    def _emit(self, buffer: str, end: int, elements: List[Any]) -> None:
+        if self._element_start is None:
+            return
+        raw = buffer[self._element_start:end]
+        self._element_start = None
+        try:
+            elements.append(loads_lenient(raw))
+        except json.JSONDecodeError:
+            pass
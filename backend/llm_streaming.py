@@ -0,0 +1,142 @@
+"""Token streaming straight from the provider's HTTP API.
+
+``LlmChat`` only returns whole messages, so ``LlmGateway.stream`` uses this
+module when a direct provider key is configured (``GOOGLE_API_KEY`` for
+Gemini, ``OPENAI_API_KEY`` for OpenAI). Both APIs stream server-sent events.
+The blocking ``requests`` stream is read on an executor thread through a
+shared, pooled ``requests.Session``, and each text delta is handed to the
+event loop as soon as its event is complete.
+"""
+import asyncio
+import json
+import threading
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Iterable, Iterator, Optional, Tuple
+
+import requests
+
+GEMINI_URL = "https://generativelanguage.googleapis.com/v1beta/models/{model}:streamGenerateContent?alt=sse"
+OPENAI_URL = "https://api.openai.com/v1/chat/completions"
+
+Request = Tuple[str, dict, dict]
+
+
+class StreamError(Exception):
+    """An error event in the middle of a provider stream."""
+
+
+def sse_events(lines: Iterable[str]) -> Iterator[dict]:
+    """JSON payloads of the ``data:`` fields, one per event, until ``[DONE]``."""
+    data = []
+    for line in lines:
+        if line.startswith("data:"):
+            data.append(line[5:].lstrip(" "))
+        elif not line and data:
+            payload = "\n".join(data)
+            data = []
+            if payload == "[DONE]":
+                return
+            yield json.loads(payload)
+    if data and "\n".join(data) != "[DONE]":
+        yield json.loads("\n".join(data))
+
+
+def gemini_request(model: str, system_message: str, prompt: str, api_key: str) -> Request:
+    body = {
+        "system_instruction": {"parts": [{"text": system_message}]},
+        "contents": [{"role": "user", "parts": [{"text": prompt}]}],
+    }
+    return GEMINI_URL.format(model=model), {"x-goog-api-key": api_key}, body
+
+
+def gemini_delta(event: dict) -> str:
+    if "error" in event:
+        raise StreamError(event["error"].get("message", "Gemini stream failed"))
+    candidates = event.get("candidates") or [{}]
+    parts = (candidates[0].get("content") or {}).get("parts") or []
+    return "".join(part.get("text", "") for part in parts if not part.get("thought"))
+
+
+def openai_request(model: str, system_message: str, prompt: str, api_key: str) -> Request:
+    body = {
+        "model": model,
+        "messages": [{"role": "system", "content": system_message}, {"role": "user", "content": prompt}],
+        "stream": True,
+    }
+    return OPENAI_URL, {"Authorization": f"Bearer {api_key}"}, body
+
+
+def openai_delta(event: dict) -> str:
+    if "error" in event:
+        raise StreamError(event["error"].get("message", "OpenAI stream failed"))
+    choices = event.get("choices") or [{}]
+    return (choices[0].get("delta") or {}).get("content") or ""
+
+
+@dataclass(frozen=True)
+class StreamingProvider:
+    build_request: Callable[[str, str, str, str], Request]
+    delta: Callable[[dict], str]
+
+
+PROVIDERS = {
+    "gemini": StreamingProvider(gemini_request, gemini_delta),
+    "openai": StreamingProvider(openai_request, openai_delta),
+}
+
+
+async def stream_text(
+    provider: str,
+    model: str,
+    system_message: str,
+    prompt: str,
+    api_key: str,
+    timeout: float,
+    session: Optional[requests.Session] = None,
+) -> AsyncIterator[str]:
+    """Yield the completion's text deltas as the provider sends them.
+
+    ``timeout`` bounds connecting and each wait for more data, not the whole
+    stream. Closing the iterator early stops the reader thread at its next
+    event and closes the connection. Pass a long-lived ``session`` so
+    connections to the provider are reused.
+    """
+    spec = PROVIDERS[provider]
+    url, headers, body = spec.build_request(model, system_message, prompt, api_key)
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    stop = threading.Event()
+
+    def emit(item):
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, item)
+        except RuntimeError:
+            # The loop is closed; nobody is listening any more
+            pass
+
+    def pump():
+        try:
+            with (session or requests).post(url, headers=headers, json=body, stream=True, timeout=timeout) as response:
+                response.raise_for_status()
+                response.encoding = "utf-8"
+                for event in sse_events(response.iter_lines(decode_unicode=True)):
+                    if stop.is_set():
+                        break
+                    text = spec.delta(event)
+                    if text:
+                        emit((text, None))
+            emit((None, None))
+        except Exception as e:
+            emit((None, e))
+
+    loop.run_in_executor(None, pump)
+    try:
+        while True:
+            text, error = await queue.get()
+            if error is not None:
+                raise error
+            if text is None:
+                return
+            yield text
+    finally:
+        stop.set()
@@ -0,0 +1,143 @@
+"""Chunked binary storage for uploaded media.
+
+Media bytes live in a GridFS bucket (``media_files.files`` / ``media_files.chunks``)
+so no single MongoDB document has to hold a whole photo or video. The ``db.media``
+collection only keeps the metadata and a ``file_id`` pointing into the bucket.
+"""
+import hashlib
+from typing import AsyncIterator, Optional, Tuple
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+
+MEDIA_BUCKET = "media_files"
+CHUNK_SIZE = 255 * 1024  # GridFS default chunk size
+STREAM_READ_SIZE = 1024 * 1024
+UPLOAD_READ_SIZE = 1024 * 1024
+
+
+class MediaTooLarge(Exception):
+    """Raised when an upload grows past the per-file size limit."""
+
+    def __init__(self, limit: int):
+        super().__init__(f"File exceeds the {limit} byte upload limit")
+        self.limit = limit
+
+
+class RangeNotSatisfiable(Exception):
+    """Raised when a Range header cannot be served for a file of the given size."""
+
+    def __init__(self, size: int):
+        super().__init__(f"Requested range not satisfiable for {size} bytes")
+        self.size = size
+
+
+def parse_range_header(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single ``bytes=`` range into an inclusive ``(start, end)`` pair.
+
+    Returns ``None`` when the whole file should be sent (no header, another unit,
+    or multiple ranges, which we answer with a full 200 as RFC 9110 allows).
+    """
+    if not range_header:
+        return None
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+
+    start_text, _, end_text = spec.strip().partition("-")
+    try:
+        if start_text == "":
+            # Suffix range: the last N bytes
+            suffix = int(end_text)
+            if suffix <= 0:
+                raise RangeNotSatisfiable(size)
+            start, end = max(size - suffix, 0), size - 1
+        else:
+            start = int(start_text)
+            end = int(end_text) if end_text else size - 1
+    except ValueError:
+        return None
+
+    if start >= size or start > end:
+        raise RangeNotSatisfiable(size)
+    return start, min(end, size - 1)
+
+
+async def hash_stream(source, max_bytes: int) -> Tuple[int, str]:
+    """Return ``(size, sha256_hex)`` of an async-readable source without storing it.
+
+    Used to look up an upload by content hash before anything is written. Raises
+    ``MediaTooLarge`` as soon as the source passes ``max_bytes``.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    while True:
+        chunk = await source.read(UPLOAD_READ_SIZE)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > max_bytes:
+            raise MediaTooLarge(max_bytes)
+        digest.update(chunk)
+    return size, digest.hexdigest()
+
+
+class MediaStore:
+    """Thin wrapper around a GridFS bucket used for media bytes."""
+
+    def __init__(self, database, bucket_name: str = MEDIA_BUCKET, chunk_size: int = CHUNK_SIZE):
+        self.bucket = AsyncIOMotorGridFSBucket(database, bucket_name=bucket_name, chunk_size_bytes=chunk_size)
+
+    async def put(self, data: bytes, filename: str, content_type: str) -> str:
+        file_id = await self.bucket.upload_from_stream(
+            filename or "upload",
+            data,
+            metadata={"content_type": content_type},
+        )
+        return str(file_id)
+
+    async def put_stream(self, source, filename: str, content_type: str, max_bytes: int) -> Tuple[str, int, str]:
+        """Copy ``source`` into the bucket chunk by chunk.
+
+        ``source`` is anything with an async ``read(size)`` (e.g. an ``UploadFile``).
+        Only one read buffer is held at a time; each chunk is hashed and written as
+        it arrives. Returns ``(file_id, size, sha256_hex)``. If the stream grows past
+        ``max_bytes`` the partial file is removed and ``MediaTooLarge`` is raised.
+        """
+        grid_in = self.bucket.open_upload_stream(
+            filename or "upload",
+            metadata={"content_type": content_type},
+        )
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            while True:
+                chunk = await source.read(UPLOAD_READ_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise MediaTooLarge(max_bytes)
+                digest.update(chunk)
+                await grid_in.write(chunk)
+        except BaseException:
+            await grid_in.abort()
+            raise
+        await grid_in.close()
+        return str(grid_in._id), size, digest.hexdigest()
+
+    async def delete(self, file_id: str) -> None:
+        await self.bucket.delete(ObjectId(file_id))
+
+    async def stream(self, file_id: str, start: int = 0, end: Optional[int] = None) -> AsyncIterator[bytes]:
+        """Yield the bytes of ``file_id`` from ``start`` to ``end`` (inclusive)."""
+        grid_out = await self.bucket.open_download_stream(ObjectId(file_id))
+        last = grid_out.length - 1 if end is None else end
+        grid_out.seek(start)
+        remaining = last - start + 1
+        while remaining > 0:
+            chunk = await grid_out.read(min(STREAM_READ_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
@@ -0,0 +1,192 @@
+"""In-memory MinHash index for spotting near-duplicate captions and ideas.
+
+Each text is normalized (lowercased, hashtags and punctuation dropped) and cut
+into overlapping 5-byte shingles. Shingling, hashing and the ``num_perm``
+MinHash permutations are all NumPy array operations. The signatures live in
+one ``(capacity, num_perm)`` uint32 matrix, so a lookup compares a signature
+against every stored row in a single vectorized ``==``. The fraction of equal
+slots estimates the Jaccard similarity of the two shingle sets.
+
+Rows are added and removed as content and ideas are written. Removal
+tombstones a row, and the matrix is compacted once half of it is dead.
+``load`` bulk-inserts signatures computed off the event loop at startup. It
+skips keys written or removed while the load was running, so the index never
+resurrects deleted content or overwrites a newer version.
+"""
+import re
+from typing import Hashable, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Largest prime below 2**32: hash values stay uint32 and a * x + b fits in uint64
+PRIME = np.uint64(4294967291)
+_HASHTAG = re.compile(r"#\w+")
+_NON_WORD = re.compile(r"[^\w\s]+")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize(text: str) -> str:
+    text = _HASHTAG.sub(" ", text.lower())
+    text = _NON_WORD.sub(" ", text)
+    return _SPACES.sub(" ", text).strip()
+
+
+class NearDuplicateIndex:
+    def __init__(self, num_perm: int = 64, shingle_size: int = 5, threshold: float = 0.8, seed: int = 1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.threshold = threshold
+        rng = np.random.default_rng(seed)
+        # a < 2**31 and x < 2**32 keep a * x + b below 2**64
+        self._a = rng.integers(1, 2 ** 31, size=(num_perm, 1), dtype=np.uint64)
+        self._b = rng.integers(0, 2 ** 32, size=(num_perm, 1), dtype=np.uint64)
+        self._powers = np.array([256 ** i for i in range(shingle_size)], dtype=np.uint64)
+        self._signatures = np.zeros((0, num_perm), dtype=np.uint32)
+        self._alive = np.zeros(0, dtype=bool)
+        self._keys: List[Optional[Tuple[str, Hashable]]] = []
+        self._rows = {}
+        self._size = 0
+        self._dead = 0
+        # Keys written since load() started; the load must not override them
+        self._touched: Optional[set] = None
+        self.ready = False
+        self.stats = {"lookups": 0, "duplicates": 0, "added": 0, "removed": 0}
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """MinHash signature of ``text``, or None when nothing is left after normalizing."""
+        data = np.frombuffer(normalize(text or "").encode("utf-8"), dtype=np.uint8)
+        if data.size == 0:
+            return None
+        if data.size < self.shingle_size:
+            data = np.pad(data, (0, self.shingle_size - data.size))
+        windows = np.lib.stride_tricks.sliding_window_view(data, self.shingle_size).astype(np.uint64)
+        shingles = np.unique((windows * self._powers).sum(axis=1) % PRIME)
+        return ((self._a * shingles + self._b) % PRIME).min(axis=1).astype(np.uint32)
+
+    def signatures(self, texts: Sequence[str]) -> List[Optional[np.ndarray]]:
+        return [self.signature(text) for text in texts]
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _grow(self) -> None:
+        capacity = max(1024, len(self._signatures) * 2)
+        signatures = np.zeros((capacity, self.num_perm), dtype=np.uint32)
+        signatures[:self._size] = self._signatures[:self._size]
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:self._size] = self._alive[:self._size]
+        self._signatures, self._alive = signatures, alive
+
+    def _compact(self) -> None:
+        keep = np.flatnonzero(self._alive[:self._size])
+        self._signatures = self._signatures[keep].copy()
+        self._alive = np.ones(len(keep), dtype=bool)
+        self._keys = [self._keys[row] for row in keep]
+        self._rows = {key: row for row, key in enumerate(self._keys)}
+        self._size = len(keep)
+        self._dead = 0
+
+    def _insert(self, key: Tuple[str, Hashable], signature: np.ndarray) -> None:
+        self._discard(key)
+        if self._size == len(self._signatures):
+            self._grow()
+        row = self._size
+        self._signatures[row] = signature
+        self._alive[row] = True
+        self._keys.append(key)
+        self._rows[key] = row
+        self._size += 1
+
+    def _discard(self, key: Tuple[str, Hashable]) -> bool:
+        row = self._rows.pop(key, None)
+        if row is None:
+            return False
+        self._alive[row] = False
+        self._keys[row] = None
+        self._dead += 1
+        if self._dead > 1024 and self._dead * 2 > self._size:
+            self._compact()
+        return True
+
+    def add(self, source: str, item_id: Hashable, text: str) -> None:
+        key = (source, item_id)
+        if self._touched is not None:
+            self._touched.add(key)
+        signature = self.signature(text)
+        if signature is None:
+            self._discard(key)
+            return
+        self._insert(key, signature)
+        self.stats["added"] += 1
+
+    def remove(self, source: str, item_id: Hashable) -> None:
+        key = (source, item_id)
+        if self._touched is not None:
+            self._touched.add(key)
+        if self._discard(key):
+            self.stats["removed"] += 1
+
+    def begin_load(self) -> None:
+        self._touched = set()
+
+    def load(self, entries: Iterable[Tuple[str, Hashable, Optional[np.ndarray]]]) -> int:
+        """Insert precomputed ``(source, id, signature)`` rows; call ``begin_load`` before computing them."""
+        touched = self._touched or set()
+        loaded = 0
+        for source, item_id, signature in entries:
+            key = (source, item_id)
+            if signature is None or key in touched:
+                continue
+            self._insert(key, signature)
+            loaded += 1
+        return loaded
+
+    def finish_load(self) -> None:
+        self._touched = None
+        self.ready = True
+
+    def best_match(self, signature: Optional[np.ndarray]) -> Optional[dict]:
+        """The most similar stored text at or above ``threshold``, as {source, id, similarity}."""
+        self.stats["lookups"] += 1
+        if signature is None or not self._rows:
+            return None
+        equal = np.count_nonzero(self._signatures[:self._size] == signature, axis=1)
+        equal[~self._alive[:self._size]] = 0
+        row = int(equal.argmax())
+        similarity = equal[row] / self.num_perm
+        if similarity < self.threshold:
+            return None
+        self.stats["duplicates"] += 1
+        source, item_id = self._keys[row]
+        return {"source": source, "id": item_id, "similarity": round(float(similarity), 3)}
+
+    def match(self, text: str) -> Optional[dict]:
+        return self.best_match(self.signature(text))
+
+    def unique(self, texts: Sequence[str]) -> List[Optional[dict]]:
+        """For each text, the stored or earlier-in-``texts`` near-duplicate it repeats, else None."""
+        signatures = self.signatures(texts)
+        results = []
+        for i, signature in enumerate(signatures):
+            found = self.best_match(signature)
+            if found is None and signature is not None:
+                for j in range(i):
+                    if signatures[j] is not None and results[j] is None:
+                        similarity = float((signatures[j] == signature).mean())
+                        if similarity >= self.threshold:
+                            self.stats["duplicates"] += 1
+                            found = {"source": "response", "index": j, "similarity": round(similarity, 3)}
+                            break
+            results.append(found)
+        return results
+
+    def snapshot(self) -> dict:
+        return {
+            **self.stats,
+            "ready": self.ready,
+            "entries": len(self._rows),
+            "capacity": len(self._signatures),
+            "memory_bytes": int(self._signatures.nbytes + self._alive.nbytes),
+            "num_perm": self.num_perm,
+            "threshold": self.threshold,
+        }
@@ -0,0 +1,25 @@
+"""Opaque keyset cursors for GET /api/content.
+
+A cursor is the ``(created_at, id)`` of the last document on a page, as
+unpadded URL-safe base64 of a compact JSON pair. The next page starts strictly
+after that key in the ``(created_at desc, id desc)`` order the indexes serve.
+"""
+import base64
+import json
+from typing import Tuple
+
+
+def encode_cursor(doc: dict) -> str:
+    raw = json.dumps([doc["created_at"], doc["id"]], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """``(created_at, id)`` from a cursor; raises ValueError for anything else."""
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError:
+        raise ValueError("Invalid cursor")
+    if not isinstance(key, list) or len(key) != 2 or not all(isinstance(part, str) for part in key):
+        raise ValueError("Invalid cursor")
+    return key[0], key[1]
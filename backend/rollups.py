@@ -0,0 +1,91 @@
+"""Incrementally maintained analytics counters.
+
+A single document in ``db.analytics_rollups`` holds the content totals the
+dashboard needs. Write paths apply ``$inc`` deltas to it, so reading analytics
+is one ``find_one`` instead of a scan of ``db.content``. When the document is
+missing (fresh database, or after a manual reset) it is rebuilt from one
+aggregation pass.
+"""
+from datetime import datetime, timezone
+from typing import Iterable, Optional, Tuple
+
+ROLLUP_ID = "content"
+
+
+def _field(value) -> str:
+    # Status/niche values become sub-document keys, which may not contain dots or lead with $
+    return str(value).replace(".", "_").lstrip("$") or "unknown"
+
+
+async def compute_content_stats(db) -> dict:
+    """Count content by status and niche in a single pass over db.content."""
+    groups = await db.content.aggregate([
+        {"$group": {"_id": {"status": "$status", "niche": "$niche"}, "count": {"$sum": 1}}}
+    ]).to_list(None)
+
+    stats = {"total": 0, "status": {}, "niche": {}}
+    for group in groups:
+        count = group["count"]
+        status = _field(group["_id"].get("status"))
+        niche = _field(group["_id"].get("niche"))
+        stats["total"] += count
+        stats["status"][status] = stats["status"].get(status, 0) + count
+        stats["niche"][niche] = stats["niche"].get(niche, 0) + count
+    stats["content_ideas"] = await db.content_ideas.count_documents({})
+    return stats
+
+
+async def rebuild_rollup(db) -> dict:
+    stats = await compute_content_stats(db)
+    stats["updated_at"] = datetime.now(timezone.utc).isoformat()
+    await db.analytics_rollups.replace_one({"_id": ROLLUP_ID}, stats, upsert=True)
+    return stats
+
+
+async def read_rollup(db) -> dict:
+    rollup = await db.analytics_rollups.find_one({"_id": ROLLUP_ID}, {"_id": 0})
+    if rollup is None:
+        rollup = await rebuild_rollup(db)
+    return rollup
+
+
+def content_delta(before: Optional[dict], after: Optional[dict]) -> dict:
+    """``$inc`` document that moves the counters from ``before`` to ``after``.
+
+    Either side may be ``None`` (insert / delete). Only ``status`` and ``niche``
+    are read from the documents.
+    """
+    inc = {}
+    for doc, sign in ((before, -1), (after, 1)):
+        if doc is None:
+            continue
+        for key in ("total", f"status.{_field(doc.get('status'))}", f"niche.{_field(doc.get('niche'))}"):
+            inc[key] = inc.get(key, 0) + sign
+    return {key: value for key, value in inc.items() if value}
+
+
+async def apply_content_change(db, before: Optional[dict], after: Optional[dict]) -> None:
+    await apply_increments(db, content_delta(before, after))
+
+
+async def apply_content_changes(db, changes: Iterable[Tuple[Optional[dict], Optional[dict]]]) -> None:
+    """Fold many (before, after) pairs into a single ``$inc`` (bulk writes)."""
+    inc = {}
+    for before, after in changes:
+        for key, value in content_delta(before, after).items():
+            inc[key] = inc.get(key, 0) + value
+    await apply_increments(db, {key: value for key, value in inc.items() if value})
+
+
+async def apply_increments(db, inc: dict) -> None:
+    if not inc:
+        return
+    # No upsert: until the rollup exists, read_rollup() builds it from scratch
+    await db.analytics_rollups.update_one(
+        {"_id": ROLLUP_ID},
+        {"$inc": inc, "$set": {"updated_at": datetime.now(timezone.utc).isoformat()}}
+    )
+
+
+async def record_ideas(db, count: int) -> None:
+    await apply_increments(db, {"content_ideas": count} if count else {})
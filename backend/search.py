@@ -0,0 +1,217 @@
+"""Full-text and faceted search over content, generated ideas and scheduled posts.
+
+Words are matched through Mongo text indexes (see ``indexes.INDEXES``): one per
+collection, over titles, captions/descriptions and hashtags, with stemming,
+so "weddings" finds "wedding" and "goldenhour" finds ``#goldenhour``. Hashtag
+filters are exact matches on the multikey hashtag index and dates are ranges
+on the ISO timestamp strings. The whole search is a single aggregation: one
+``$match`` the indexes can serve, a ``$sort`` ahead of the ``$facet`` (so a
+no-text search still walks ``created_at`` in index order), then one ``$facet``
+returning the page, the total and the counts by niche, status and content
+type.
+
+The ``$facet`` sees at most ``FACET_SCAN_MAX`` matches, taken in sort order
+by a ``$limit`` ahead of it, so a broad search costs the same at 100k
+documents as at 10k. Past the cap the total is reported as
+``FACET_SCAN_MAX`` with ``capped`` set, and the facet counts cover the
+first matches only. The offset limit of the route keeps every reachable
+page inside the cap.
+
+Scheduled posts carry no text of their own. When a search filters on their
+content, the matching content ids are looked up first (capped at
+``SCHEDULED_CONTENT_MAX``) and the posts are then matched on ``content_id``.
+"""
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from pymongo import ASCENDING, DESCENDING
+
+SCHEDULED_CONTENT_MAX = 5000
+FACET_SCAN_MAX = 5000
+
+
+@dataclass(frozen=True)
+class SearchSource:
+    collection: str
+    hashtag_field: str
+    date_field: str
+    # filter/facet name -> document field
+    facets: Dict[str, str]
+    sort: List[Tuple[str, int]] = field(default_factory=lambda: [("created_at", DESCENDING), ("id", DESCENDING)])
+
+
+SOURCES = {
+    "content": SearchSource(
+        collection="content",
+        hashtag_field="hashtags",
+        date_field="created_at",
+        facets={"niche": "niche", "status": "status", "content_type": "media_type"},
+    ),
+    "ideas": SearchSource(
+        collection="content_ideas",
+        hashtag_field="suggested_hashtags",
+        date_field="created_at",
+        facets={"niche": "niche", "content_type": "content_type"},
+    ),
+    "scheduled": SearchSource(
+        collection="scheduled_posts",
+        hashtag_field="content.hashtags",
+        date_field="scheduled_date",
+        # status is the post's own; niche and content type come from its content
+        facets={"niche": "content.niche", "status": "status", "content_type": "content.media_type"},
+        sort=[("scheduled_date", ASCENDING), ("scheduled_time", ASCENDING)],
+    ),
+}
+
+
+def normalize_hashtags(raw: Optional[str]) -> List[str]:
+    """``"wedding, #GoldenHour"`` -> ``["#wedding", "#GoldenHour"]``"""
+    if not raw:
+        return []
+    tags = []
+    for tag in raw.split(","):
+        tag = tag.strip()
+        if tag and tag != "#":
+            tags.append(tag if tag.startswith("#") else f"#{tag}")
+    return tags
+
+
+def date_range(date_from: Optional[date], date_to: Optional[date]) -> Optional[dict]:
+    """Inclusive calendar-day range over ISO date or timestamp strings."""
+    if date_from and date_to and date_from > date_to:
+        raise ValueError("date_from must not be after date_to")
+    bounds = {}
+    if date_from:
+        bounds["$gte"] = date_from.isoformat()
+    if date_to:
+        # Timestamps on date_to sort after "YYYY-MM-DD", so bound by the next day
+        bounds["$lt"] = (date_to + timedelta(days=1)).isoformat()
+    return bounds or None
+
+
+def _check_filters(source_name: str, filters: Dict[str, Optional[str]]) -> Dict[str, str]:
+    source = SOURCES[source_name]
+    active = {name: value for name, value in filters.items() if value}
+    unsupported = [name for name in active if name not in source.facets]
+    if unsupported:
+        raise ValueError(f"{', '.join(unsupported)} cannot filter {source_name}; use {', '.join(source.facets)}")
+    return active
+
+
+def _scan_limit(scan_max: Optional[int]) -> List[dict]:
+    # One extra match tells a capped total from an exact one
+    return [{"$limit": scan_max + 1}] if scan_max else []
+
+
+def _facet_stages(source: SearchSource, offset: int, limit: int, project: dict) -> dict:
+    stages = {
+        "results": [{"$skip": offset}, {"$limit": limit}, {"$project": project}],
+        "total": [{"$count": "count"}],
+    }
+    for name, path in source.facets.items():
+        stages[name] = [{"$sortByCount": f"${path}"}]
+    return {"$facet": stages}
+
+
+def build_pipeline(
+    source_name: str,
+    q: Optional[str] = None,
+    hashtags: Optional[List[str]] = None,
+    filters: Optional[Dict[str, Optional[str]]] = None,
+    dates: Optional[dict] = None,
+    offset: int = 0,
+    limit: int = 20,
+    scan_max: Optional[int] = FACET_SCAN_MAX,
+) -> List[dict]:
+    """Aggregation for ``content`` or ``ideas``; raises ValueError for a filter the source lacks."""
+    source = SOURCES[source_name]
+    match = {}
+    if q:
+        match["$text"] = {"$search": q}
+    if hashtags:
+        match[source.hashtag_field] = {"$all": hashtags}
+    for name, value in _check_filters(source_name, filters or {}).items():
+        match[source.facets[name]] = value
+    if dates:
+        match[source.date_field] = dates
+
+    project = {"_id": 0}
+    if q:
+        project["score"] = {"$meta": "textScore"}
+        sort = {"score": {"$meta": "textScore"}, **dict(source.sort)}
+    else:
+        sort = dict(source.sort)
+    return [{"$match": match}, {"$sort": sort}, *_scan_limit(scan_max), _facet_stages(source, offset, limit, project)]
+
+
+def build_scheduled_pipeline(
+    content_ids: Optional[List[str]] = None,
+    status: Optional[str] = None,
+    dates: Optional[dict] = None,
+    offset: int = 0,
+    limit: int = 20,
+    scan_max: Optional[int] = FACET_SCAN_MAX,
+) -> List[dict]:
+    """Aggregation over scheduled posts, each joined to the content it publishes."""
+    source = SOURCES["scheduled"]
+    match = {}
+    if content_ids is not None:
+        match["content_id"] = {"$in": content_ids}
+    if status:
+        match["status"] = status
+    if dates:
+        match[source.date_field] = dates
+    return [
+        {"$match": match},
+        {"$sort": dict(source.sort)},
+        *_scan_limit(scan_max),
+        {"$lookup": {"from": "content", "localField": "content_id", "foreignField": "id", "as": "content"}},
+        {"$unwind": {"path": "$content", "preserveNullAndEmptyArrays": True}},
+        _facet_stages(source, offset, limit, {"_id": 0, "content._id": 0}),
+    ]
+
+
+def _facet_result(raw: dict, source: SearchSource, scan_max: Optional[int]) -> dict:
+    total = raw["total"][0]["count"] if raw["total"] else 0
+    capped = bool(scan_max) and total > scan_max
+    return {
+        "results": raw["results"],
+        "total": scan_max if capped else total,
+        "capped": capped,
+        "facets": {
+            name: [{"value": bucket["_id"], "count": bucket["count"]} for bucket in raw[name] if bucket["_id"] is not None]
+            for name in source.facets
+        },
+    }
+
+
+async def run_search(
+    db,
+    source_name: str,
+    q: Optional[str] = None,
+    hashtags: Optional[List[str]] = None,
+    filters: Optional[Dict[str, Optional[str]]] = None,
+    dates: Optional[dict] = None,
+    offset: int = 0,
+    limit: int = 20,
+    max_time_ms: Optional[int] = None,
+    scan_max: Optional[int] = FACET_SCAN_MAX,
+) -> dict:
+    source = SOURCES[source_name]
+    options = {"maxTimeMS": max_time_ms} if max_time_ms else {}
+    if source_name == "scheduled":
+        active = _check_filters(source_name, filters or {})
+        content_ids = None
+        content_filters = {name: value for name, value in active.items() if name != "status"}
+        if q or hashtags or content_filters:
+            content_match = build_pipeline("content", q=q, hashtags=hashtags, filters=content_filters)[0]["$match"]
+            matched = await db.content.find(content_match, {"_id": 0, "id": 1}).limit(SCHEDULED_CONTENT_MAX).to_list(SCHEDULED_CONTENT_MAX)
+            content_ids = [doc["id"] for doc in matched]
+            if not content_ids:
+                return {"results": [], "total": 0, "capped": False, "facets": {name: [] for name in source.facets}}
+        pipeline = build_scheduled_pipeline(content_ids, active.get("status"), dates, offset, limit, scan_max)
+    else:
+        pipeline = build_pipeline(source_name, q, hashtags, filters, dates, offset, limit, scan_max)
+    raw = await db[source.collection].aggregate(pipeline, **options).to_list(1)
+    return _facet_result(raw[0], source, scan_max)
@@ -1,17 +1,40 @@
-from fastapi import FastAPI, APIRouter, HTTPException, UploadFile, File, Form
+from fastapi import FastAPI, APIRouter, HTTPException, UploadFile, File, Form, Header, Query, Request
+from fastapi.responses import StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, ValidationError, field_validator
 from typing import List, Optional
 import uuid
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
+import time
 import base64
-from emergentintegrations.llm.chat import LlmChat, UserMessage, ImageContent
-from emergentintegrations.llm.openai.image_generation import OpenAIImageGeneration
+import hashlib
+import json
+import asyncio
+from llm_gateway import LlmGateway
+from llm_cache import LlmResponseCache, MemoryCacheBackend, MongoCacheBackend
+from llm_parser import JsonArrayStream, LlmParseError, build_items, extract_json, parse_array
+from pymongo import DeleteOne, InsertOne, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, ExecutionTimeout
+from media_store import MediaStore, MediaTooLarge, RangeNotSatisfiable, hash_stream, parse_range_header
+from upload_limits import RequestSizeLimitMiddleware
+from compression import CompressionMiddleware, CompressionStats
+from json_responses import select_response_class
+import rollups
+from indexes import ensure_indexes, explain_query_shapes
+from jobs import JobQueue
+from write_behind import WriteBehindBuffer
+from http_cache import CATALOG_CACHE_CONTROL, IMMUTABLE, etag_matches, http_date, not_modified, respond_json
+from catalog import CatalogError, CatalogStore
+from hashtag_engine import HashtagEngine, HashtagStats
+from near_duplicates import NearDuplicateIndex
+from pagination import decode_cursor, encode_cursor
+from search import SOURCES as SEARCH_SOURCES, date_range, normalize_hashtags, run_search
+from image_variants import EAGER_VARIANTS, VARIANTS, VariantNotAvailable, VariantPipeline, is_renderable
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -21,294 +44,83 @@ mongo_url = os.environ['MONGO_URL']
 client = AsyncIOMotorClient(mongo_url)
 db = client[os.environ['DB_NAME']]
 
-# Create the main app
-app = FastAPI()
+# Chunked binary storage for media bytes (GridFS)
+media_store = MediaStore(db)
 
-# Create a router with the /api prefix
-api_router = APIRouter(prefix="/api")
+# Cache for LLM generations: in-process LRU, optionally backed by a shared Mongo collection
+llm_cache = LlmResponseCache(
+    local=MemoryCacheBackend(max_entries=int(os.environ.get('LLM_CACHE_MAX_ENTRIES', 1024))),
+    shared=MongoCacheBackend(db.llm_cache) if os.environ.get('LLM_CACHE_SHARED', 'mongo') == 'mongo' else None
+)
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+# Shared LLM gateway: one key lookup, bounded concurrency, timeouts and retries
+llm_gateway = LlmGateway(
+    api_key=os.environ.get("EMERGENT_LLM_KEY"),
+    max_concurrency=int(os.environ.get('LLM_MAX_CONCURRENCY', 8)),
+    cache=llm_cache,
+    # Direct provider keys, used for token streaming on the /stream routes
+    stream_api_keys={"gemini": os.environ.get("GOOGLE_API_KEY"), "openai": os.environ.get("OPENAI_API_KEY")}
 )
-logger = logging.getLogger(__name__)
 
-# Photography niches
-PHOTOGRAPHY_NICHES = [
-    "housewarming", "baby_shower", "wedding", "portrait", "landscape", "event"
-]
-
-# Photography tips database - General tips for all photographers
-PHOTOGRAPHY_TIPS = {
-    "lighting": [
-        "Golden hour (1 hour after sunrise/before sunset) creates magical warm light",
-        "Use window light for soft, flattering portraits indoors",
-        "Overcast days act as nature's softbox - perfect for portraits",
-        "Backlight your subjects during golden hour for dreamy silhouettes",
-        "Use reflectors to fill in shadows on faces",
-        "Avoid harsh midday sun - it creates unflattering shadows"
-    ],
-    "composition": [
-        "Rule of thirds - place subjects at intersection points",
-        "Leading lines draw viewers into your photo",
-        "Frame your subject using natural elements like doorways or trees",
-        "Leave negative space to create visual breathing room",
-        "Get low for dramatic perspectives",
-        "Shoot through foreground elements for depth"
-    ],
-    "camera_settings": [
-        "Use f/1.8-2.8 for beautiful bokeh in portraits",
-        "Keep ISO as low as possible for cleaner images",
-        "1/125s minimum shutter speed for sharp handheld portraits",
-        "Shoot in RAW for maximum editing flexibility",
-        "Use back-button focus for better control",
-        "Bracket exposures in tricky lighting situations"
-    ],
-    "posing": [
-        "Have subjects shift weight to back foot for natural stance",
-        "Chin slightly forward and down to define jawline",
-        "Create gaps between arms and body to slim appearance",
-        "Give subjects something to do with their hands",
-        "Encourage movement for natural expressions",
-        "Capture in-between moments for authentic shots"
-    ],
-    "business": [
-        "Share behind-the-scenes content to build connection",
-        "Post client testimonials with their permission",
-        "Create educational content to establish expertise",
-        "Engage with comments within the first hour of posting",
-        "Use carousel posts - they get 3x more engagement",
-        "Post consistently - aim for 4-7 times per week"
-    ],
-    "editing": [
-        "Develop a consistent editing style for brand recognition",
-        "Don't over-smooth skin - keep texture natural",
-        "Use HSL adjustments to make colors pop",
-        "Straighten horizons - even slight tilts look unprofessional",
-        "Crop intentionally to strengthen composition",
-        "Add subtle vignette to draw focus to subject"
-    ]
-}
+# Upload size limits (bytes)
+MAX_UPLOAD_FILE_BYTES = int(os.environ.get('MAX_UPLOAD_FILE_BYTES', 100 * 1024 * 1024))
+MAX_UPLOAD_REQUEST_BYTES = int(os.environ.get('MAX_UPLOAD_REQUEST_BYTES', MAX_UPLOAD_FILE_BYTES + 1024 * 1024))
 
-# Content mix suggestions for variety
-CONTENT_MIX_IDEAS = {
-    "behind_the_scenes": [
-        "Show your camera gear setup",
-        "Share your editing process timelapse",
-        "Document a day in your life as photographer",
-        "Show your workspace/studio setup",
-        "Share packing routine for on-location shoots",
-        "Post bloopers and funny moments from shoots"
-    ],
-    "educational": [
-        "Before/after editing comparison",
-        "Quick tip in 60 seconds (Reel)",
-        "Common photography mistakes to avoid",
-        "How to pose for photos (for clients)",
-        "Best times of day for photos in your city",
-        "Equipment recommendations at different price points"
-    ],
-    "engagement_posts": [
-        "This or That polls (editing styles, locations)",
-        "Caption this photo contests",
-        "Ask followers: sunrise or sunset sessions?",
-        "Share your photography journey milestone",
-        "Client appreciation posts",
-        "Throwback to your first professional shoot"
-    ],
-    "trending_content": [
-        "Seasonal mini sessions announcements",
-        "Holiday-themed photo ideas",
-        "Trending Reel audio with your best shots",
-        "Collaboration with local vendors",
-        "Location reveal of hidden gems",
-        "Day-to-night transformation shots"
-    ],
-    "portfolio_showcase": [
-        "Single stunning hero image with story",
-        "Before/after of venue transformation",
-        "Series of emotions from one event",
-        "Color-coordinated grid posts",
-        "Carousel of best shots from one session",
-        "Client story feature with multiple photos"
-    ]
-}
+# Thumbnails and WebP/AVIF variants, rendered in a process pool
+variant_pipeline = VariantPipeline(
+    media_store, db.media,
+    max_workers=int(os.environ.get('MEDIA_VARIANT_WORKERS', min(2, os.cpu_count() or 1)))
+)
 
-# Seasonal content calendar
-SEASONAL_CONTENT = {
-    "january": ["New Year resolution shoots", "Winter wonderland sessions", "Cozy indoor portraits"],
-    "february": ["Valentine's couples sessions", "Galentine's group shoots", "Love story features"],
-    "march": ["Spring bloom portraits", "St. Patrick's themed shoots", "Cherry blossom sessions"],
-    "april": ["Easter family photos", "Spring cleaning your portfolio", "Rainy day creative shots"],
-    "may": ["Mother's Day specials", "Graduation sessions", "Flower field portraits"],
-    "june": ["Wedding season highlights", "Father's Day features", "Summer solstice golden hour"],
-    "july": ["Summer family sessions", "Beach/pool photography", "Fireworks and celebrations"],
-    "august": ["Back to school minis", "Late summer golden sessions", "Sunset chasing content"],
-    "september": ["Fall mini sessions launch", "Labor Day family photos", "Autumn color scouting"],
-    "october": ["Halloween themed shoots", "Pumpkin patch sessions", "Fall foliage portraits"],
-    "november": ["Thanksgiving family sessions", "Gratitude posts", "Holiday card session promos"],
-    "december": ["Holiday mini sessions", "Year in review posts", "Winter holiday magic shots"]
-}
+# Generated ideas are persisted behind the response, in insert_many batches
+idea_writer = WriteBehindBuffer(
+    db.content_ideas,
+    name="content_ideas",
+    max_batch=int(os.environ.get('IDEA_WRITE_BATCH', 100)),
+    flush_interval=float(os.environ.get('IDEA_WRITE_INTERVAL', 0.5)),
+    on_inserted=lambda count: rollups.record_ideas(db, count)
+)
+IDEA_WRITE_BEHIND = os.environ.get('IDEA_WRITE_BEHIND', '1') != '0'
+
+# Background jobs (image generation); workers per provider cap its concurrency in this process
+job_queue = JobQueue(
+    db.jobs,
+    provider_concurrency={
+        "gemini": int(os.environ.get('JOB_CONCURRENCY_GEMINI', 4)),
+        "openai": int(os.environ.get('JOB_CONCURRENCY_OPENAI', 2)),
+    },
+    reuse_seconds=int(os.environ.get('JOB_REUSE_SECONDS', 300))
+)
 
-# Viral content hooks and templates
-VIRAL_HOOKS = {
-    "curiosity": [
-        "The one mistake 90% of photographers make...",
-        "I never share this editing secret, but today...",
-        "What I wish I knew before my first wedding shoot",
-        "The $0 trick that doubled my bookings",
-        "Stop doing this if you want better photos"
-    ],
-    "storytelling": [
-        "This photo almost didn't happen. Here's why...",
-        "Behind every great photo is a story...",
-        "The moment that changed everything...",
-        "They said it couldn't be done. We proved them wrong.",
-        "3 years ago I almost quit photography. Today..."
-    ],
-    "value": [
-        "Save this for your next photoshoot",
-        "Free tip that pros charge $500 to teach",
-        "The exact settings I used for this shot",
-        "Copy my workflow (step by step)",
-        "Steal my client communication template"
-    ],
-    "engagement": [
-        "Hot take: [controversial opinion]",
-        "Unpopular opinion in photography...",
-        "Rate this edit 1-10 👇",
-        "Which one do you prefer? A or B",
-        "Wrong answers only: What did I say to get this reaction?"
-    ],
-    "social_proof": [
-        "Another happy client! Here's what they said...",
-        "Fully booked for [month]! Here's how...",
-        "From 0 to 50 bookings in 6 months",
-        "Why clients keep coming back year after year",
-        "The review that made me tear up"
-    ]
-}
+# MinHash signatures of saved captions and idea descriptions, checked before generated text is returned
+near_duplicates = NearDuplicateIndex(
+    num_perm=int(os.environ.get('NEAR_DUP_PERMUTATIONS', 64)),
+    threshold=float(os.environ.get('NEAR_DUP_THRESHOLD', 0.8))
+)
+NEAR_DUP_RETRIES = int(os.environ.get('NEAR_DUP_RETRIES', 1))
 
-# Reel ideas for photographers
-REEL_IDEAS = {
-    "trending": [
-        {"title": "Photo Dump Transition", "description": "Show multiple shots from one session with trending audio", "duration": "15-30s"},
-        {"title": "Before/After Edit", "description": "Split screen showing RAW vs edited photo transformation", "duration": "15s"},
-        {"title": "Day in My Life", "description": "Document a full photoshoot day from prep to delivery", "duration": "60-90s"},
-        {"title": "Gear Check", "description": "Quick reveal of what's in your camera bag", "duration": "15-30s"},
-        {"title": "Client Reaction", "description": "Film client seeing their photos for first time", "duration": "15-30s"}
-    ],
-    "educational": [
-        {"title": "Quick Posing Tips", "description": "3 poses anyone can do in 30 seconds", "duration": "30s"},
-        {"title": "Lighting Hack", "description": "Show a simple lighting technique with before/after", "duration": "15-30s"},
-        {"title": "Location Scout", "description": "Reveal a hidden gem location in your city", "duration": "30-60s"},
-        {"title": "Edit With Me", "description": "Speed edit of one photo with tips overlay", "duration": "60s"},
-        {"title": "Mistake to Masterpiece", "description": "Show how you saved a 'ruined' photo", "duration": "30s"}
-    ],
-    "engagement_boosters": [
-        {"title": "Guess the Edit", "description": "Show original, let followers guess the final look", "duration": "15s"},
-        {"title": "This or That", "description": "Two editing styles, ask followers to choose", "duration": "15s"},
-        {"title": "POV: You Booked Me", "description": "Show the client experience from inquiry to delivery", "duration": "30-60s"},
-        {"title": "Red Flags in Photography", "description": "Humorous take on client/photographer red flags", "duration": "30s"},
-        {"title": "Photographer Problems", "description": "Relatable struggles with humor", "duration": "15-30s"}
-    ]
-}
+# Hashtag use and co-occurrence counts over saved content and ideas, kept current on writes
+hashtag_engine = HashtagEngine()
 
-# Bio optimization templates
-BIO_TEMPLATES = {
-    "wedding": [
-        "📸 Capturing love stories since [year]",
-        "💒 Wedding & Elopement Photographer",
-        "✨ Turning moments into forever memories",
-        "📍 [City] | Available worldwide",
-        "👇 Book your free consultation"
-    ],
-    "portrait": [
-        "📸 Portrait & Headshot Specialist",
-        "✨ Helping you look your best",
-        "🎯 Confidence-boosting photos",
-        "📍 [City] Studio & On-location",
-        "👇 DM 'READY' to book"
-    ],
-    "family": [
-        "👨‍👩‍👧‍👦 Family & Newborn Photographer",
-        "💕 Freezing your precious moments",
-        "📍 [City] & surrounding areas",
-        "🏆 [X]+ happy families served",
-        "👇 Link in bio for sessions"
-    ]
-}
+# Niches, tips, hooks, templates and hashtags: immutable records with prebuilt lookups and bodies
+catalogs = CatalogStore(os.environ.get('CATALOG_DATA_FILE', ROOT_DIR / 'catalog_data.json'))
 
-# CTA (Call-to-Action) variations
-CTA_TEMPLATES = {
-    "booking": [
-        "DM me 'BOOK' to check availability",
-        "Spots filling fast for [month]! Link in bio to reserve",
-        "Ready to capture your moments? Let's chat 💬",
-        "Only [X] spots left this month! DM to claim yours",
-        "Your story deserves to be told. Book your session today"
-    ],
-    "engagement": [
-        "Double tap if you agree! ❤️",
-        "Tag someone who needs to see this",
-        "Save this for later 📌",
-        "Share this with a fellow photographer",
-        "Drop a 📸 if you're a photographer too"
-    ],
-    "lead_generation": [
-        "DM me 'GUIDE' for my free posing guide",
-        "Comment 'TIPS' and I'll send you my top 5 editing secrets",
-        "Want my preset pack? Link in bio!",
-        "Free consultation for first 5 people who DM today",
-        "Reply 'INFO' for pricing and packages"
-    ]
-}
+# Create the main app
+# JSON_RESPONSE=orjson opts the whole app into orjson serialization; otherwise
+# FastAPI's own JSONResponse is kept
+JSONResponseClass = select_response_class(os.environ.get('JSON_RESPONSE', 'stdlib'))
 
-# Client attraction post templates
-CLIENT_MAGNETS = {
-    "testimonial_templates": [
-        "⭐⭐⭐⭐⭐\n\n\"{testimonial}\"\n\n- {client_name}\n\nReady for your own amazing experience? DM me!",
-        "CLIENT LOVE 💕\n\nWorking with {client_name} was absolutely magical. Here's what they had to say:\n\n\"{testimonial}\"\n\nYour turn next? Link in bio!",
-        "This review made my whole week 🥹\n\n\"{testimonial}\"\n\nThank you {client_name} for trusting me with your special day!"
-    ],
-    "portfolio_templates": [
-        "✨ NEW WORK ✨\n\n{session_type} session with {client_name}\n\nLocation: {location}\nVibe: {mood}\n\nBooking similar sessions now for {month}!",
-        "Can we talk about this {session_type}? 😍\n\n{description}\n\nSwipe to see more from this magical session →\n\nWant photos like these? DM me!",
-        "POV: You booked a {session_type} session with me\n\n{description}\n\nThis could be you! Booking link in bio 🔗"
-    ],
-    "value_posts": [
-        "🎁 FREE GUIDE\n\nI created a guide on '{topic}' and I'm giving it away!\n\nWhat's inside:\n✅ {point1}\n✅ {point2}\n✅ {point3}\n\nDM me 'GUIDE' to get yours!",
-        "Save this post if you want better photos! 📌\n\n{tip_content}\n\nFollow for more photography tips!\n\n#photographytips #phototips",
-        "The secret to {result}? 👇\n\n{tip_content}\n\nWant me to do this for you? Let's chat!"
-    ]
-}
+app = FastAPI(default_response_class=JSONResponseClass)
 
-# Hashtag strategy
-HASHTAG_STRATEGY = {
-    "small_account": {  # Under 10k followers
-        "strategy": "Focus on niche, location-based, and smaller hashtags (under 500k posts)",
-        "mix": "5 small (under 50k) + 5 medium (50k-500k) + 5 location-based"
-    },
-    "growing_account": {  # 10k-50k followers
-        "strategy": "Mix of medium and some larger hashtags",
-        "mix": "3 small + 7 medium + 3 large (500k-2M) + 2 branded"
-    },
-    "established_account": {  # 50k+ followers
-        "strategy": "Can compete with larger hashtags",
-        "mix": "5 medium + 5 large + 3 mega (2M+) + 2 branded"
-    }
-}
+# Create a router with the /api prefix
+api_router = APIRouter(prefix="/api")
 
-# Niche-specific hashtags database
-NICHE_HASHTAGS = {
-    "housewarming": ["#housewarming", "#newhome", "#homesweethome", "#housewarmingparty", "#newbeginnings", "#homeowner", "#dreamhome", "#homedecor", "#homedesign", "#interiordesign", "#realtor", "#firsthome", "#homecelebration", "#newchapter", "#homegoals"],
-    "baby_shower": ["#babyshower", "#itsaboy", "#itsagirl", "#momtobe", "#babyshowerideas", "#babyshowerparty", "#babylove", "#babybump", "#expectingmom", "#parentstobe", "#babyontheway", "#babyshowerdecor", "#genderreveal", "#newmom", "#babycelebration"],
-    "wedding": ["#weddingphotography", "#weddingday", "#bridetobe", "#weddingdress", "#weddingplanning", "#weddinginspo", "#weddinginspiration", "#brideandgroom", "#weddingseason", "#weddingideas", "#justmarried", "#couplegoals", "#romanticwedding", "#weddingceremony", "#weddingmoments"],
-    "portrait": ["#portraitphotography", "#portrait", "#portraitmood", "#portraitpage", "#portraits", "#faceportrait", "#modelportrait", "#portraitart", "#headshot", "#profileportrait", "#beautifulportrait", "#naturalportrait", "#emotiveportrait", "#candidportrait", "#storytelling"],
-    "landscape": ["#landscapephotography", "#landscape", "#naturephotography", "#naturelovers", "#earthpix", "#wanderlust", "#beautifuldestinations", "#exploretheworld", "#outdoorphotography", "#scenicview", "#mountains", "#sunset", "#sunrise", "#goldenhour", "#wildnature"],
-    "event": ["#eventphotography", "#eventphotographer", "#corporateevent", "#concertphotography", "#liveevent", "#eventcoverage", "#partyphotographer", "#specialevent", "#eventplanning", "#memorablemoments", "#celebration", "#eventday", "#professionalphoto", "#eventdocumentation", "#moments"]
-}
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
 
 # Models
 class ContentBase(BaseModel):
@@ -318,6 +130,7 @@ class ContentBase(BaseModel):
     caption: str
     hashtags: List[str]
     niche: str
+    media_id: Optional[str] = None  # stored media this post uses; media_url may point at one of its variants
     media_url: Optional[str] = None
     media_type: Optional[str] = None  # image, video, ai_generated
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
@@ -329,11 +142,33 @@ class ContentCreate(BaseModel):
     caption: str
     hashtags: List[str]
     niche: str
+    media_id: Optional[str] = None
     media_url: Optional[str] = None
     media_type: Optional[str] = None
     scheduled_date: Optional[str] = None
     status: str = "draft"
 
+class ContentPatch(BaseModel):
+    """One item of a bulk update; only the fields that are set are written"""
+    id: str
+    title: Optional[str] = None
+    caption: Optional[str] = None
+    hashtags: Optional[List[str]] = None
+    niche: Optional[str] = None
+    media_id: Optional[str] = None
+    media_url: Optional[str] = None
+    media_type: Optional[str] = None
+    scheduled_date: Optional[str] = None
+    status: Optional[str] = None
+    
+    @field_validator("title", "caption", "hashtags", "niche", "status", mode="before")
+    @classmethod
+    def not_null(cls, value):
+        # Optional only so they can be left out; an explicit null would be written
+        if value is None:
+            raise ValueError("may be omitted but not null")
+        return value
+
 class CaptionRequest(BaseModel):
     niche: str
     topic: Optional[str] = None
@@ -344,6 +179,7 @@ class CaptionResponse(BaseModel):
     caption: str
     hashtags: List[str]
     engagement_tips: List[str]
+    near_duplicate: Optional[dict] = None  # saved text this caption still repeats after regenerating
 
 class ImageGenerateRequest(BaseModel):
     prompt: str
@@ -351,6 +187,9 @@ class ImageGenerateRequest(BaseModel):
     provider: str = "gemini"  # gemini or openai
     style: Optional[str] = "professional photography"
 
+class ImageJobRequest(ImageGenerateRequest):
+    callback_url: Optional[str] = None  # receives the finished job as a JSON POST
+
 class ContentIdeaRequest(BaseModel):
     niche: str
     count: int = 5
@@ -405,6 +244,15 @@ class ClientMagnetRequest(BaseModel):
     client_name: Optional[str] = None
     details: Optional[dict] = None
 
+class BatchJob(BaseModel):
+    id: Optional[str] = None  # caller's reference, echoed back in the result
+    type: str  # caption, ideas, tips, content_mix, viral_hooks, reel_ideas, client_magnet
+    params: dict = Field(default_factory=dict)
+
+class BatchGenerateRequest(BaseModel):
+    jobs: List[BatchJob]
+    pack: bool = True  # combine compatible jobs into one multi-part prompt
+
 class ScheduledPost(BaseModel):
     model_config = ConfigDict(extra="ignore")
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -430,44 +278,131 @@ async def root():
     return {"message": "Instagram Content Creator API"}
 
 @api_router.get("/niches")
-async def get_niches():
-    return {"niches": PHOTOGRAPHY_NICHES}
+async def get_niches(request: Request):
+    return catalogs.current.responses.respond("niches", request)
 
 @api_router.get("/hashtags/{niche}")
-async def get_hashtags(niche: str):
-    if niche not in NICHE_HASHTAGS:
+async def get_hashtags(niche: str, request: Request):
+    response = catalogs.current.responses.respond(("hashtags", niche), request)
+    if response is None:
         raise HTTPException(status_code=404, detail="Niche not found")
-    return {"niche": niche, "hashtags": NICHE_HASHTAGS[niche]}
+    return response
 
-# Photography Tips
-@api_router.get("/tips/categories")
-async def get_tip_categories():
-    return {"categories": list(PHOTOGRAPHY_TIPS.keys())}
+@api_router.get("/hashtags/{niche}/recommend")
+async def recommend_hashtags(niche: str, seed: Optional[str] = None, account_size: str = "small_account"):
+    """Tags that co-occur with the seed tags in saved content, in the account size's tier mix"""
+    catalog = catalogs.current
+    if niche not in catalog.hashtags_by_niche:
+        raise HTTPException(status_code=404, detail="Niche not found")
+    strategy = catalog.hashtag_strategy.get(account_size)
+    if strategy is None:
+        raise HTTPException(status_code=404, detail="Account size not found. Use: small_account, growing_account, established_account")
+    started = time.perf_counter()
+    result = hashtag_engine.recommend(niche, normalize_hashtags(seed), strategy.get("tiers", {}), catalog.hashtags_by_niche[niche])
+    return {
+        "niche": niche,
+        "account_size": account_size,
+        "strategy": strategy["strategy"],
+        "mix": strategy["mix"],
+        **result,
+        "took_ms": round((time.perf_counter() - started) * 1000, 2)
+    }
 
-@api_router.post("/tips/generate")
-async def generate_photography_tips(request: TipsRequest):
+# Server-sent events for the /generate routes
+def _sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def _sse_response(events) -> StreamingResponse:
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def _stream_items(endpoint, system_message, prompt, cache_control, count, to_item, fallback=None, on_complete=None, keep=None):
+    """Stream tokens, then emit each JSON array element as an `item` event as soon as it parses
+
+    ``keep(item, items)`` may reject an item given the ones already emitted;
+    rejected items are counted in the `done` event's ``filtered``.
+    """
+    yield _sse_event("start", {"endpoint": endpoint, "streaming": llm_gateway.streams()})
+    items = []
+    filtered = 0
     try:
-        api_key = os.environ.get("EMERGENT_LLM_KEY")
-        if not api_key:
+        if not llm_gateway.configured:
             raise HTTPException(status_code=500, detail="API key not configured")
-        
-        categories = request.categories or list(PHOTOGRAPHY_TIPS.keys())
-        
-        chat = LlmChat(
-            api_key=api_key,
-            session_id=f"tips-{str(uuid.uuid4())}",
-            system_message="""You are an expert photography coach and social media strategist. 
+        parser = JsonArrayStream()
+        async for delta in llm_gateway.stream(endpoint, system_message, prompt, cache_control=cache_control):
+            yield _sse_event("token", {"text": delta})
+            for item in build_items(parser.feed(delta), to_item, limit=count - len(items)):
+                if keep and not keep(item, items):
+                    filtered += 1
+                    continue
+                items.append(item)
+                yield _sse_event("item", item)
+        used_fallback = not items and not filtered and fallback is not None
+        if used_fallback:
+            for item in fallback():
+                items.append(item)
+                yield _sse_event("item", item)
+        if on_complete and items:
+            await on_complete(items)
+        yield _sse_event("done", {"count": len(items), "fallback": used_fallback, "filtered": filtered})
+    except Exception as e:
+        logger.error(f"Streaming {endpoint} generation error: {str(e)}")
+        yield _sse_event("error", {"detail": f"Failed to generate {endpoint}: {str(e)}"})
+
+async def _stream_object(endpoint, system_message, prompt, cache_control, to_result, fallback, revise=None):
+    """Stream tokens, then emit the parsed JSON object as a single `result` event
+
+    ``revise(result)`` may return a new prompt; a `retry` event is sent and the
+    generation streams again with it.
+    """
+    yield _sse_event("start", {"endpoint": endpoint, "streaming": llm_gateway.streams()})
+    try:
+        if not llm_gateway.configured:
+            raise HTTPException(status_code=500, detail="API key not configured")
+        while True:
+            chunks = []
+            async for delta in llm_gateway.stream(endpoint, system_message, prompt, cache_control=cache_control):
+                chunks.append(delta)
+                yield _sse_event("token", {"text": delta})
+            response = "".join(chunks)
+            try:
+                data = extract_json(response)
+                result = to_result(data, response) if isinstance(data, dict) else fallback(response)
+            except ValueError:
+                # Unparseable, or parsed but rejected by the response model
+                result = fallback(response)
+            prompt = revise(result) if revise else None
+            if prompt is None:
+                break
+            yield _sse_event("retry", {})
+        yield _sse_event("result", result)
+        yield _sse_event("done", {})
+    except Exception as e:
+        logger.error(f"Streaming {endpoint} generation error: {str(e)}")
+        yield _sse_event("error", {"detail": f"Failed to generate {endpoint}: {str(e)}"})
+
+# Photography Tips
+@api_router.get("/tips/categories")
+async def get_tip_categories(request: Request):
+    return catalogs.current.responses.respond("tips_categories", request)
+
+def _tips_prompt(request: TipsRequest):
+    catalog = catalogs.current
+    categories = request.categories or list(catalog.tips_by_category)
+    
+    system_message = """You are an expert photography coach and social media strategist. 
             Generate engaging photography tips that can be turned into Instagram posts.
             Return response as JSON array with objects: category, tip, caption_idea, hashtags (array)"""
-        ).with_model("gemini", "gemini-3-flash-preview")
-        
-        # Get some base tips for context
-        base_tips = []
-        for cat in categories[:3]:
-            if cat in PHOTOGRAPHY_TIPS:
-                base_tips.extend(PHOTOGRAPHY_TIPS[cat][:2])
-        
-        prompt = f"""Generate {request.count} unique, actionable photography tips for Instagram posts.
+    
+    # Get some base tips for context
+    base_tips = []
+    for cat in categories[:3]:
+        base_tips.extend(record.tip for record in catalog.tips_by_category.get(cat, ())[:2])
+    
+    prompt = f"""Generate {request.count} unique, actionable photography tips for Instagram posts.
         Categories to focus on: {', '.join(categories)}
         
         Base context tips (generate NEW ones, don't repeat): {base_tips[:3]}
@@ -480,80 +415,70 @@ async def generate_photography_tips(request: TipsRequest):
         
         Make tips engaging, valuable, and shareable. Mix educational with inspirational.
         Return as JSON array."""
+    return system_message, prompt
+
+def _tip_item(tip: dict) -> dict:
+    return PhotographyTip(
+        category=tip.get("category", "general"),
+        tip=tip.get("tip", ""),
+        caption_idea=tip.get("caption_idea", ""),
+        hashtags=tip.get("hashtags", [])
+    ).model_dump()
+
+def _tips_fallback(request: TipsRequest) -> List[dict]:
+    # Fallback to static tips
+    return catalogs.current.tip_items(request.categories, request.count)
+
+@api_router.post("/tips/generate")
+async def generate_photography_tips(request: TipsRequest, cache_control: Optional[str] = Header(None)):
+    try:
+        if not llm_gateway.configured:
+            raise HTTPException(status_code=500, detail="API key not configured")
         
-        user_message = UserMessage(text=prompt)
-        response = await chat.send_message(user_message)
+        system_message, prompt = _tips_prompt(request)
+        response = await llm_gateway.complete("tips", system_message, prompt, cache_control=cache_control)
         
-        import json
         try:
-            response_text = response.strip()
-            if "```json" in response_text:
-                response_text = response_text.split("```json")[1].split("```")[0]
-            elif "```" in response_text:
-                response_text = response_text.split("```")[1].split("```")[0]
-            
-            tips_data = json.loads(response_text)
+            tips = parse_array(response, _tip_item, limit=request.count)
+        except LlmParseError:
             tips = []
-            for tip in tips_data[:request.count]:
-                tips.append(PhotographyTip(
-                    category=tip.get("category", "general"),
-                    tip=tip.get("tip", ""),
-                    caption_idea=tip.get("caption_idea", ""),
-                    hashtags=tip.get("hashtags", [])
-                ))
-            
-            return {"tips": [t.model_dump() for t in tips]}
-        except json.JSONDecodeError:
-            # Fallback to static tips
-            fallback_tips = []
-            for cat in categories:
-                if cat in PHOTOGRAPHY_TIPS:
-                    for tip_text in PHOTOGRAPHY_TIPS[cat][:request.count // len(categories) + 1]:
-                        fallback_tips.append(PhotographyTip(
-                            category=cat,
-                            tip=tip_text,
-                            caption_idea=f"📸 Pro Tip: {tip_text}\n\nDouble tap if this helped! 💡",
-                            hashtags=["#photographytips", "#phototips", f"#{cat}tips", "#learnphotography", "#photographylife"]
-                        ))
-            return {"tips": [t.model_dump() for t in fallback_tips[:request.count]]}
+        return {"tips": tips or _tips_fallback(request)}
     except Exception as e:
         logger.error(f"Tips generation error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to generate tips: {str(e)}")
 
+@api_router.post("/tips/generate/stream")
+async def stream_photography_tips(request: TipsRequest, cache_control: Optional[str] = Header(None)):
+    system_message, prompt = _tips_prompt(request)
+    return _sse_response(_stream_items(
+        "tips", system_message, prompt, cache_control, request.count,
+        to_item=_tip_item, fallback=lambda: _tips_fallback(request)
+    ))
+
 @api_router.get("/tips/static")
-async def get_static_tips():
+async def get_static_tips(request: Request):
     """Get all static photography tips organized by category"""
-    return {"tips": PHOTOGRAPHY_TIPS}
+    return catalogs.current.responses.respond("tips", request)
 
 # Content Mix Ideas
 @api_router.get("/content-mix/categories")
-async def get_content_mix_categories():
-    return {"categories": list(CONTENT_MIX_IDEAS.keys())}
+async def get_content_mix_categories(request: Request):
+    return catalogs.current.responses.respond("content_mix_categories", request)
 
-@api_router.post("/content-mix/generate")
-async def generate_content_mix(request: ContentMixRequest):
-    try:
-        api_key = os.environ.get("EMERGENT_LLM_KEY")
-        if not api_key:
-            raise HTTPException(status_code=500, detail="API key not configured")
-        
-        categories = request.categories or list(CONTENT_MIX_IDEAS.keys())
-        
-        chat = LlmChat(
-            api_key=api_key,
-            session_id=f"mix-{str(uuid.uuid4())}",
-            system_message="""You are a creative Instagram strategist for photography businesses.
+def _content_mix_prompt(request: ContentMixRequest):
+    catalog = catalogs.current
+    categories = request.categories or list(catalog.content_mix_by_category)
+    
+    system_message = """You are a creative Instagram strategist for photography businesses.
             Generate diverse content ideas that go beyond just portfolio shots.
             Return response as JSON array with objects: category, idea, description, caption, hashtags (array), content_type"""
-        ).with_model("gemini", "gemini-3-flash-preview")
-        
-        # Get base ideas for context
-        base_ideas = []
-        for cat in categories[:2]:
-            if cat in CONTENT_MIX_IDEAS:
-                base_ideas.extend(CONTENT_MIX_IDEAS[cat][:2])
-        
-        prompt = f"""Generate {request.count} creative Instagram content ideas for a photography business.
+    
+    # Get base ideas for context
+    base_ideas = []
+    for cat in categories[:2]:
+        base_ideas.extend(record.idea for record in catalog.content_mix_by_category.get(cat, ())[:2])
+    
+    prompt = f"""Generate {request.count} creative Instagram content ideas for a photography business.
         Categories: {', '.join(categories)}
         
         Context ideas (generate NEW ones): {base_ideas}
@@ -568,93 +493,78 @@ async def generate_content_mix(request: ContentMixRequest):
         
         Be creative! Think engagement, authenticity, and value for followers.
         Return as JSON array."""
+    return system_message, prompt
+
+def _content_mix_item(idea: dict) -> dict:
+    return ContentMixIdea(
+        category=idea.get("category", "general"),
+        idea=idea.get("idea", ""),
+        description=idea.get("description", ""),
+        caption=idea.get("caption", ""),
+        hashtags=idea.get("hashtags", []),
+        content_type=idea.get("content_type", "photo")
+    ).model_dump()
+
+def _content_mix_fallback(request: ContentMixRequest) -> List[dict]:
+    return catalogs.current.content_mix_items(request.categories, request.count)
+
+@api_router.post("/content-mix/generate")
+async def generate_content_mix(request: ContentMixRequest, cache_control: Optional[str] = Header(None)):
+    try:
+        if not llm_gateway.configured:
+            raise HTTPException(status_code=500, detail="API key not configured")
         
-        user_message = UserMessage(text=prompt)
-        response = await chat.send_message(user_message)
+        system_message, prompt = _content_mix_prompt(request)
+        response = await llm_gateway.complete("mix", system_message, prompt, cache_control=cache_control)
         
-        import json
         try:
-            response_text = response.strip()
-            if "```json" in response_text:
-                response_text = response_text.split("```json")[1].split("```")[0]
-            elif "```" in response_text:
-                response_text = response_text.split("```")[1].split("```")[0]
-            
-            ideas_data = json.loads(response_text)
+            ideas = parse_array(response, _content_mix_item, limit=request.count)
+        except LlmParseError:
             ideas = []
-            for idea in ideas_data[:request.count]:
-                ideas.append(ContentMixIdea(
-                    category=idea.get("category", "general"),
-                    idea=idea.get("idea", ""),
-                    description=idea.get("description", ""),
-                    caption=idea.get("caption", ""),
-                    hashtags=idea.get("hashtags", []),
-                    content_type=idea.get("content_type", "photo")
-                ))
-            
-            return {"ideas": [i.model_dump() for i in ideas]}
-        except json.JSONDecodeError:
-            # Fallback
-            fallback_ideas = []
-            for cat in categories:
-                if cat in CONTENT_MIX_IDEAS:
-                    for idea_text in CONTENT_MIX_IDEAS[cat][:request.count // len(categories) + 1]:
-                        fallback_ideas.append(ContentMixIdea(
-                            category=cat,
-                            idea=idea_text,
-                            description=f"Create content around: {idea_text}",
-                            caption=f"✨ {idea_text}\n\nWhat content would you like to see more of? Comment below! 👇",
-                            hashtags=["#photographybusiness", "#contentcreator", "#instagramtips", "#photographerlife", "#socialmediatips"],
-                            content_type="carousel"
-                        ))
-            return {"ideas": [i.model_dump() for i in fallback_ideas[:request.count]]}
+        return {"ideas": ideas or _content_mix_fallback(request)}
     except Exception as e:
         logger.error(f"Content mix generation error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to generate content mix: {str(e)}")
 
+@api_router.post("/content-mix/generate/stream")
+async def stream_content_mix(request: ContentMixRequest, cache_control: Optional[str] = Header(None)):
+    system_message, prompt = _content_mix_prompt(request)
+    return _sse_response(_stream_items(
+        "mix", system_message, prompt, cache_control, request.count,
+        to_item=_content_mix_item, fallback=lambda: _content_mix_fallback(request)
+    ))
+
 @api_router.get("/content-mix/static")
-async def get_static_content_mix():
+async def get_static_content_mix(request: Request):
     """Get all static content mix ideas"""
-    return {"ideas": CONTENT_MIX_IDEAS}
+    return catalogs.current.responses.respond("content_mix", request)
 
 # Seasonal Content Suggestions
 @api_router.get("/seasonal")
-async def get_seasonal_content(month: Optional[str] = None):
-    if month:
-        month_lower = month.lower()
-        if month_lower in SEASONAL_CONTENT:
-            return {"month": month_lower, "ideas": SEASONAL_CONTENT[month_lower]}
+async def get_seasonal_content(request: Request, month: Optional[str] = None):
+    response = catalogs.current.responses.respond(("seasonal", month.lower() if month else None), request)
+    if response is None:
         raise HTTPException(status_code=404, detail="Month not found")
-    return {"seasonal_content": SEASONAL_CONTENT}
+    return response
 
 # Viral Hooks Generator
 @api_router.get("/viral-hooks/types")
-async def get_viral_hook_types():
-    return {"types": list(VIRAL_HOOKS.keys())}
+async def get_viral_hook_types(request: Request):
+    return catalogs.current.responses.respond("viral_hook_types", request)
 
-@api_router.post("/viral-hooks/generate")
-async def generate_viral_hooks(request: ViralHookRequest):
-    try:
-        api_key = os.environ.get("EMERGENT_LLM_KEY")
-        if not api_key:
-            raise HTTPException(status_code=500, detail="API key not configured")
-        
-        base_hooks = VIRAL_HOOKS.get(request.hook_type, VIRAL_HOOKS["curiosity"])
-        
-        chat = LlmChat(
-            api_key=api_key,
-            session_id=f"hooks-{str(uuid.uuid4())}",
-            system_message="""You are a viral content strategist for Instagram photographers.
+def _viral_hooks_prompt(request: ViralHookRequest):
+    base_hooks = [record.hook for record in catalogs.current.hook_records(request.hook_type)[:2]]
+    
+    system_message = """You are a viral content strategist for Instagram photographers.
             Generate attention-grabbing hooks that stop the scroll and drive engagement.
             Return as JSON array with objects: hook, full_caption, hashtags (array), best_for (reel/post/story)"""
-        ).with_model("gemini", "gemini-3-flash-preview")
-        
-        niche_context = f" for {request.niche} photography" if request.niche else ""
-        
-        prompt = f"""Generate {request.count} viral Instagram hooks{niche_context}.
+    
+    niche_context = f" for {request.niche} photography" if request.niche else ""
+    
+    prompt = f"""Generate {request.count} viral Instagram hooks{niche_context}.
         Hook type: {request.hook_type}
         
-        Example hooks for inspiration (create NEW ones): {base_hooks[:2]}
+        Example hooks for inspiration (create NEW ones): {base_hooks}
         
         For each hook include:
         - hook: The attention-grabbing first line (under 10 words)
@@ -664,61 +574,61 @@ async def generate_viral_hooks(request: ViralHookRequest):
         
         Make them scroll-stopping, curiosity-inducing, and shareable!
         Return as JSON array."""
+    return system_message, prompt
+
+def _viral_hooks_fallback(request: ViralHookRequest) -> List[dict]:
+    # Fallback to static hooks
+    return [record.item() for record in catalogs.current.hook_records(request.hook_type)[:request.count]]
+
+@api_router.post("/viral-hooks/generate")
+async def generate_viral_hooks(request: ViralHookRequest, cache_control: Optional[str] = Header(None)):
+    try:
+        if not llm_gateway.configured:
+            raise HTTPException(status_code=500, detail="API key not configured")
         
-        user_message = UserMessage(text=prompt)
-        response = await chat.send_message(user_message)
+        system_message, prompt = _viral_hooks_prompt(request)
+        response = await llm_gateway.complete("hooks", system_message, prompt, cache_control=cache_control)
         
-        import json
         try:
-            response_text = response.strip()
-            if "```json" in response_text:
-                response_text = response_text.split("```json")[1].split("```")[0]
-            elif "```" in response_text:
-                response_text = response_text.split("```")[1].split("```")[0]
-            
-            hooks_data = json.loads(response_text)
-            return {"hooks": hooks_data[:request.count], "hook_type": request.hook_type}
-        except json.JSONDecodeError:
-            # Fallback to static hooks
-            fallback = [{"hook": h, "full_caption": f"{h}\n\n[Your story here]\n\nFollow for more!", "hashtags": ["#photography", "#photographer"], "best_for": "post"} for h in base_hooks[:request.count]]
-            return {"hooks": fallback, "hook_type": request.hook_type}
+            hooks = parse_array(response, limit=request.count)
+        except LlmParseError:
+            hooks = []
+        return {"hooks": hooks or _viral_hooks_fallback(request), "hook_type": request.hook_type}
     except Exception as e:
         logger.error(f"Viral hooks generation error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to generate hooks: {str(e)}")
 
+@api_router.post("/viral-hooks/generate/stream")
+async def stream_viral_hooks(request: ViralHookRequest, cache_control: Optional[str] = Header(None)):
+    system_message, prompt = _viral_hooks_prompt(request)
+    return _sse_response(_stream_items(
+        "hooks", system_message, prompt, cache_control, request.count,
+        to_item=dict, fallback=lambda: _viral_hooks_fallback(request)
+    ))
+
 @api_router.get("/viral-hooks/static")
-async def get_static_viral_hooks():
-    return {"hooks": VIRAL_HOOKS}
+async def get_static_viral_hooks(request: Request):
+    return catalogs.current.responses.respond("viral_hooks", request)
 
 # Reel Ideas
 @api_router.get("/reel-ideas/categories")
-async def get_reel_categories():
-    return {"categories": list(REEL_IDEAS.keys())}
+async def get_reel_categories(request: Request):
+    return catalogs.current.responses.respond("reel_categories", request)
 
-@api_router.post("/reel-ideas/generate")
-async def generate_reel_ideas(request: ReelIdeaRequest):
-    try:
-        api_key = os.environ.get("EMERGENT_LLM_KEY")
-        if not api_key:
-            raise HTTPException(status_code=500, detail="API key not configured")
-        
-        category = request.category or "trending"
-        base_ideas = REEL_IDEAS.get(category, REEL_IDEAS["trending"])
-        
-        chat = LlmChat(
-            api_key=api_key,
-            session_id=f"reels-{str(uuid.uuid4())}",
-            system_message="""You are an Instagram Reels strategist for photographers.
+def _reel_ideas_prompt(request: ReelIdeaRequest):
+    category = request.category or "trending"
+    base_ideas = catalogs.current.reel_records(category)
+    
+    system_message = """You are an Instagram Reels strategist for photographers.
             Generate trending reel ideas that drive views and followers.
             Return as JSON array with objects: title, concept, script_outline, hook, duration, trending_audio_suggestion, hashtags"""
-        ).with_model("gemini", "gemini-3-flash-preview")
-        
-        niche_context = f" for {request.niche} photography" if request.niche else ""
-        
-        prompt = f"""Generate {request.count} Instagram Reel ideas{niche_context}.
+    
+    niche_context = f" for {request.niche} photography" if request.niche else ""
+    
+    prompt = f"""Generate {request.count} Instagram Reel ideas{niche_context}.
         Category: {category}
         
-        Base ideas for context: {[i['title'] for i in base_ideas[:2]]}
+        Base ideas for context: {[record.title for record in base_ideas[:2]]}
         
         For each reel include:
         - title: Catchy title for the reel
@@ -731,51 +641,51 @@ async def generate_reel_ideas(request: ReelIdeaRequest):
         
         Focus on trends that drive saves, shares, and follows!
         Return as JSON array."""
+    return system_message, prompt
+
+def _reel_ideas_fallback(request: ReelIdeaRequest) -> List[dict]:
+    return [record.item() for record in catalogs.current.reel_records(request.category)[:request.count]]
+
+@api_router.post("/reel-ideas/generate")
+async def generate_reel_ideas(request: ReelIdeaRequest, cache_control: Optional[str] = Header(None)):
+    try:
+        if not llm_gateway.configured:
+            raise HTTPException(status_code=500, detail="API key not configured")
         
-        user_message = UserMessage(text=prompt)
-        response = await chat.send_message(user_message)
+        category = request.category or "trending"
+        system_message, prompt = _reel_ideas_prompt(request)
+        response = await llm_gateway.complete("reels", system_message, prompt, cache_control=cache_control)
         
-        import json
         try:
-            response_text = response.strip()
-            if "```json" in response_text:
-                response_text = response_text.split("```json")[1].split("```")[0]
-            elif "```" in response_text:
-                response_text = response_text.split("```")[1].split("```")[0]
-            
-            reels_data = json.loads(response_text)
-            return {"reels": reels_data[:request.count], "category": category}
-        except json.JSONDecodeError:
-            return {"reels": base_ideas[:request.count], "category": category}
+            reels = parse_array(response, limit=request.count)
+        except LlmParseError:
+            reels = []
+        return {"reels": reels or _reel_ideas_fallback(request), "category": category}
     except Exception as e:
         logger.error(f"Reel ideas generation error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to generate reel ideas: {str(e)}")
 
+@api_router.post("/reel-ideas/generate/stream")
+async def stream_reel_ideas(request: ReelIdeaRequest, cache_control: Optional[str] = Header(None)):
+    system_message, prompt = _reel_ideas_prompt(request)
+    return _sse_response(_stream_items(
+        "reels", system_message, prompt, cache_control, request.count,
+        to_item=dict, fallback=lambda: _reel_ideas_fallback(request)
+    ))
+
 @api_router.get("/reel-ideas/static")
-async def get_static_reel_ideas():
-    return {"ideas": REEL_IDEAS}
+async def get_static_reel_ideas(request: Request):
+    return catalogs.current.responses.respond("reel_ideas", request)
 
 # Client Magnets (Booking-focused content)
-@api_router.post("/client-magnets/generate")
-async def generate_client_magnet(request: ClientMagnetRequest):
-    try:
-        api_key = os.environ.get("EMERGENT_LLM_KEY")
-        if not api_key:
-            raise HTTPException(status_code=500, detail="API key not configured")
-        
-        templates = CLIENT_MAGNETS.get(f"{request.template_type}_templates", CLIENT_MAGNETS["portfolio_templates"])
-        
-        chat = LlmChat(
-            api_key=api_key,
-            session_id=f"magnet-{str(uuid.uuid4())}",
-            system_message="""You are a photography business coach specializing in Instagram marketing.
+def _client_magnet_prompt(request: ClientMagnetRequest):
+    system_message = """You are a photography business coach specializing in Instagram marketing.
             Generate posts that attract ideal clients and drive bookings.
             Return as JSON with: caption, cta, hashtags, posting_tips"""
-        ).with_model("gemini", "gemini-3-flash-preview")
-        
-        details_str = str(request.details) if request.details else "general session"
-        
-        prompt = f"""Create a client-attracting Instagram post for a {request.niche} photographer.
+    
+    details_str = str(request.details) if request.details else "general session"
+    
+    prompt = f"""Create a client-attracting Instagram post for a {request.niche} photographer.
         Template type: {request.template_type}
         Client name (if provided): {request.client_name or '[Client Name]'}
         Details: {details_str}
@@ -788,71 +698,85 @@ async def generate_client_magnet(request: ClientMagnetRequest):
         
         Make it authentic, not salesy. Focus on emotion and transformation.
         Return as JSON."""
+    return system_message, prompt
+
+def _client_magnet_fallback(request: ClientMagnetRequest) -> dict:
+    catalog = catalogs.current
+    return {
+        "caption": catalog.client_magnet_templates(request.template_type)[0],
+        "cta": catalog.cta_templates_by_type["booking"][0],
+        "hashtags": list(catalog.hashtags_by_niche.get(request.niche, ()))
+    }
+
+@api_router.post("/client-magnets/generate")
+async def generate_client_magnet(request: ClientMagnetRequest, cache_control: Optional[str] = Header(None)):
+    try:
+        if not llm_gateway.configured:
+            raise HTTPException(status_code=500, detail="API key not configured")
         
-        user_message = UserMessage(text=prompt)
-        response = await chat.send_message(user_message)
+        system_message, prompt = _client_magnet_prompt(request)
+        response = await llm_gateway.complete("magnet", system_message, prompt, cache_control=cache_control)
         
-        import json
         try:
-            response_text = response.strip()
-            if "```json" in response_text:
-                response_text = response_text.split("```json")[1].split("```")[0]
-            elif "```" in response_text:
-                response_text = response_text.split("```")[1].split("```")[0]
-            
-            magnet_data = json.loads(response_text)
-            return {"magnet": magnet_data, "template_type": request.template_type}
-        except json.JSONDecodeError:
-            return {"magnet": {"caption": templates[0], "cta": CTA_TEMPLATES["booking"][0], "hashtags": NICHE_HASHTAGS.get(request.niche, [])}, "template_type": request.template_type}
+            magnet_data = extract_json(response)
+        except LlmParseError:
+            magnet_data = None
+        if not isinstance(magnet_data, dict):
+            magnet_data = _client_magnet_fallback(request)
+        return {"magnet": magnet_data, "template_type": request.template_type}
     except Exception as e:
         logger.error(f"Client magnet generation error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to generate client magnet: {str(e)}")
 
+@api_router.post("/client-magnets/generate/stream")
+async def stream_client_magnet(request: ClientMagnetRequest, cache_control: Optional[str] = Header(None)):
+    system_message, prompt = _client_magnet_prompt(request)
+    return _sse_response(_stream_object(
+        "magnet", system_message, prompt, cache_control,
+        to_result=lambda data, _: data, fallback=lambda _: _client_magnet_fallback(request)
+    ))
+
 # CTA Generator
 @api_router.get("/cta/types")
-async def get_cta_types():
-    return {"types": list(CTA_TEMPLATES.keys())}
+async def get_cta_types(request: Request):
+    return catalogs.current.responses.respond("cta_types", request)
 
 @api_router.get("/cta/{cta_type}")
-async def get_cta_templates(cta_type: str):
-    if cta_type not in CTA_TEMPLATES:
+async def get_cta_templates(cta_type: str, request: Request):
+    response = catalogs.current.responses.respond(("cta", cta_type), request)
+    if response is None:
         raise HTTPException(status_code=404, detail="CTA type not found")
-    return {"type": cta_type, "templates": CTA_TEMPLATES[cta_type]}
+    return response
 
 # Bio Generator
 @api_router.get("/bio-templates/{niche}")
-async def get_bio_templates(niche: str):
-    templates = BIO_TEMPLATES.get(niche, BIO_TEMPLATES.get("portrait", []))
-    return {"niche": niche, "templates": templates}
+async def get_bio_templates(niche: str, request: Request):
+    response = catalogs.current.responses.respond(("bio_templates", niche), request)
+    if response is None:
+        # Unknown niches fall back to the portrait templates under their own name
+        templates = list(catalogs.current.bio_templates_by_niche.get("portrait", ()))
+        response = respond_json(request, {"niche": niche, "templates": templates}, CATALOG_CACHE_CONTROL)
+    return response
 
 # Hashtag Strategy
 @api_router.get("/hashtag-strategy/{account_size}")
-async def get_hashtag_strategy(account_size: str):
-    if account_size not in HASHTAG_STRATEGY:
+async def get_hashtag_strategy(account_size: str, request: Request):
+    response = catalogs.current.responses.respond(("hashtag_strategy", account_size), request)
+    if response is None:
         raise HTTPException(status_code=404, detail="Account size not found. Use: small_account, growing_account, established_account")
-    return {"account_size": account_size, "strategy": HASHTAG_STRATEGY[account_size]}
+    return response
 
 # Caption Generation
-@api_router.post("/content/generate-caption", response_model=CaptionResponse)
-async def generate_caption(request: CaptionRequest):
-    try:
-        api_key = os.environ.get("EMERGENT_LLM_KEY")
-        if not api_key:
-            raise HTTPException(status_code=500, detail="API key not configured")
-        
-        chat = LlmChat(
-            api_key=api_key,
-            session_id=f"caption-{str(uuid.uuid4())}",
-            system_message="""You are an expert Instagram content strategist specializing in photography businesses. 
+def _caption_prompt(request: CaptionRequest):
+    system_message = """You are an expert Instagram content strategist specializing in photography businesses. 
             Generate engaging, authentic captions that drive engagement and bookings.
             Always return response in this exact JSON format:
             {"caption": "your caption here", "hashtags": ["#tag1", "#tag2"], "engagement_tips": ["tip1", "tip2"]}"""
-        ).with_model("gemini", "gemini-3-flash-preview")
-        
-        topic_text = f" about {request.topic}" if request.topic else ""
-        cta_text = " Include a call-to-action to book services." if request.include_cta else ""
-        
-        prompt = f"""Create an Instagram caption for a {request.niche} photography business{topic_text}. 
+    
+    topic_text = f" about {request.topic}" if request.topic else ""
+    cta_text = " Include a call-to-action to book services." if request.include_cta else ""
+    
+    prompt = f"""Create an Instagram caption for a {request.niche} photography business{topic_text}. 
         Tone: {request.tone}.{cta_text}
         
         Generate:
@@ -861,97 +785,171 @@ async def generate_caption(request: CaptionRequest):
         3. 3 engagement tips for this post
         
         Return as JSON with keys: caption, hashtags, engagement_tips"""
+    return system_message, prompt
+
+def _caption_result(data: dict, request: CaptionRequest, response: str) -> CaptionResponse:
+    return CaptionResponse(
+        caption=data.get("caption", response),
+        hashtags=data.get("hashtags", list(catalogs.current.hashtags_by_niche.get(request.niche, ())[:10])),
+        engagement_tips=data.get("engagement_tips", ["Post during peak hours", "Engage with comments", "Use stories"])
+    )
+
+def _caption_fallback(request: CaptionRequest, response: str) -> CaptionResponse:
+    # Fallback if JSON parsing fails
+    return CaptionResponse(
+        caption=response[:300] if len(response) > 300 else response,
+        hashtags=list(catalogs.current.hashtags_by_niche.get(request.niche, ())[:10]),
+        engagement_tips=["Post during peak hours", "Engage with comments quickly", "Use stories for behind-the-scenes"]
+    )
+
+def _parse_caption(request: CaptionRequest, response: str) -> CaptionResponse:
+    try:
+        data = extract_json(response)
+        if isinstance(data, dict):
+            return _caption_result(data, request, response)
+    except ValueError:
+        # Unparseable, or parsed but rejected by CaptionResponse
+        pass
+    return _caption_fallback(request, response)
+
+def _caption_retry_prompt(prompt: str, caption: str) -> str:
+    return f"{prompt}\n\nWrite something clearly different from this existing caption: {json.dumps(caption)}"
+
+@api_router.post("/content/generate-caption", response_model=CaptionResponse)
+async def generate_caption(request: CaptionRequest, cache_control: Optional[str] = Header(None)):
+    try:
+        if not llm_gateway.configured:
+            raise HTTPException(status_code=500, detail="API key not configured")
         
-        user_message = UserMessage(text=prompt)
-        response = await chat.send_message(user_message)
+        system_message, prompt = _caption_prompt(request)
+        response = await llm_gateway.complete("caption", system_message, prompt, cache_control=cache_control)
+        result = _parse_caption(request, response)
         
-        # Parse response
-        import json
-        try:
-            # Try to extract JSON from response
-            response_text = response.strip()
-            if "```json" in response_text:
-                response_text = response_text.split("```json")[1].split("```")[0]
-            elif "```" in response_text:
-                response_text = response_text.split("```")[1].split("```")[0]
-            
-            data = json.loads(response_text)
-            return CaptionResponse(
-                caption=data.get("caption", response),
-                hashtags=data.get("hashtags", NICHE_HASHTAGS.get(request.niche, [])[:10]),
-                engagement_tips=data.get("engagement_tips", ["Post during peak hours", "Engage with comments", "Use stories"])
-            )
-        except json.JSONDecodeError:
-            # Fallback if JSON parsing fails
-            return CaptionResponse(
-                caption=response[:300] if len(response) > 300 else response,
-                hashtags=NICHE_HASHTAGS.get(request.niche, [])[:10],
-                engagement_tips=["Post during peak hours", "Engage with comments quickly", "Use stories for behind-the-scenes"]
-            )
+        # Regenerate captions that repeat one already saved
+        duplicate = near_duplicates.match(result.caption)
+        for _ in range(NEAR_DUP_RETRIES):
+            if duplicate is None:
+                break
+            retry_prompt = _caption_retry_prompt(prompt, result.caption)
+            response = await llm_gateway.complete("caption", system_message, retry_prompt, cache_control=cache_control)
+            result = _parse_caption(request, response)
+            duplicate = near_duplicates.match(result.caption)
+        result.near_duplicate = duplicate
+        return result
     except Exception as e:
         logger.error(f"Caption generation error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to generate caption: {str(e)}")
 
+@api_router.post("/content/generate-caption/stream")
+async def stream_caption(request: CaptionRequest, cache_control: Optional[str] = Header(None)):
+    system_message, prompt = _caption_prompt(request)
+    retries = []
+
+    def revise(result: dict) -> Optional[str]:
+        # Same regeneration as generate_caption, streamed again after a `retry` event
+        result["near_duplicate"] = near_duplicates.match(result["caption"])
+        if result["near_duplicate"] is None or len(retries) >= NEAR_DUP_RETRIES:
+            return None
+        retries.append(result["near_duplicate"])
+        return _caption_retry_prompt(prompt, result["caption"])
+
+    return _sse_response(_stream_object(
+        "caption", system_message, prompt, cache_control,
+        to_result=lambda data, response: _caption_result(data, request, response).model_dump(),
+        fallback=lambda response: _caption_fallback(request, response).model_dump(),
+        revise=revise
+    ))
+
 # Image Generation
+def _image_prompt(request: ImageGenerateRequest) -> str:
+    return f"{request.prompt}, {request.style}, {request.niche} photography style, high quality, professional lighting, Instagram-worthy"
+
+async def _generate_image_bytes(request: ImageGenerateRequest, enhanced_prompt: str):
+    """Returns ``(image_bytes, content_type, text_response)`` from the requested provider"""
+    if request.provider == "openai":
+        # OpenAI GPT Image 1
+        images = await llm_gateway.generate_image_openai(enhanced_prompt)
+        if not images:
+            raise HTTPException(status_code=500, detail="No image was generated")
+        return images[0], "image/png", None
+    
+    # Gemini Nano Banana
+    text, images = await llm_gateway.generate_image_gemini(
+        enhanced_prompt,
+        system_message="You are an AI that generates beautiful photography images."
+    )
+    if not images:
+        raise HTTPException(status_code=500, detail="No image was generated")
+    return base64.b64decode(images[0]['data']), images[0].get('mime_type', 'image/png'), text
+
 @api_router.post("/content/generate-image")
 async def generate_image(request: ImageGenerateRequest):
     try:
-        api_key = os.environ.get("EMERGENT_LLM_KEY")
-        if not api_key:
+        if not llm_gateway.configured:
             raise HTTPException(status_code=500, detail="API key not configured")
         
-        enhanced_prompt = f"{request.prompt}, {request.style}, {request.niche} photography style, high quality, professional lighting, Instagram-worthy"
-        
-        if request.provider == "openai":
-            # OpenAI GPT Image 1
-            image_gen = OpenAIImageGeneration(api_key=api_key)
-            images = await image_gen.generate_images(
-                prompt=enhanced_prompt,
-                model="gpt-image-1",
-                number_of_images=1
-            )
-            if images and len(images) > 0:
-                image_base64 = base64.b64encode(images[0]).decode('utf-8')
-                return {"provider": "openai", "image_base64": image_base64, "prompt": enhanced_prompt}
-            else:
-                raise HTTPException(status_code=500, detail="No image was generated")
-        else:
-            # Gemini Nano Banana
-            chat = LlmChat(
-                api_key=api_key,
-                session_id=f"image-{str(uuid.uuid4())}",
-                system_message="You are an AI that generates beautiful photography images."
-            ).with_model("gemini", "gemini-3-pro-image-preview").with_params(modalities=["image", "text"])
-            
-            msg = UserMessage(text=enhanced_prompt)
-            text, images = await chat.send_message_multimodal_response(msg)
-            
-            if images and len(images) > 0:
-                return {"provider": "gemini", "image_base64": images[0]['data'], "prompt": enhanced_prompt, "text_response": text}
-            else:
-                raise HTTPException(status_code=500, detail="No image was generated")
+        enhanced_prompt = _image_prompt(request)
+        image_bytes, content_type, text = await _generate_image_bytes(request, enhanced_prompt)
+        media_doc = await _store_generated_media(image_bytes, content_type, f"generated-{request.niche}")
+        return _generated_image_result(request, media_doc, enhanced_prompt, text)
                 
     except Exception as e:
         logger.error(f"Image generation error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to generate image: {str(e)}")
 
-# Content Ideas Generation
-@api_router.post("/content/generate-ideas")
-async def generate_ideas(request: ContentIdeaRequest):
+def _generated_image_result(request: ImageGenerateRequest, media_doc: dict, enhanced_prompt: str, text: Optional[str]) -> dict:
+    return {
+        "provider": request.provider,
+        "media_id": media_doc["id"],
+        "media_url": _media_url(media_doc["id"]),
+        "thumbnails": {name: _media_url(media_doc["id"], name) for name in media_doc.get("variants", {})},
+        "content_type": media_doc["content_type"],
+        "size": media_doc["size"],
+        "prompt": enhanced_prompt,
+        "text_response": text
+    }
+
+async def _image_job(params: dict) -> dict:
+    """Job handler: generate the image and keep it in the media store"""
+    request = ImageGenerateRequest(**params)
+    enhanced_prompt = _image_prompt(request)
+    image_bytes, content_type, text = await _generate_image_bytes(request, enhanced_prompt)
+    media_doc = await _store_generated_media(image_bytes, content_type, f"generated-{request.niche}")
+    return _generated_image_result(request, media_doc, enhanced_prompt, text)
+
+job_queue.register("image", _image_job)
+
+@api_router.post("/content/generate-image/jobs", status_code=202)
+async def enqueue_image_job(request: ImageJobRequest):
+    """Queue an image generation; poll /api/jobs/{id} or wait for the callback"""
+    if not llm_gateway.configured:
+        raise HTTPException(status_code=500, detail="API key not configured")
+    params = request.model_dump(exclude={"callback_url"})
     try:
-        api_key = os.environ.get("EMERGENT_LLM_KEY")
-        if not api_key:
-            raise HTTPException(status_code=500, detail="API key not configured")
-        
-        chat = LlmChat(
-            api_key=api_key,
-            session_id=f"ideas-{str(uuid.uuid4())}",
-            system_message="""You are an expert Instagram content strategist for photography businesses.
+        job, deduplicated = await job_queue.enqueue("image", request.provider, params, callback_url=request.callback_url)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "deduplicated": deduplicated,
+        "status_url": f"/api/jobs/{job['id']}"
+    }
+
+@api_router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = await job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+# Content Ideas Generation
+def _ideas_prompt(request: ContentIdeaRequest):
+    system_message = """You are an expert Instagram content strategist for photography businesses.
             Generate creative, engagement-driving content ideas.
             Return response as JSON array with objects containing: title, description, suggested_caption, suggested_hashtags (array), best_time_to_post, content_type"""
-        ).with_model("gemini", "gemini-3-flash-preview")
-        
-        prompt = f"""Generate {request.count} unique Instagram content ideas for a {request.niche} photography business.
+    
+    prompt = f"""Generate {request.count} unique Instagram content ideas for a {request.niche} photography business.
         
         For each idea include:
         - title: catchy title for the content
@@ -962,62 +960,352 @@ async def generate_ideas(request: ContentIdeaRequest):
         - content_type: photo, carousel, reel, or story
         
         Return as JSON array."""
+    return system_message, prompt
+
+def _idea_item(idea: dict, niche: str) -> dict:
+    return ContentIdea(
+        niche=niche,
+        title=idea.get("title", "Content Idea"),
+        description=idea.get("description", ""),
+        suggested_caption=idea.get("suggested_caption", ""),
+        suggested_hashtags=idea.get("suggested_hashtags", []),
+        best_time_to_post=idea.get("best_time_to_post", "9:00 AM"),
+        content_type=idea.get("content_type", "photo")
+    ).model_dump()
+
+def _idea_text(idea: dict) -> str:
+    return idea.get("description") or idea.get("suggested_caption") or ""
+
+def _unique_ideas(ideas: List[dict], kept: List[dict]) -> List[dict]:
+    """``ideas`` minus near-duplicates of saved text, of ``kept`` or of each other"""
+    matches = near_duplicates.unique([_idea_text(idea) for idea in kept + ideas])[len(kept):]
+    return [idea for idea, duplicate in zip(ideas, matches) if duplicate is None]
+
+async def _store_ideas(ideas: List[dict]):
+    # Queued for the write-behind buffer (or written through with one insert_many
+    # when it is disabled); copies, since insert_many adds _id to each document.
+    # created_at is stored only, for search date ranges
+    created_at = datetime.now(timezone.utc).isoformat()
+    await idea_writer.add([{**idea, "created_at": created_at} for idea in ideas])
+    for idea in ideas:
+        near_duplicates.add("idea", idea["id"], _idea_text(idea))
+        hashtag_engine.record(idea.get("suggested_hashtags"), idea.get("niche"))
+
+@api_router.post("/content/generate-ideas")
+async def generate_ideas(request: ContentIdeaRequest, cache_control: Optional[str] = Header(None)):
+    try:
+        if not llm_gateway.configured:
+            raise HTTPException(status_code=500, detail="API key not configured")
         
-        user_message = UserMessage(text=prompt)
-        response = await chat.send_message(user_message)
+        system_message, prompt = _ideas_prompt(request)
+        response = await llm_gateway.complete("ideas", system_message, prompt, cache_control=cache_control)
         
-        import json
         try:
-            response_text = response.strip()
-            if "```json" in response_text:
-                response_text = response_text.split("```json")[1].split("```")[0]
-            elif "```" in response_text:
-                response_text = response_text.split("```")[1].split("```")[0]
-            
-            ideas_data = json.loads(response_text)
-            ideas = []
-            for idea in ideas_data[:request.count]:
-                ideas.append(ContentIdea(
-                    niche=request.niche,
-                    title=idea.get("title", "Content Idea"),
-                    description=idea.get("description", ""),
-                    suggested_caption=idea.get("suggested_caption", ""),
-                    suggested_hashtags=idea.get("suggested_hashtags", []),
-                    best_time_to_post=idea.get("best_time_to_post", "9:00 AM"),
-                    content_type=idea.get("content_type", "photo")
-                ))
-            
-            # Store ideas in database
-            for idea in ideas:
-                doc = idea.model_dump()
-                await db.content_ideas.insert_one(doc)
-            
-            return {"ideas": [i.model_dump() for i in ideas]}
-        except json.JSONDecodeError:
+            ideas = parse_array(response, lambda idea: _idea_item(idea, request.niche), limit=request.count)
+        except LlmParseError:
             raise HTTPException(status_code=500, detail="Failed to parse AI response")
+        
+        # Drop near-duplicates, then ask once more for replacements
+        unique = _unique_ideas(ideas, [])
+        filtered = len(ideas) - len(unique)
+        if filtered and NEAR_DUP_RETRIES:
+            _, retry_prompt = _ideas_prompt(request.model_copy(update={"count": filtered}))
+            retry_prompt += f"\n\nMake them clearly different from these: {json.dumps([idea['title'] for idea in unique])}"
+            response = await llm_gateway.complete("ideas", system_message, retry_prompt, cache_control=cache_control)
+            try:
+                extra = parse_array(response, lambda idea: _idea_item(idea, request.niche), limit=filtered)
+            except LlmParseError:
+                extra = []
+            replacements = _unique_ideas(extra, unique)
+            filtered += len(extra) - len(replacements)
+            unique += replacements
+        await _store_ideas(unique)
+        return {"ideas": unique, "filtered_duplicates": filtered}
     except Exception as e:
         logger.error(f"Ideas generation error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to generate ideas: {str(e)}")
 
+@api_router.post("/content/generate-ideas/stream")
+async def stream_ideas(request: ContentIdeaRequest, cache_control: Optional[str] = Header(None)):
+    system_message, prompt = _ideas_prompt(request)
+    return _sse_response(_stream_items(
+        "ideas", system_message, prompt, cache_control, request.count,
+        to_item=lambda idea: _idea_item(idea, request.niche), on_complete=_store_ideas,
+        keep=lambda idea, kept: bool(_unique_ideas([idea], kept))
+    ))
+
+# Batch Generation
+BATCH_MAX_JOBS = int(os.environ.get('BATCH_MAX_JOBS', 50))
+BATCH_CONCURRENCY = int(os.environ.get('BATCH_CONCURRENCY', 4))
+BATCH_PACK_SIZE = int(os.environ.get('BATCH_PACK_SIZE', 8))
+
+BATCH_JOB_TYPES = {
+    "caption": (CaptionRequest, generate_caption),
+    "ideas": (ContentIdeaRequest, generate_ideas),
+    "tips": (TipsRequest, generate_photography_tips),
+    "content_mix": (ContentMixRequest, generate_content_mix),
+    "viral_hooks": (ViralHookRequest, generate_viral_hooks),
+    "reel_ideas": (ReelIdeaRequest, generate_reel_ideas),
+    "client_magnet": (ClientMagnetRequest, generate_client_magnet),
+}
+
+def _batch_error_detail(e: Exception) -> str:
+    if isinstance(e, HTTPException):
+        return str(e.detail)
+    return str(e)
+
+def _batch_result(job: BatchJob, result=None, error: Optional[str] = None, packed: bool = False) -> dict:
+    """One entry of the batch response; every entry has the same keys"""
+    return {
+        "id": job.id,
+        "type": job.type,
+        "packed": packed,
+        "status": "ok" if error is None else "error",
+        "result": result if error is None else None,
+        "error": error,
+    }
+
+async def _run_batch_job(job_type: str, job_request: BaseModel):
+    result = await BATCH_JOB_TYPES[job_type][1](job_request, cache_control=None)
+    return result.model_dump() if isinstance(result, BaseModel) else result
+
+def _packed_caption_prompt(requests: List[CaptionRequest]):
+    system_message = """You are an expert Instagram content strategist specializing in photography businesses. 
+            Generate engaging, authentic captions that drive engagement and bookings.
+            Return a JSON array with one object per numbered request: index, caption, hashtags (array), engagement_tips (array)"""
+    specs = []
+    for index, request in enumerate(requests):
+        topic_text = f" about {request.topic}" if request.topic else ""
+        cta_text = " Include a call-to-action to book services." if request.include_cta else ""
+        specs.append(f"{index}. A {request.niche} photography business{topic_text}. Tone: {request.tone}.{cta_text}")
+    prompt = f"""Create {len(requests)} Instagram captions, one for each request below.
+        
+        {chr(10).join(specs)}
+        
+        For each caption include:
+        - index: the request number
+        - caption: a compelling caption (150-300 characters)
+        - hashtags: 10 relevant hashtags for that niche
+        - engagement_tips: 3 engagement tips for the post
+        
+        Return as JSON array."""
+    return system_message, prompt
+
+def _packed_ideas_prompt(requests: List[ContentIdeaRequest]):
+    system_message = """You are an expert Instagram content strategist for photography businesses.
+            Generate creative, engagement-driving content ideas.
+            Return a JSON array with one object per numbered request: index, ideas (array of objects containing: title, description, suggested_caption, suggested_hashtags (array), best_time_to_post, content_type)"""
+    specs = [f"{index}. {request.count} ideas for a {request.niche} photography business" for index, request in enumerate(requests)]
+    prompt = f"""Generate Instagram content ideas for each request below.
+        
+        {chr(10).join(specs)}
+        
+        For each idea include:
+        - title: catchy title for the content
+        - description: what the post should feature
+        - suggested_caption: ready-to-use caption
+        - suggested_hashtags: 5 relevant hashtags
+        - best_time_to_post: optimal posting time
+        - content_type: photo, carousel, reel, or story
+        
+        Return as JSON array of {{"index": <request number>, "ideas": [...]}}."""
+    return system_message, prompt
+
+async def _run_packed(job_type: str, requests: list) -> List[Optional[dict]]:
+    """One prompt for several compatible jobs; None where a part could not be recovered"""
+    if job_type == "caption":
+        system_message, prompt = _packed_caption_prompt(requests)
+    else:
+        system_message, prompt = _packed_ideas_prompt(requests)
+    response = await llm_gateway.complete(f"batch_{job_type}", system_message, prompt)
+    try:
+        parts = parse_array(response)
+    except LlmParseError:
+        parts = []
+    
+    results: List[Optional[dict]] = [None] * len(requests)
+    stored_ideas = []
+    for part in parts:
+        index = part.get("index")
+        if not isinstance(index, int) or not 0 <= index < len(requests) or results[index] is not None:
+            continue
+        request = requests[index]
+        try:
+            if job_type == "caption":
+                # A caption repeating saved text is rerun on its own, through
+                # generate_caption's regeneration
+                result = _caption_result(part, request, json.dumps(part))
+                if near_duplicates.match(result.caption) is None:
+                    results[index] = result.model_dump()
+            else:
+                ideas = build_items(part.get("ideas") or [], lambda idea: _idea_item(idea, request.niche), limit=request.count)
+                # Same near-duplicate filter as generate_ideas, also across the parts of this pack;
+                # a part left with nothing is rerun on its own, which asks for replacements
+                unique = _unique_ideas(ideas, stored_ideas)
+                if unique:
+                    results[index] = {"ideas": unique, "filtered_duplicates": len(ideas) - len(unique)}
+                    stored_ideas.extend(unique)
+        except ValueError:
+            continue
+    if stored_ideas:
+        await _store_ideas(stored_ideas)
+    return results
+
+@api_router.post("/batch/generate")
+async def batch_generate(request: BatchGenerateRequest):
+    """Run many generation jobs concurrently; compatible jobs share one prompt"""
+    if len(request.jobs) > BATCH_MAX_JOBS:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_MAX_JOBS} jobs per batch")
+    if not llm_gateway.configured:
+        raise HTTPException(status_code=500, detail="API key not configured")
+    
+    results: List[Optional[dict]] = [None] * len(request.jobs)
+    parsed = {}
+    for position, job in enumerate(request.jobs):
+        if job.type not in BATCH_JOB_TYPES:
+            results[position] = _batch_result(job, error=f"Unknown job type: {job.type}")
+            continue
+        try:
+            parsed[position] = BATCH_JOB_TYPES[job.type][0](**job.params)
+        except ValidationError as e:
+            results[position] = _batch_result(job, error=str(e))
+    
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+    prompts = 0
+    
+    def record(position: int, result=None, error: Optional[Exception] = None, packed: bool = False):
+        detail = _batch_error_detail(error) if error is not None else None
+        results[position] = _batch_result(request.jobs[position], result, detail, packed)
+    
+    async def run_single(position: int):
+        nonlocal prompts
+        async with semaphore:
+            prompts += 1
+            try:
+                record(position, await _run_batch_job(request.jobs[position].type, parsed[position]))
+            except Exception as e:
+                record(position, error=e)
+    
+    async def run_pack(job_type: str, positions: List[int]):
+        nonlocal prompts
+        async with semaphore:
+            prompts += 1
+            try:
+                packed_results = await _run_packed(job_type, [parsed[p] for p in positions])
+            except Exception as e:
+                logger.error(f"Packed batch {job_type} error: {str(e)}")
+                packed_results = [None] * len(positions)
+        leftovers = []
+        for position, result in zip(positions, packed_results):
+            if result is None:
+                leftovers.append(position)
+            else:
+                record(position, result, packed=True)
+        # Parts the packed prompt did not deliver are retried on their own
+        await asyncio.gather(*(run_single(position) for position in leftovers))
+    
+    tasks = []
+    packable = {"caption": [], "ideas": []}
+    for position, job_request in parsed.items():
+        job_type = request.jobs[position].type
+        if request.pack and job_type in packable:
+            packable[job_type].append(position)
+        else:
+            tasks.append(run_single(position))
+    for job_type, positions in packable.items():
+        for start in range(0, len(positions), BATCH_PACK_SIZE):
+            chunk = positions[start:start + BATCH_PACK_SIZE]
+            tasks.append(run_pack(job_type, chunk) if len(chunk) > 1 else run_single(chunk[0]))
+    await asyncio.gather(*tasks)
+    
+    return {
+        "results": results,
+        "succeeded": sum(1 for r in results if r["status"] == "ok"),
+        "failed": sum(1 for r in results if r["status"] == "error"),
+        "prompts": prompts
+    }
+
 # Content CRUD
+CONTENT_STATS_PROJECTION = {"_id": 0, "id": 1, "status": 1, "niche": 1, "hashtags": 1}
+
+async def _on_content_changed(before: Optional[dict], after: Optional[dict]):
+    """Keep derived data in step with a content write (either side may be None)"""
+    await _on_content_changes([(before, after)])
+
+def _index_content_changes(changes: List[tuple]):
+    """Keep the near-duplicate index in step with (before, after) pairs"""
+    for before, after in changes:
+        if after is None:
+            near_duplicates.remove("content", before["id"])
+        elif "caption" in after:
+            near_duplicates.add("content", after.get("id") or before["id"], after["caption"])
+
+async def _on_content_changes(changes: List[tuple]):
+    """Batch form of _on_content_changed for bulk writes: (before, after) pairs"""
+    _index_content_changes(changes)
+    for before, after in changes:
+        hashtag_engine.record_change(before, after)
+    if changes:
+        await rollups.apply_content_changes(db, changes)
+
 @api_router.post("/content", response_model=ContentBase)
 async def create_content(content: ContentCreate):
     content_obj = ContentBase(**content.model_dump())
+    if content_obj.media_id and not content_obj.media_url:
+        content_obj.media_url = _media_url(content_obj.media_id)
     doc = content_obj.model_dump()
     doc['created_at'] = doc['created_at'].isoformat()
     await db.content.insert_one(doc)
+    await _on_content_changed(None, doc)
     return content_obj
 
+CONTENT_PAGE_DEFAULT = 100
+CONTENT_PAGE_MAX = 500
+
 @api_router.get("/content")
-async def get_all_content(status: Optional[str] = None, niche: Optional[str] = None):
+async def get_all_content(
+    status: Optional[str] = None,
+    niche: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(CONTENT_PAGE_DEFAULT, ge=1, le=CONTENT_PAGE_MAX),
+    fields: Optional[str] = None
+):
     query = {}
     if status:
         query["status"] = status
     if niche:
         query["niche"] = niche
     
-    content_list = await db.content.find(query, {"_id": 0}).sort("created_at", -1).to_list(100)
-    return {"content": content_list}
+    # Keyset pagination on (created_at, id), newest first
+    if cursor:
+        try:
+            created_at, content_id = decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        query["$or"] = [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "id": {"$lt": content_id}}
+        ]
+    
+    projection = {"_id": 0}
+    if fields:
+        requested = {f.strip() for f in fields.split(",") if f.strip()}
+        unknown = requested - set(ContentBase.model_fields)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+        # id and created_at are always returned; the cursor is built from them
+        projection.update({f: 1 for f in requested | {"id", "created_at"}})
+    
+    content_list = await db.content.find(query, projection).sort(
+        [("created_at", -1), ("id", -1)]
+    ).limit(limit + 1).to_list(limit + 1)
+    
+    next_cursor = None
+    if len(content_list) > limit:
+        content_list = content_list[:limit]
+        next_cursor = encode_cursor(content_list[-1])
+    # Returned as a response so the page skips FastAPI's jsonable_encoder pass
+    return JSONResponseClass({"content": content_list, "next_cursor": next_cursor})
 
 @api_router.get("/content/{content_id}")
 async def get_content(content_id: str):
@@ -1028,21 +1316,238 @@ async def get_content(content_id: str):
 
 @api_router.put("/content/{content_id}")
 async def update_content(content_id: str, content: ContentCreate):
-    result = await db.content.update_one(
+    update = content.model_dump()
+    before = await db.content.find_one_and_update(
         {"id": content_id},
-        {"$set": content.model_dump()}
+        {"$set": update},
+        projection=CONTENT_STATS_PROJECTION
     )
-    if result.matched_count == 0:
+    if before is None:
         raise HTTPException(status_code=404, detail="Content not found")
+    await _on_content_changed(before, update)
     return {"message": "Content updated successfully"}
 
 @api_router.delete("/content/{content_id}")
 async def delete_content(content_id: str):
-    result = await db.content.delete_one({"id": content_id})
-    if result.deleted_count == 0:
+    before = await db.content.find_one_and_delete({"id": content_id}, projection=CONTENT_STATS_PROJECTION)
+    if before is None:
         raise HTTPException(status_code=404, detail="Content not found")
+    await _on_content_changed(before, None)
     return {"message": "Content deleted successfully"}
 
+# Bulk content writes (JSON body or NDJSON stream)
+CONTENT_BULK_MAX = int(os.environ.get('CONTENT_BULK_MAX', 1000))
+NDJSON_LINE_MAX = int(os.environ.get('NDJSON_LINE_MAX', 1024 * 1024))
+NDJSON_TYPES = ("application/x-ndjson", "application/jsonl", "application/ndjson")
+
+class _InvalidItem:
+    """Placeholder for an NDJSON line that is not valid JSON"""
+    def __init__(self, error: str):
+        self.error = error
+
+async def _read_bulk_items(request: Request, key: str) -> list:
+    """Items from {key: [...]}, a bare JSON array, or one JSON value per NDJSON line"""
+    items = []
+    
+    def add_line(line: bytes):
+        line = line.strip()
+        if not line:
+            return
+        if len(items) >= CONTENT_BULK_MAX:
+            raise HTTPException(status_code=413, detail=f"At most {CONTENT_BULK_MAX} items per request")
+        try:
+            items.append(json.loads(line))
+        except ValueError as e:
+            items.append(_InvalidItem(f"Invalid JSON: {str(e)}"))
+    
+    if request.headers.get("content-type", "").startswith(NDJSON_TYPES):
+        # Parsed as it arrives, so an oversized import is cut off early
+        pending = b""
+        async for chunk in request.stream():
+            pending += chunk
+            *lines, pending = pending.split(b"\n")
+            for line in lines:
+                add_line(line)
+            if len(pending) > NDJSON_LINE_MAX:
+                raise HTTPException(status_code=413, detail=f"NDJSON lines must be at most {NDJSON_LINE_MAX} bytes")
+        add_line(pending)
+        return items
+    
+    try:
+        body = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Request body must be JSON or NDJSON")
+    items = body.get(key) if isinstance(body, dict) else body
+    if not isinstance(items, list):
+        raise HTTPException(status_code=400, detail=f"Expected a JSON array or an object with '{key}'")
+    if len(items) > CONTENT_BULK_MAX:
+        raise HTTPException(status_code=413, detail=f"At most {CONTENT_BULK_MAX} items per request")
+    return items
+
+def _bulk_item_error(item) -> Optional[str]:
+    return item.error if isinstance(item, _InvalidItem) else None
+
+async def _content_before(ids: List[str]) -> dict:
+    """id -> stats fields of the content items that exist, in one find"""
+    if not ids:
+        return {}
+    docs = await db.content.find({"id": {"$in": ids}}, CONTENT_STATS_PROJECTION).to_list(None)
+    return {doc["id"]: doc for doc in docs}
+
+async def _bulk_write_content_counts(ops: list, count_field: str) -> tuple:
+    """(documents matched or removed, op index -> write error) of one unordered bulk_write"""
+    if not ops:
+        return 0, {}
+    try:
+        result = await db.content.bulk_write(ops, ordered=False)
+    except BulkWriteError as e:
+        return e.details.get(count_field, 0), {err["index"]: err for err in e.details.get("writeErrors", [])}
+    return result.bulk_api_result.get(count_field, 0), {}
+
+def _bulk_apply_write_errors(results: list, writes: list, write_errors: dict) -> list:
+    """Mark the items whose op failed; the (before, after) changes of the rest"""
+    changes = []
+    for op_index, (result_indexes, change) in enumerate(writes):
+        err = write_errors.get(op_index)
+        if err is None:
+            changes.append(change)
+            continue
+        code = 409 if err.get("code") == 11000 else 500
+        for result_index in result_indexes:
+            results[result_index].update(status="error", code=code, error=err.get("errmsg", "Write failed"))
+    return changes
+
+async def _on_bulk_content_changes(changes: list, written: int, action: str):
+    """Apply a bulk write's changes to derived data, or rebuild it if the write saw other documents
+
+    The changes come from before-images read ahead of the write. If a
+    concurrent delete removed one of them in between, fewer documents are
+    written than changes computed, and which ones is unknown.
+    """
+    if written == len(changes):
+        await _on_content_changes(changes)
+        return
+    logger.warning(f"Bulk {action}: {written} of {len(changes)} content items written; rebuilding derived counts")
+    _index_content_changes(changes)
+    await rollups.rebuild_rollup(db)
+    app.state.hashtag_load = asyncio.create_task(_load_hashtag_stats())
+
+def _bulk_response(results: list) -> dict:
+    summary = {}
+    for result in results:
+        summary[result["status"]] = summary.get(result["status"], 0) + 1
+    return {"results": results, "summary": summary}
+
+@api_router.post("/content/bulk")
+async def bulk_create_content(request: Request):
+    """Create many content items with one unordered bulk_write; results are per item"""
+    items = await _read_bulk_items(request, "items")
+    results, ops, writes = [], [], []
+    for index, item in enumerate(items):
+        error = _bulk_item_error(item)
+        if error is None:
+            try:
+                content_obj = ContentBase(**ContentCreate.model_validate(item).model_dump())
+            except ValidationError as e:
+                error = str(e)
+        if error is not None:
+            results.append({"index": index, "status": "error", "code": 422, "error": error})
+            continue
+        if content_obj.media_id and not content_obj.media_url:
+            content_obj.media_url = _media_url(content_obj.media_id)
+        doc = content_obj.model_dump()
+        doc["created_at"] = doc["created_at"].isoformat()
+        results.append({"index": index, "id": doc["id"], "status": "created"})
+        ops.append(InsertOne(dict(doc)))
+        writes.append(([len(results) - 1], (None, doc)))
+    
+    _, write_errors = await _bulk_write_content_counts(ops, "nInserted")
+    await _on_content_changes(_bulk_apply_write_errors(results, writes, write_errors))
+    return _bulk_response(results)
+
+@api_router.post("/content/bulk/update")
+async def bulk_update_content(request: Request):
+    """Apply partial updates ({id, ...fields}) to many content items
+
+    The current documents are read with one find and the updates sent as one
+    unordered bulk_write. Patches to the same id are merged in request order
+    into a single update, and every item they came from shares its result.
+    """
+    items = await _read_bulk_items(request, "items")
+    results, patches = [], {}
+    for index, item in enumerate(items):
+        error = _bulk_item_error(item)
+        if error is None:
+            try:
+                patch = ContentPatch.model_validate(item)
+                update = patch.model_dump(exclude_unset=True, exclude={"id"})
+                if not update:
+                    error = "No fields to update"
+            except ValidationError as e:
+                error = str(e)
+        if error is not None:
+            results.append({"index": index, "id": item.get("id") if isinstance(item, dict) else None, "status": "error", "code": 422, "error": error})
+            continue
+        results.append({"index": index, "id": patch.id, "status": "updated"})
+        merged = patches.setdefault(patch.id, ([], {}))
+        merged[0].append(len(results) - 1)
+        merged[1].update(update)
+    
+    befores = await _content_before(list(patches))
+    ops, writes = [], []
+    for content_id, (result_indexes, update) in patches.items():
+        before = befores.get(content_id)
+        if before is None:
+            for result_index in result_indexes:
+                results[result_index].update(status="not_found")
+            continue
+        ops.append(UpdateOne({"id": content_id}, {"$set": update}))
+        # Patches are partial; the counters need the whole after-image
+        writes.append((result_indexes, (before, {**before, **update})))
+    
+    matched, write_errors = await _bulk_write_content_counts(ops, "nMatched")
+    changes = _bulk_apply_write_errors(results, writes, write_errors)
+    await _on_bulk_content_changes(changes, matched, "update")
+    return _bulk_response(results)
+
+@api_router.post("/content/bulk/delete")
+async def bulk_delete_content(request: Request):
+    """Delete many content items by id ({"ids": [...]} or one id per NDJSON line)
+
+    The documents are read with one find and removed with one unordered
+    bulk_write. A repeated id is deleted once and reported not_found after.
+    """
+    items = await _read_bulk_items(request, "ids")
+    results, ids = [], {}
+    for index, item in enumerate(items):
+        content_id = item.get("id") if isinstance(item, dict) else item
+        error = _bulk_item_error(item)
+        if error is None and not isinstance(content_id, str):
+            error = "Expected a content id"
+        if error is not None:
+            results.append({"index": index, "status": "error", "code": 422, "error": error})
+            continue
+        results.append({"index": index, "id": content_id, "status": "deleted"})
+        if content_id in ids:
+            results[-1].update(status="not_found")
+        else:
+            ids[content_id] = len(results) - 1
+    
+    befores = await _content_before(list(ids))
+    ops, writes = [], []
+    for content_id, result_index in ids.items():
+        before = befores.get(content_id)
+        if before is None:
+            results[result_index].update(status="not_found")
+            continue
+        ops.append(DeleteOne({"id": content_id}))
+        writes.append(([result_index], (before, None)))
+    
+    deleted, write_errors = await _bulk_write_content_counts(ops, "nRemoved")
+    changes = _bulk_apply_write_errors(results, writes, write_errors)
+    await _on_bulk_content_changes(changes, deleted, "delete")
+    return _bulk_response(results)
+
 # Calendar / Scheduling
 @api_router.post("/calendar/schedule")
 async def schedule_post(content_id: str, scheduled_date: str, scheduled_time: str):
@@ -1062,34 +1567,65 @@ async def schedule_post(content_id: str, scheduled_date: str, scheduled_time: st
     await db.scheduled_posts.insert_one(doc)
     
     # Update content status
-    await db.content.update_one(
+    before = await db.content.find_one_and_update(
         {"id": content_id},
-        {"$set": {"status": "scheduled", "scheduled_date": scheduled_date}}
+        {"$set": {"status": "scheduled", "scheduled_date": scheduled_date}},
+        projection=CONTENT_STATS_PROJECTION
     )
+    if before:
+        await _on_content_changed(before, {**before, "status": "scheduled"})
     
     return {"message": "Post scheduled successfully", "scheduled_post": scheduled_post.model_dump()}
 
-@api_router.get("/calendar")
-async def get_calendar(month: Optional[str] = None, year: Optional[str] = None):
-    query = {}
-    if month and year:
-        # Filter by month prefix
+CALENDAR_LIMIT = 100
+
+def _calendar_date_range(
+    month: Optional[str], year: Optional[str], date_from: Optional[str], date_to: Optional[str]
+) -> Optional[dict]:
+    """scheduled_date bounds for GET /calendar: from/to when given, else the month
+
+    scheduled_date is stored as YYYY-MM-DD, so string order is date order and
+    a $gte/$lte range can walk the scheduled_date index. Day 31 bounds every
+    month, matching the old ^YYYY-MM prefix regex.
+    """
+    if month and year and not (date_from or date_to):
         date_prefix = f"{year}-{month.zfill(2)}"
-        query["scheduled_date"] = {"$regex": f"^{date_prefix}"}
-    
-    scheduled_posts = await db.scheduled_posts.find(query, {"_id": 0}).to_list(100)
-    
-    # Get content details for each scheduled post
-    calendar_items = []
-    for post in scheduled_posts:
-        content = await db.content.find_one({"id": post["content_id"]}, {"_id": 0})
-        if content:
-            calendar_items.append({
-                **post,
-                "content": content
-            })
+        date_from, date_to = f"{date_prefix}-01", f"{date_prefix}-31"
+    bounds = {}
+    if date_from:
+        bounds["$gte"] = date_from
+    if date_to:
+        bounds["$lte"] = date_to
+    return bounds or None
+
+def _calendar_pipeline(date_range: Optional[dict]) -> list:
+    """Scheduled posts in date order, each joined with its content item in the same round trip"""
+    return [
+        {"$match": {"scheduled_date": date_range} if date_range else {}},
+        {"$sort": {"scheduled_date": 1, "scheduled_time": 1}},
+        # As before the join: the first 100 posts, minus those whose content is gone
+        {"$limit": CALENDAR_LIMIT},
+        {"$lookup": {
+            "from": "content",
+            "localField": "content_id",
+            "foreignField": "id",
+            "as": "content"
+        }},
+        {"$unwind": "$content"},
+        {"$project": {"_id": 0, "content._id": 0}}
+    ]
+
+@api_router.get("/calendar")
+async def get_calendar(
+    month: Optional[str] = None,
+    year: Optional[str] = None,
+    date_from: Optional[str] = Query(None, alias="from"),
+    date_to: Optional[str] = Query(None, alias="to")
+):
+    pipeline = _calendar_pipeline(_calendar_date_range(month, year, date_from, date_to))
+    calendar_items = await db.scheduled_posts.aggregate(pipeline).to_list(CALENDAR_LIMIT)
     
-    return {"calendar": calendar_items}
+    return JSONResponseClass({"calendar": calendar_items})
 
 @api_router.delete("/calendar/{schedule_id}")
 async def cancel_scheduled_post(schedule_id: str):
@@ -1103,28 +1639,74 @@ async def cancel_scheduled_post(schedule_id: str):
     )
     
     # Update content status back to draft
-    await db.content.update_one(
+    before = await db.content.find_one_and_update(
         {"id": scheduled_post["content_id"]},
-        {"$set": {"status": "draft", "scheduled_date": None}}
+        {"$set": {"status": "draft", "scheduled_date": None}},
+        projection=CONTENT_STATS_PROJECTION
     )
+    if before:
+        await _on_content_changed(before, {**before, "status": "draft"})
     
     return {"message": "Scheduled post cancelled"}
 
+# Search
+SEARCH_MAX_OFFSET = int(os.environ.get('SEARCH_MAX_OFFSET', 1000))
+SEARCH_MAX_TIME_MS = int(os.environ.get('SEARCH_MAX_TIME_MS', 2000))
+
+@api_router.get("/search")
+async def search_content(
+    q: Optional[str] = None,
+    source: str = "content",
+    hashtags: Optional[str] = None,
+    niche: Optional[str] = None,
+    status: Optional[str] = None,
+    content_type: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=SEARCH_MAX_OFFSET)
+):
+    """Words in titles, captions and hashtags, exact hashtags (comma separated) and
+    date ranges over content, ideas or scheduled posts, with facet counts by niche,
+    status and content type"""
+    if source not in SEARCH_SOURCES:
+        raise HTTPException(status_code=400, detail=f"Unknown source. Use: {', '.join(SEARCH_SOURCES)}")
+    started = time.perf_counter()
+    try:
+        result = await run_search(
+            db, source,
+            q=q.strip() if q and q.strip() else None,
+            hashtags=normalize_hashtags(hashtags),
+            filters={"niche": niche, "status": status, "content_type": content_type},
+            dates=date_range(date_from, date_to),
+            offset=offset,
+            limit=limit,
+            max_time_ms=SEARCH_MAX_TIME_MS
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ExecutionTimeout:
+        raise HTTPException(status_code=504, detail="Search took too long; add words, hashtags or filters to narrow it")
+    except Exception as e:
+        logger.error(f"Search error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to search: {str(e)}")
+    result["source"] = source
+    result["took_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return JSONResponseClass(result)
+
 # Analytics
 @api_router.get("/analytics", response_model=AnalyticsData)
 async def get_analytics():
-    # Get counts
-    total_posts = await db.content.count_documents({})
-    scheduled_posts = await db.content.count_documents({"status": "scheduled"})
-    published_posts = await db.content.count_documents({"status": "published"})
-    drafts = await db.content.count_documents({"status": "draft"})
-    content_ideas = await db.content_ideas.count_documents({})
+    # O(1) read of the incrementally maintained counters
+    stats = await rollups.read_rollup(db)
+    total_posts = stats.get("total", 0)
+    scheduled_posts = stats.get("status", {}).get("scheduled", 0)
+    published_posts = stats.get("status", {}).get("published", 0)
+    drafts = stats.get("status", {}).get("draft", 0)
+    content_ideas = stats.get("content_ideas", 0)
     
     # Posts by niche
-    posts_by_niche = {}
-    for niche in PHOTOGRAPHY_NICHES:
-        count = await db.content.count_documents({"niche": niche})
-        posts_by_niche[niche] = count
+    posts_by_niche = {niche: stats.get("niche", {}).get(niche, 0) for niche in catalogs.current.niches}
     
     # Find best performing niche
     best_niche = max(posts_by_niche, key=posts_by_niche.get) if posts_by_niche else "wedding"
@@ -1151,49 +1733,329 @@ async def get_analytics():
         content_ideas_generated=content_ideas
     )
 
-# Media Upload (Base64)
+@api_router.post("/analytics/rebuild")
+async def rebuild_analytics():
+    """Recompute the analytics rollup from db.content in one aggregation pass"""
+    stats = await rollups.rebuild_rollup(db)
+    return {"message": "Analytics rollup rebuilt", "total_posts": stats["total"]}
+
+# Media Upload (GridFS, content-addressed)
+def _media_url(media_id: str, variant: Optional[str] = None) -> str:
+    return f"/api/media/{media_id}?variant={variant}" if variant else f"/api/media/{media_id}/raw"
+
+def _media_upload_response(media_doc: dict, deduplicated: bool) -> dict:
+    return {
+        "id": media_doc["id"],
+        "filename": media_doc["filename"],
+        "media_type": media_doc["media_type"],
+        "size": media_doc["size"],
+        "sha256": media_doc["sha256"],
+        "ref_count": media_doc["ref_count"],
+        "deduplicated": deduplicated,
+        "media_url": _media_url(media_doc["id"])
+    }
+
+async def _reuse_media(sha256: str) -> Optional[dict]:
+    """Take another reference on already-stored media with this hash, if any"""
+    return await db.media.find_one_and_update(
+        {"sha256": sha256},
+        {"$inc": {"ref_count": 1}},
+        projection={"_id": 0, "data": 0},
+        return_document=ReturnDocument.AFTER
+    )
+
+async def _delete_media_files(media: dict):
+    if media.get("file_id"):
+        await media_store.delete(media["file_id"])
+    for variant in media.get("variants", {}).values():
+        await media_store.delete(variant["file_id"])
+
+async def _store_generated_media(data: bytes, content_type: str, filename: str) -> dict:
+    """Put generated bytes in the media store (deduplicated like uploads) and return the media doc.
+    
+    Thumbnails are rendered from the same bytes and stored alongside, so nothing
+    has to be fetched back out of the store to make them.
+    """
+    sha256 = hashlib.sha256(data).hexdigest()
+    existing = await _reuse_media(sha256)
+    if existing:
+        return existing
+    try:
+        rendered = await variant_pipeline.render(data, EAGER_VARIANTS)
+    except Exception as e:
+        logger.warning(f"Thumbnail rendering failed for {filename}: {str(e)}")
+        rendered = {}
+    file_id = await media_store.put(data, filename, content_type)
+    variants = await variant_pipeline.store(rendered, filename)
+    media_doc = {
+        "id": str(uuid.uuid4()),
+        "filename": filename,
+        "content_type": content_type,
+        "media_type": "ai_generated",
+        "size": len(data),
+        "sha256": sha256,
+        "file_id": file_id,
+        "variants": variants,
+        "ref_count": 1,
+        "created_at": datetime.now(timezone.utc).isoformat()
+    }
+    try:
+        await db.media.insert_one(dict(media_doc))
+    except DuplicateKeyError:
+        await _delete_media_files(media_doc)
+        return await _reuse_media(sha256)
+    return media_doc
+
 @api_router.post("/content/upload-media")
 async def upload_media(file: UploadFile = File(...)):
+    # Starlette already knows the spooled size; reject before touching storage
+    if file.size is not None and file.size > MAX_UPLOAD_FILE_BYTES:
+        raise HTTPException(status_code=413, detail=f"File exceeds {MAX_UPLOAD_FILE_BYTES} bytes")
     try:
-        contents = await file.read()
-        base64_data = base64.b64encode(contents).decode('utf-8')
+        # Hash the spooled upload first so a duplicate never reaches storage
+        _, sha256 = await hash_stream(file, max_bytes=MAX_UPLOAD_FILE_BYTES)
+        existing = await _reuse_media(sha256)
+        if existing:
+            return _media_upload_response(existing, deduplicated=True)
+        await file.seek(0)
         
         # Determine media type
         content_type = file.content_type or "image/jpeg"
         media_type = "video" if "video" in content_type else "image"
         
-        # Store in database
+        # Stream the upload into the chunked store, hashing as we go
+        file_id, size, sha256 = await media_store.put_stream(
+            file, file.filename, content_type, max_bytes=MAX_UPLOAD_FILE_BYTES
+        )
         media_doc = {
             "id": str(uuid.uuid4()),
             "filename": file.filename,
             "content_type": content_type,
             "media_type": media_type,
-            "data": base64_data,
+            "size": size,
+            "sha256": sha256,
+            "file_id": file_id,
+            "ref_count": 1,
             "created_at": datetime.now(timezone.utc).isoformat()
         }
         
-        await db.media.insert_one(media_doc)
+        try:
+            await db.media.insert_one(media_doc)
+        except DuplicateKeyError:
+            # A concurrent upload of the same bytes won the race; keep theirs
+            await media_store.delete(file_id)
+            existing = await _reuse_media(sha256)
+            return _media_upload_response(existing, deduplicated=True)
         
-        return {
-            "id": media_doc["id"],
-            "filename": file.filename,
-            "media_type": media_type,
-            "media_url": f"data:{content_type};base64,{base64_data[:50]}..."  # Truncated for response
-        }
+        # Thumbnails are rendered off the request path; other variants on first request
+        variant_pipeline.prerender(media_doc)
+        return _media_upload_response(media_doc, deduplicated=False)
+    except MediaTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         logger.error(f"Media upload error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to upload media: {str(e)}")
 
+@api_router.get("/media/storage-report")
+async def get_media_storage_report():
+    """Bytes stored vs bytes referenced, i.e. what deduplication saved"""
+    totals = await db.media.aggregate([
+        {"$project": {
+            "size": {"$ifNull": ["$size", 0]},
+            "ref_count": {"$ifNull": ["$ref_count", 1]}
+        }},
+        {"$group": {
+            "_id": None,
+            "media_files": {"$sum": 1},
+            "references": {"$sum": "$ref_count"},
+            "stored_bytes": {"$sum": "$size"},
+            "logical_bytes": {"$sum": {"$multiply": ["$size", "$ref_count"]}}
+        }}
+    ]).to_list(1)
+    report = totals[0] if totals else {"media_files": 0, "references": 0, "stored_bytes": 0, "logical_bytes": 0}
+    report.pop("_id", None)
+    report["duplicate_uploads"] = report["references"] - report["media_files"]
+    report["bytes_saved"] = report["logical_bytes"] - report["stored_bytes"]
+    report["variant_pipeline"] = variant_pipeline.snapshot()
+    return report
+
 @api_router.get("/media/{media_id}")
-async def get_media(media_id: str):
+async def get_media(
+    media_id: str,
+    request: Request,
+    variant: Optional[str] = None,
+    range_header: Optional[str] = Header(None, alias="Range"),
+    if_none_match: Optional[str] = Header(None)
+):
+    """Media metadata, or the bytes of one variant with ?variant=thumb_320"""
+    if variant:
+        return await get_media_raw(media_id, variant=variant, range_header=range_header, if_none_match=if_none_match)
+    media = await db.media.find_one({"id": media_id}, {"_id": 0, "data": 0})
+    if not media:
+        raise HTTPException(status_code=404, detail="Media not found")
+    media["media_url"] = _media_url(media_id)
+    for name, entry in media.get("variants", {}).items():
+        entry.pop("file_id", None)
+        entry["url"] = _media_url(media_id, name)
+    # Any of these can be requested; missing ones are rendered on first use
+    media["available_variants"] = sorted(VARIANTS) if is_renderable(media) else []
+    # Metadata changes (ref_count, new variants), so it is revalidated rather than immutable
+    return respond_json(request, media)
+
+@api_router.get("/media/{media_id}/raw")
+async def get_media_raw(
+    media_id: str,
+    variant: Optional[str] = None,
+    range_header: Optional[str] = Header(None, alias="Range"),
+    if_none_match: Optional[str] = Header(None)
+):
     media = await db.media.find_one({"id": media_id}, {"_id": 0})
     if not media:
         raise HTTPException(status_code=404, detail="Media not found")
-    return media
+    
+    # Stored bytes never change, so the content hash is a strong validator
+    etag = f'"{media.get("sha256") or media_id}{"-" + variant if variant else ""}"'
+    cache_headers = {"ETag": etag, "Cache-Control": IMMUTABLE}
+    last_modified = http_date(media.get("created_at"))
+    if last_modified:
+        cache_headers["Last-Modified"] = last_modified
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag, IMMUTABLE, {"Last-Modified": last_modified} if last_modified else None)
+    
+    if variant:
+        try:
+            media = await variant_pipeline.get(media, variant)
+        except VariantNotAvailable as e:
+            raise HTTPException(status_code=404, detail=str(e))
+    
+    if "file_id" in media:
+        size = media["size"]
+        legacy_bytes = None
+    else:
+        # Documents uploaded before the chunked store still carry inline base64
+        legacy_bytes = base64.b64decode(media.get("data", ""))
+        size = len(legacy_bytes)
+    
+    try:
+        byte_range = parse_range_header(range_header, size)
+    except RangeNotSatisfiable:
+        raise HTTPException(
+            status_code=416,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+    start, end = byte_range if byte_range else (0, size - 1)
+    
+    headers = {"Accept-Ranges": "bytes", "Content-Length": str(max(end - start + 1, 0)), **cache_headers}
+    if byte_range:
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    
+    if legacy_bytes is not None:
+        body = iter([legacy_bytes[start:end + 1]])
+    elif size == 0:
+        body = iter([b""])
+    else:
+        body = media_store.stream(media["file_id"], start, end)
+    
+    return StreamingResponse(
+        body,
+        status_code=206 if byte_range else 200,
+        media_type=media.get("content_type", "application/octet-stream"),
+        headers=headers
+    )
+
+@api_router.delete("/media/{media_id}")
+async def delete_media(media_id: str):
+    """Drop one reference; the bytes are removed with the last one"""
+    while True:
+        media = await db.media.find_one_and_update(
+            {"id": media_id, "ref_count": {"$gt": 1}},
+            {"$inc": {"ref_count": -1}},
+            projection={"_id": 0, "ref_count": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        if media:
+            return {"message": "Media reference released", "ref_count": media["ref_count"]}
+        
+        # Only the last reference deletes; a dedup upload may have added one since the check above
+        media = await db.media.find_one_and_delete(
+            {"id": media_id, "$or": [{"ref_count": {"$lte": 1}}, {"ref_count": {"$exists": False}}]},
+            projection={"_id": 0, "file_id": 1, "variants": 1}
+        )
+        if media:
+            await _delete_media_files(media)
+            return {"message": "Media deleted successfully", "ref_count": 0}
+        if not await db.media.find_one({"id": media_id}, {"_id": 1}):
+            raise HTTPException(status_code=404, detail="Media not found")
+
+# Diagnostics
+@api_router.get("/llm/stats")
+async def get_llm_stats():
+    """Gateway call/retry counters, per-endpoint cache hits/misses and coalesced calls"""
+    return {
+        "gateway": dict(llm_gateway.stats),
+        "cache": llm_cache.snapshot(),
+        "single_flight": llm_gateway.single_flight.snapshot(),
+        "jobs": job_queue.snapshot()
+    }
+
+@api_router.get("/diagnostics/query-plans")
+async def get_query_plans():
+    """Explain each route's query shape and flag collection scans"""
+    plans = await explain_query_shapes(db)
+    return {
+        "plans": plans,
+        "collection_scans": [p["route"] for p in plans if p["collection_scan"]]
+    }
+
+@api_router.get("/diagnostics/write-behind")
+async def get_write_behind_stats():
+    """accepted == inserted + failed + dropped + pending when nothing has been lost"""
+    return {"content_ideas": idea_writer.snapshot()}
+
+@api_router.get("/diagnostics/near-duplicates")
+async def get_near_duplicate_stats():
+    """Size of the MinHash index and how many generated captions/ideas it caught"""
+    return near_duplicates.snapshot()
+
+@api_router.get("/diagnostics/hashtags")
+async def get_hashtag_stats():
+    """Posts, distinct tags and tag pairs behind /hashtags/{niche}/recommend"""
+    return hashtag_engine.snapshot()
+
+@api_router.get("/diagnostics/compression")
+async def get_compression_stats():
+    """Bytes before/after compression per route, and why responses were left alone"""
+    return compression_stats.snapshot()
+
+# Catalog
+@api_router.post("/catalog/reload")
+async def reload_catalog():
+    """Re-read the catalog data file; on error the previous catalog keeps serving"""
+    try:
+        catalog = await asyncio.to_thread(catalogs.reload)
+    except CatalogError as e:
+        logger.error(f"Catalog reload error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to reload catalog: {str(e)}")
+    return {"message": "Catalog reloaded", "catalog": catalog.snapshot()}
 
 # Include the router in the main app
 app.include_router(api_router)
 
+compression_stats = CompressionStats()
+app.add_middleware(
+    CompressionMiddleware,
+    stats=compression_stats,
+    minimum_size=int(os.environ.get('COMPRESSION_MIN_BYTES', 1024)),
+    offload_size=int(os.environ.get('COMPRESSION_OFFLOAD_BYTES', 256 * 1024)),
+)
+
+app.add_middleware(
+    RequestSizeLimitMiddleware,
+    max_bytes=MAX_UPLOAD_REQUEST_BYTES,
+    path_prefixes=["/api/content/upload-media"],
+)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
@@ -1202,6 +2064,62 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("startup")
+async def create_db_indexes():
+    await ensure_indexes(db)
+
+@app.on_event("startup")
+async def load_catalog():
+    catalogs.reload()
+
+async def _load_near_duplicates():
+    near_duplicates.begin_load()
+    try:
+        for source, collection, projection, to_text in (
+            ("content", db.content, {"caption": 1}, lambda doc: doc.get("caption")),
+            ("idea", db.content_ideas, {"description": 1, "suggested_caption": 1}, _idea_text),
+        ):
+            cursor = collection.find({}, {"_id": 0, "id": 1, **projection})
+            while batch := await cursor.to_list(1000):
+                texts = [to_text(doc) for doc in batch]
+                # Hashing runs off the event loop; inserting the rows is quick
+                signatures = await asyncio.to_thread(near_duplicates.signatures, texts)
+                near_duplicates.load((source, doc.get("id"), sig) for doc, sig in zip(batch, signatures))
+    except Exception as e:
+        logger.error(f"Near-duplicate index load failed: {str(e)}")
+    finally:
+        near_duplicates.finish_load()
+        logger.info(f"Near-duplicate index loaded: {near_duplicates.snapshot()}")
+
+async def _load_hashtag_stats():
+    hashtag_engine.begin_load()
+    fresh = HashtagStats()
+    try:
+        for collection, field in ((db.content, "hashtags"), (db.content_ideas, "suggested_hashtags")):
+            cursor = collection.find({}, {"_id": 0, "niche": 1, field: 1})
+            while batch := await cursor.to_list(1000):
+                await asyncio.to_thread(fresh.apply_docs, batch, field)
+    except Exception as e:
+        logger.error(f"Hashtag statistics load failed: {str(e)}")
+        hashtag_engine.abort_load()
+        return
+    hashtag_engine.finish_load(fresh)
+    logger.info(f"Hashtag statistics loaded: {hashtag_engine.snapshot()}")
+
+@app.on_event("startup")
+async def start_workers():
+    variant_pipeline.start()
+    job_queue.start()
+    if IDEA_WRITE_BEHIND:
+        idea_writer.start()
+    # Generation checks against whatever has loaded so far
+    app.state.near_duplicate_load = asyncio.create_task(_load_near_duplicates())
+    app.state.hashtag_load = asyncio.create_task(_load_hashtag_stats())
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    await job_queue.stop()
+    # Drains queued ideas before the client closes; the final counts are logged
+    await idea_writer.stop()
+    variant_pipeline.stop()
     client.close()
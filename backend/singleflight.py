@@ -0,0 +1,38 @@
+"""Request coalescing for identical in-flight work.
+
+The first caller for a key starts the work as its own task; every caller that
+arrives with the same key while it runs awaits that task instead of starting
+another. The task is shielded, so a caller that disconnects does not cancel the
+work for everyone else.
+"""
+import asyncio
+from typing import Awaitable, Callable, Dict, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, group: str, outcome: str) -> None:
+        counters = self.stats.setdefault(group, {"executed": 0, "coalesced": 0})
+        counters[outcome] += 1
+
+    async def do(self, group: str, key: str, work: Callable[[], Awaitable[T]]) -> T:
+        task = self._inflight.get(key)
+        if task is None:
+            self._count(group, "executed")
+            task = asyncio.ensure_future(work())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self._count(group, "coalesced")
+        return await asyncio.shield(task)
+
+    def snapshot(self) -> dict:
+        return {
+            "in_flight": len(self._inflight),
+            "endpoints": {name: dict(counters) for name, counters in self.stats.items()},
+        }
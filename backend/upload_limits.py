@@ -0,0 +1,46 @@
+"""ASGI middleware that caps request body size for upload routes.
+
+The check runs before FastAPI parses the multipart form, so an oversized
+request is rejected from its ``Content-Length`` without reading the body, and
+a chunked request is cut off as soon as it crosses the limit.
+"""
+from typing import Iterable
+
+from fastapi import HTTPException
+from starlette.responses import JSONResponse
+
+
+class RequestSizeLimitMiddleware:
+    def __init__(self, app, max_bytes: int, path_prefixes: Iterable[str]):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.path_prefixes = tuple(path_prefixes)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        content_length = headers.get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > self.max_bytes:
+            response = JSONResponse(
+                {"detail": f"Request body exceeds {self.max_bytes} bytes"},
+                status_code=413
+            )
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # FastAPI re-raises HTTPException from body parsing unchanged
+                    raise HTTPException(status_code=413, detail=f"Request body exceeds {self.max_bytes} bytes")
+            return message
+
+        await self.app(scope, limited_receive, send)
@@ -0,0 +1,140 @@
+"""Write-behind buffer for inserts the response does not need to wait for.
+
+``add`` queues documents and returns immediately. A background task flushes
+them with unordered ``insert_many`` batches, either once ``max_batch``
+documents are waiting or after ``flush_interval`` seconds. Transient failures
+are retried with backoff. Per-document write errors (e.g. duplicate keys) are
+permanent and only counted. Failures are logged and surfaced through
+``snapshot()``, never raised into a request.
+
+``stop()`` drains everything still queued before returning. The counters
+account for every accepted document (``accepted == inserted + failed +
+dropped + pending``), so the snapshot taken at shutdown shows whether anything
+was lost.
+"""
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, List, Optional
+
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindBuffer:
+    def __init__(
+        self,
+        collection,
+        name: str,
+        max_batch: int = 100,
+        flush_interval: float = 0.5,
+        max_retries: int = 3,
+        retry_backoff: float = 0.5,
+        on_inserted: Optional[Callable[[int], Awaitable[None]]] = None,
+    ):
+        self.collection = collection
+        self.name = name
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.on_inserted = on_inserted
+        self._pending: List[dict] = []
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self.stats = {"accepted": 0, "inserted": 0, "failed": 0, "dropped": 0, "batches": 0}
+        self.last_error: Optional[str] = None
+        self.last_flush_at: Optional[str] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def start(self) -> None:
+        self._closing = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> dict:
+        """Flush everything queued, stop the flusher and return the final snapshot."""
+        if self._task is not None:
+            self._closing = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        snapshot = self.snapshot()
+        log = logger.error if snapshot["pending"] or snapshot["dropped"] else logger.info
+        log(f"Write-behind {self.name} stopped: {snapshot}")
+        return snapshot
+
+    async def add(self, docs: List[dict]) -> None:
+        if not docs:
+            return
+        self.stats["accepted"] += len(docs)
+        if self._task is None:
+            # Not started (scripts, tests) or already stopped: write through
+            await self._insert(list(docs))
+            return
+        self._pending.extend(docs)
+        if len(self._pending) >= self.max_batch:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+            if self._closing and not self._pending:
+                return
+
+    async def flush(self) -> None:
+        while self._pending:
+            batch = self._pending[:self.max_batch]
+            del self._pending[:self.max_batch]
+            await self._insert(batch)
+
+    async def _insert(self, batch: List[dict]) -> None:
+        attempt = 0
+        while True:
+            try:
+                result = await self.collection.insert_many(batch, ordered=False)
+                inserted = len(result.inserted_ids)
+                break
+            except BulkWriteError as e:
+                inserted = e.details.get("nInserted", 0)
+                self.stats["failed"] += len(batch) - inserted
+                self._record_error(f"{len(batch) - inserted} of {len(batch)} documents rejected: {e.details.get('writeErrors', [{}])[0].get('errmsg', str(e))}")
+                break
+            except Exception as e:
+                if attempt >= self.max_retries:
+                    self.stats["dropped"] += len(batch)
+                    self._record_error(f"Dropped {len(batch)} documents after {attempt + 1} attempts: {str(e)}")
+                    return
+                attempt += 1
+                await asyncio.sleep(self.retry_backoff * 2 ** (attempt - 1))
+
+        self.stats["inserted"] += inserted
+        self.stats["batches"] += 1
+        self.last_flush_at = datetime.now(timezone.utc).isoformat()
+        if inserted and self.on_inserted is not None:
+            try:
+                await self.on_inserted(inserted)
+            except Exception as e:
+                logger.warning(f"Write-behind {self.name} post-insert hook failed: {str(e)}")
+
+    def _record_error(self, message: str) -> None:
+        self.last_error = message
+        logger.error(f"Write-behind {self.name}: {message}")
+
+    def snapshot(self) -> dict:
+        return {
+            **self.stats,
+            "pending": len(self._pending),
+            "running": self.running,
+            "last_error": self.last_error,
+            "last_flush_at": self.last_flush_at,
+        }
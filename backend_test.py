@@ -83,10 +83,21 @@ class InstagramContentAPITester:
         if success and 'hashtags' in data:
             print(f"   Found {len(data['hashtags'])} hashtags for wedding")
         
+        success, data = self.run_test("Recommend Wedding Hashtags", "GET", "hashtags/wedding/recommend?seed=goldenhour&account_size=growing_account", 200)
+        if success:
+            print(f"   Recommended {len(data['hashtags'])} hashtags in {data['took_ms']} ms, placeholders: {data['placeholders']}")
+        
         # Analytics endpoint
         success, data = self.run_test("Get Analytics", "GET", "analytics", 200)
         if success:
             print(f"   Analytics data keys: {list(data.keys()) if isinstance(data, dict) else 'Invalid format'}")
+        
+        # Search with facets
+        success, data = self.run_test("Search Content", "GET", "search?q=wedding&niche=wedding", 200)
+        if success:
+            print(f"   Found {data.get('total')} matches in {data.get('took_ms')} ms, facets: {list(data.get('facets', {}))}")
+        self.run_test("Search Ideas by Hashtag", "GET", "search?source=ideas&hashtags=wedding", 200)
+        self.run_test("Search Rejects Unknown Source", "GET", "search?source=nope", 400)
 
     def test_content_crud(self):
         """Test content CRUD operations"""
@@ -95,6 +106,11 @@ class InstagramContentAPITester:
         # Get all content
         success, data = self.run_test("Get All Content", "GET", "content", 200)
         
+        # Paginated, projected listing
+        success, data = self.run_test("Get Content Page", "GET", "content?limit=2&fields=title,status", 200)
+        if success and data.get('next_cursor'):
+            self.run_test("Get Next Content Page", "GET", f"content?limit=2&fields=title,status&cursor={data['next_cursor']}", 200)
+        
         # Create content
         content_data = {
             "title": "Test Wedding Post",
@@ -126,6 +142,15 @@ class InstagramContentAPITester:
             
             # Delete content
             self.run_test("Delete Content", "DELETE", f"content/{content_id}", 200)
+        
+        # Bulk create, update and delete
+        bulk_items = [dict(content_data, title=f"Bulk Post {i}") for i in range(3)]
+        success, data = self.run_test("Bulk Create Content", "POST", "content/bulk", 200, {"items": bulk_items})
+        bulk_ids = [r["id"] for r in data.get("results", []) if r.get("status") == "created"] if success else []
+        if bulk_ids:
+            self.run_test("Bulk Update Content", "POST", "content/bulk/update", 200,
+                          {"items": [{"id": i, "status": "published"} for i in bulk_ids]})
+            self.run_test("Bulk Delete Content", "POST", "content/bulk/delete", 200, {"ids": bulk_ids})
 
     def test_ai_features(self):
         """Test AI-powered features"""
@@ -166,6 +191,8 @@ class InstagramContentAPITester:
         success, data = self.run_test("Generate Image", "POST", "content/generate-image", 200, image_request, timeout=90)
         if success:
             print(f"   Image generated with provider: {data.get('provider', 'unknown')}")
+            if data.get('media_id'):
+                self.run_test("Get Generated Media", "GET", f"media/{data['media_id']}", 200)
 
     def test_calendar_features(self):
         """Test calendar and scheduling features"""
@@ -176,6 +203,9 @@ class InstagramContentAPITester:
         
         # Get calendar for specific month
         self.run_test("Get Calendar for December 2024", "GET", "calendar?month=12&year=2024", 200)
+        
+        # Get calendar for a date range spanning months
+        self.run_test("Get Calendar Date Range", "GET", "calendar?from=2024-11-15&to=2025-01-15", 200)
 
     def print_summary(self):
         """Print test summary"""
@@ -26,7 +26,8 @@ import {
 } from "@/components/ui/select";
 import { Switch } from "@/components/ui/switch";
 
-const API = `${process.env.REACT_APP_BACKEND_URL}/api`;
+const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
+const API = `${BACKEND_URL}/api`;
 
 const NICHES = [
   { value: "wedding", label: "Wedding" },
@@ -57,6 +58,7 @@ export default function ContentCreator() {
   const [imagePrompt, setImagePrompt] = useState("");
   const [imageProvider, setImageProvider] = useState("gemini");
   const [generatedImage, setGeneratedImage] = useState(null);
+  const [generatedMedia, setGeneratedMedia] = useState(null);
   const [uploadedImage, setUploadedImage] = useState(null);
   
   const [captionLoading, setCaptionLoading] = useState(false);
@@ -102,6 +104,7 @@ export default function ContentCreator() {
     
     setImageLoading(true);
     setGeneratedImage(null);
+    setGeneratedMedia(null);
     try {
       const response = await axios.post(`${API}/content/generate-image`, {
         prompt: imagePrompt,
@@ -110,7 +113,9 @@ export default function ContentCreator() {
         style: "professional photography, high quality",
       });
       
-      setGeneratedImage(`data:image/png;base64,${response.data.image_base64}`);
+      // The image is already stored server-side; preview it by URL and save it by reference
+      setGeneratedMedia(response.data);
+      setGeneratedImage(`${BACKEND_URL}${response.data.thumbnails?.thumb_640 || response.data.media_url}`);
       toast.success(`Image generated with ${imageProvider === "gemini" ? "Gemini Nano Banana" : "OpenAI GPT Image 1"}!`);
     } catch (error) {
       console.error("Error generating image:", error);
@@ -127,6 +132,7 @@ export default function ContentCreator() {
       reader.onload = (e) => {
         setUploadedImage(e.target?.result);
         setGeneratedImage(null);
+        setGeneratedMedia(null);
       };
       reader.readAsDataURL(file);
       toast.success("Image uploaded successfully!");
@@ -154,8 +160,9 @@ export default function ContentCreator() {
         caption,
         hashtags,
         niche,
-        media_url: generatedImage || uploadedImage || null,
-        media_type: generatedImage ? "ai_generated" : uploadedImage ? "uploaded" : null,
+        media_id: generatedMedia?.media_id || null,
+        media_url: generatedMedia ? generatedMedia.media_url : uploadedImage || null,
+        media_type: generatedMedia ? "ai_generated" : uploadedImage ? "uploaded" : null,
         status: "draft",
       });
       
@@ -166,6 +173,7 @@ export default function ContentCreator() {
       setHashtags([]);
       setEngagementTips([]);
       setGeneratedImage(null);
+      setGeneratedMedia(null);
       setUploadedImage(null);
       setTopic("");
       setImagePrompt("");
@@ -179,6 +187,7 @@ export default function ContentCreator() {
 
   const clearImage = () => {
     setGeneratedImage(null);
+    setGeneratedMedia(null);
     setUploadedImage(null);
   };
 
@@ -0,0 +1,20 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# Backend modules are imported flat (``uvicorn server:app`` runs from backend/)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+
+@pytest.fixture(scope="session")
+def server():
+    """The API module; the Motor client does not connect until it is used."""
+    for module in ("fastapi", "motor", "dotenv", "multipart", "requests", "numpy"):
+        pytest.importorskip(module)
+    os.environ.setdefault("MONGO_URL", "mongodb://localhost:1")
+    os.environ.setdefault("DB_NAME", "test")
+    import server
+
+    return server
@@ -0,0 +1,134 @@
+import asyncio
+import json
+
+import pytest
+
+SAVED = "Golden hour on the cliffs, two people laughing into the wind, and a dress that would not sit still. Book your session today."
+FRESH = ["Quiet morning light in a tiny kitchen, flour on small hands and a grandmother's recipe card.",
+         "Neon reflections, wet pavement and a couple dancing under the bridge at midnight in the rain.",
+         "Newborn toes, a knitted blanket and the softest window light we have photographed all year."]
+RESULT_KEYS = {"id", "type", "packed", "status", "result", "error"}
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class Gateway:
+    """Returns queued responses per endpoint and records every prompt."""
+
+    configured = True
+
+    def __init__(self, **responses):
+        self.responses = {prefix: list(queue) for prefix, queue in responses.items()}
+        self.prompts = []
+
+    async def complete(self, session_prefix, system_message, prompt, profile="text", cache_control=None):
+        self.prompts.append(session_prefix)
+        return self.responses[session_prefix].pop(0)
+
+
+class IdeaWriter:
+    def __init__(self):
+        self.added = []
+
+    async def add(self, docs):
+        self.added.extend(docs)
+
+
+def caption_json(text, index=None):
+    part = {"caption": text, "hashtags": ["#photo"], "engagement_tips": ["Reply to comments"]}
+    return part if index is None else {"index": index, **part}
+
+
+@pytest.fixture
+def api(server, monkeypatch):
+    index = server.NearDuplicateIndex()
+    index.add("content", "saved", SAVED)
+    monkeypatch.setattr(server, "near_duplicates", index)
+    monkeypatch.setattr(server, "hashtag_engine", server.HashtagEngine())
+    monkeypatch.setattr(server, "idea_writer", IdeaWriter())
+    monkeypatch.setattr(server, "NEAR_DUP_RETRIES", 1)
+
+    def use_gateway(gateway):
+        monkeypatch.setattr(server, "llm_gateway", gateway)
+        return gateway
+
+    return server, use_gateway
+
+
+def batch(server, jobs, pack=True):
+    return run(server.batch_generate(server.BatchGenerateRequest(jobs=jobs, pack=pack)))
+
+
+def test_compatible_jobs_share_one_prompt(api):
+    server, use_gateway = api
+    packed = json.dumps([caption_json(FRESH[1], 1), caption_json(FRESH[0], 0)])
+    gateway = use_gateway(Gateway(batch_caption=[packed]))
+    jobs = [{"id": f"c{i}", "type": "caption", "params": {"niche": "wedding"}} for i in range(2)]
+    response = batch(server, jobs)
+
+    assert gateway.prompts == ["batch_caption"]
+    assert response["prompts"] == 1 and (response["succeeded"], response["failed"]) == (2, 0)
+    assert [r["result"]["caption"] for r in response["results"]] == [FRESH[0], FRESH[1]]
+    assert all(r["packed"] and r["result"]["near_duplicate"] is None for r in response["results"])
+
+
+def test_missing_and_near_duplicate_parts_are_rerun_on_their_own(api):
+    server, use_gateway = api
+    # Part 1 repeats saved text and part 2 never arrives
+    packed = json.dumps([caption_json(FRESH[0], 0), caption_json(SAVED, 1)])
+    gateway = use_gateway(Gateway(
+        batch_caption=[packed],
+        # The rerun of part 1 repeats the saved text once more, then regenerates
+        caption=[json.dumps(caption_json(SAVED)), json.dumps(caption_json(FRESH[1])), json.dumps(caption_json(FRESH[2]))],
+    ))
+    jobs = [{"type": "caption", "params": {"niche": "wedding"}} for _ in range(3)]
+    response = batch(server, jobs)
+
+    assert gateway.prompts.count("batch_caption") == 1 and gateway.prompts.count("caption") == 3
+    assert response["prompts"] == 3
+    results = response["results"]
+    assert [r["packed"] for r in results] == [True, False, False]
+    assert [r["result"]["caption"] for r in results] == FRESH
+    assert all(r["status"] == "ok" and r["result"]["near_duplicate"] is None for r in results)
+
+
+def test_every_result_has_the_same_keys(api):
+    server, use_gateway = api
+    use_gateway(Gateway(caption=[json.dumps(caption_json(FRESH[0]))]))
+    jobs = [
+        {"id": "ok", "type": "caption", "params": {"niche": "wedding"}},
+        {"id": "unknown", "type": "poem"},
+        {"id": "invalid", "type": "caption", "params": {}},
+    ]
+    response = batch(server, jobs)
+
+    assert all(set(r) == RESULT_KEYS for r in response["results"])
+    ok, unknown, invalid = response["results"]
+    assert (ok["status"], ok["packed"], ok["error"]) == ("ok", False, None)
+    assert unknown == {"id": "unknown", "type": "poem", "packed": False, "status": "error",
+                       "result": None, "error": "Unknown job type: poem"}
+    assert invalid["status"] == "error" and invalid["result"] is None and "niche" in invalid["error"]
+    assert (response["succeeded"], response["failed"], response["prompts"]) == (1, 2, 1)
+
+
+def test_packed_ideas_drop_near_duplicates_and_rerun_empty_parts(api):
+    server, use_gateway = api
+    idea = {"title": "Kitchen stories", "description": FRESH[0]}
+    packed = json.dumps([
+        {"index": 0, "ideas": [idea, {"title": "Cliffs", "description": SAVED}]},
+        # Only a repeat of part 0's idea: nothing is left, so the part is rerun
+        {"index": 1, "ideas": [dict(idea, title="Again")]},
+    ])
+    rerun = json.dumps([{"title": "Midnight dance", "description": FRESH[1]}])
+    gateway = use_gateway(Gateway(batch_ideas=[packed], ideas=[rerun]))
+    jobs = [{"type": "ideas", "params": {"niche": "family", "count": 2}}, {"type": "ideas", "params": {"niche": "family", "count": 1}}]
+    response = batch(server, jobs)
+
+    assert gateway.prompts == ["batch_ideas", "ideas"]
+    first, second = response["results"]
+    assert first["packed"] and [i["title"] for i in first["result"]["ideas"]] == ["Kitchen stories"]
+    assert first["result"]["filtered_duplicates"] == 1
+    assert not second["packed"] and [i["title"] for i in second["result"]["ideas"]] == ["Midnight dance"]
+    assert [doc["title"] for doc in server.idea_writer.added] == ["Kitchen stories", "Midnight dance"]
@@ -0,0 +1,188 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("pymongo")
+
+from pymongo import DeleteOne, UpdateOne  # noqa: E402
+from pymongo.errors import BulkWriteError  # noqa: E402
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class Cursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def to_list(self, length):
+        return self.docs
+
+
+class BulkResult:
+    def __init__(self, counts):
+        self.bulk_api_result = counts
+
+
+class ContentCollection:
+    """Answers ``find({"id": {"$in": ...}})`` and applies unordered bulk writes.
+
+    Ids in ``rejected`` fail with a duplicate-key write error; ids in
+    ``vanished`` are gone by the time the write runs (a concurrent delete).
+    """
+
+    def __init__(self, docs, rejected=(), vanished=()):
+        self.docs = {doc["id"]: dict(doc) for doc in docs}
+        self.rejected = set(rejected)
+        self.vanished = set(vanished)
+        self.finds = []
+        self.writes = []
+
+    def find(self, query, projection):
+        self.finds.append(query)
+        ids = query["id"]["$in"]
+        return Cursor([{key: self.docs[i][key] for key in projection if key in self.docs[i]} for i in ids if i in self.docs])
+
+    async def bulk_write(self, ops, ordered=True):
+        assert ordered is False
+        self.writes.append(ops)
+        counts, errors = {"nMatched": 0, "nRemoved": 0}, []
+        for index, op in enumerate(ops):
+            content_id = op._filter["id"]
+            if content_id in self.rejected:
+                errors.append({"index": index, "code": 11000, "errmsg": "E11000 duplicate key"})
+            elif content_id in self.vanished:
+                self.docs.pop(content_id, None)
+            elif isinstance(op, UpdateOne):
+                self.docs[content_id].update(op._doc["$set"])
+                counts["nMatched"] += 1
+            elif isinstance(op, DeleteOne):
+                del self.docs[content_id]
+                counts["nRemoved"] += 1
+        if errors:
+            raise BulkWriteError({**counts, "writeErrors": errors})
+        return BulkResult(counts)
+
+
+class RollupCollection:
+    def __init__(self):
+        self.incs = []
+
+    async def update_one(self, query, update):
+        self.incs.append(update["$inc"])
+
+
+class Db:
+    def __init__(self, content):
+        self.content = content
+        self.analytics_rollups = RollupCollection()
+
+
+class JsonRequest:
+    headers = {"content-type": "application/json"}
+
+    def __init__(self, body):
+        self.body = body
+
+    async def json(self):
+        return self.body
+
+
+DOCS = [
+    {"id": "a", "title": "A", "status": "draft", "niche": "wedding", "hashtags": ["#love"]},
+    {"id": "b", "title": "B", "status": "draft", "niche": "portrait", "hashtags": []},
+    {"id": "c", "title": "C", "status": "published", "niche": "portrait", "hashtags": []},
+]
+
+
+@pytest.fixture
+def api(server, monkeypatch):
+    rebuilds = []
+
+    async def rebuild_rollup(db):
+        rebuilds.append(db)
+
+    async def load_hashtag_stats():
+        pass
+
+    monkeypatch.setattr(server, "hashtag_engine", server.HashtagEngine())
+    monkeypatch.setattr(server, "near_duplicates", server.NearDuplicateIndex())
+    monkeypatch.setattr(server.rollups, "rebuild_rollup", rebuild_rollup)
+    monkeypatch.setattr(server, "_load_hashtag_stats", load_hashtag_stats)
+
+    def use_db(collection):
+        db = Db(collection)
+        monkeypatch.setattr(server, "db", db)
+        return db
+
+    return SimpleNamespace(server=server, rebuilds=rebuilds, use_db=use_db)
+
+
+def test_bulk_update_reads_once_writes_once_and_reports_per_item(api):
+    db = api.use_db(ContentCollection(DOCS))
+    items = [
+        {"id": "a", "status": "published"},
+        {"id": "missing", "title": "X"},
+        {"id": "b", "title": None},
+        {"id": "a", "niche": "family"},
+        {"id": "c"},
+    ]
+    response = run(api.server.bulk_update_content(JsonRequest({"items": items})))
+
+    assert response["results"] == [
+        {"index": 0, "id": "a", "status": "updated"},
+        {"index": 1, "id": "missing", "status": "not_found"},
+        {"index": 2, "id": "b", "status": "error", "code": 422, "error": response["results"][2]["error"]},
+        {"index": 3, "id": "a", "status": "updated"},
+        {"index": 4, "id": "c", "status": "error", "code": 422, "error": "No fields to update"},
+    ]
+    assert "title" in response["results"][2]["error"]
+    assert response["summary"] == {"updated": 2, "not_found": 1, "error": 2}
+    assert db.content.finds == [{"id": {"$in": ["a", "missing"]}}]
+    # Both patches to "a" merge into one update, in request order
+    (ops,) = db.content.writes
+    assert [op._doc for op in ops] == [{"$set": {"status": "published", "niche": "family"}}]
+    assert db.content.docs["a"]["status"] == "published" and db.content.docs["b"]["title"] == "B"
+    assert db.analytics_rollups.incs == [
+        {"status.draft": -1, "status.published": 1, "niche.wedding": -1, "niche.family": 1}
+    ]
+
+
+def test_bulk_update_write_errors_map_back_to_their_items(api):
+    db = api.use_db(ContentCollection(DOCS, rejected={"b"}))
+    items = [{"id": "b", "status": "published"}, {"id": "a", "status": "published"}, {"id": "b", "niche": "family"}]
+    response = run(api.server.bulk_update_content(JsonRequest(items)))
+
+    assert [(r["status"], r.get("code")) for r in response["results"]] == [("error", 409), ("updated", None), ("error", 409)]
+    assert response["results"][0]["error"] == "E11000 duplicate key"
+    # Only the write that happened moves the counters
+    assert db.analytics_rollups.incs == [{"status.draft": -1, "status.published": 1}]
+    assert api.rebuilds == []
+
+
+def test_bulk_delete_counts_each_document_once(api):
+    db = api.use_db(ContentCollection(DOCS))
+    response = run(api.server.bulk_delete_content(JsonRequest({"ids": ["a", "b", "a", "missing", 7]})))
+
+    assert [(r["status"], r.get("id")) for r in response["results"]] == [
+        ("deleted", "a"), ("deleted", "b"), ("not_found", "a"), ("not_found", "missing"), ("error", None)
+    ]
+    assert response["results"][4]["code"] == 422
+    assert db.content.finds == [{"id": {"$in": ["a", "b", "missing"]}}]
+    assert len(db.content.writes) == 1 and len(db.content.writes[0]) == 2
+    assert set(db.content.docs) == {"c"}
+    assert db.analytics_rollups.incs == [
+        {"total": -2, "status.draft": -2, "niche.wedding": -1, "niche.portrait": -1}
+    ]
+
+
+def test_bulk_delete_rebuilds_counts_when_a_document_vanished_before_the_write(api):
+    db = api.use_db(ContentCollection(DOCS, vanished={"b"}))
+    response = run(api.server.bulk_delete_content(JsonRequest({"ids": ["a", "b"]})))
+
+    assert response["summary"] == {"deleted": 2}
+    # One of two deletes matched nothing, and which one is unknown: no deltas, a rebuild instead
+    assert db.analytics_rollups.incs == []
+    assert len(api.rebuilds) == 1
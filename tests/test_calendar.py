@@ -0,0 +1,118 @@
+import asyncio
+import json
+
+import pytest
+
+
+def in_range(value, bounds):
+    return ("$gte" not in bounds or value >= bounds["$gte"]) and ("$lte" not in bounds or value <= bounds["$lte"])
+
+
+def run_pipeline(pipeline, collections, source):
+    """Just enough of the aggregation stages GET /calendar uses, over lists of dicts."""
+    docs = [dict(doc) for doc in collections[source]]
+    for stage in pipeline:
+        (name, spec), = stage.items()
+        if name == "$match":
+            docs = [doc for doc in docs if all(in_range(doc.get(field), bounds) for field, bounds in spec.items())]
+        elif name == "$sort":
+            docs.sort(key=lambda doc: tuple(doc.get(field) for field in spec))
+        elif name == "$limit":
+            docs = docs[:spec]
+        elif name == "$lookup":
+            foreign = collections[spec["from"]]
+            for doc in docs:
+                doc[spec["as"]] = [dict(other) for other in foreign if other.get(spec["foreignField"]) == doc.get(spec["localField"])]
+        elif name == "$unwind":
+            field = spec.lstrip("$")
+            docs = [{**doc, field: item} for doc in docs for item in doc[field]]
+        elif name == "$project":
+            for doc in docs:
+                for path in spec:
+                    parent, _, key = path.rpartition(".")
+                    (doc.get(parent) if parent else doc).pop(key, None)
+    return docs
+
+
+class Cursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def to_list(self, length):
+        return self.docs[:length]
+
+
+class Db:
+    def __init__(self, posts, content):
+        self.collections = {"scheduled_posts": posts, "content": content}
+        self.pipelines = []
+        db = self
+
+        class ScheduledPosts:
+            def aggregate(self, pipeline):
+                db.pipelines.append(pipeline)
+                return Cursor(run_pipeline(pipeline, db.collections, "scheduled_posts"))
+
+        self.scheduled_posts = ScheduledPosts()
+
+
+def post(post_id, content_id, date, time="09:00"):
+    return {"_id": f"oid-{post_id}", "id": post_id, "content_id": content_id, "scheduled_date": date, "scheduled_time": time}
+
+
+def test_month_becomes_an_inclusive_string_range(server):
+    date_range = server._calendar_date_range
+    assert date_range("2", "2026", None, None) == {"$gte": "2026-02-01", "$lte": "2026-02-31"}
+    assert date_range("12", "2026", None, None) == {"$gte": "2026-12-01", "$lte": "2026-12-31"}
+    # Every day of the month sorts inside the range, and nothing of the next month does
+    bounds = date_range("02", "2028", None, None)
+    assert in_range("2028-02-29", bounds) and in_range("2028-02-01", bounds)
+    assert not in_range("2028-03-01", bounds) and not in_range("2028-01-31", bounds)
+
+
+def test_explicit_dates_take_precedence_over_the_month(server):
+    date_range = server._calendar_date_range
+    assert date_range("2", "2026", "2026-02-10", None) == {"$gte": "2026-02-10"}
+    assert date_range(None, None, None, "2026-03-01") == {"$lte": "2026-03-01"}
+    assert date_range("2", None, None, None) is None
+    assert date_range(None, None, None, None) is None
+
+
+def test_pipeline_limits_then_joins(server):
+    pipeline = server._calendar_pipeline({"$gte": "2026-02-01"})
+    assert [next(iter(stage)) for stage in pipeline] == ["$match", "$sort", "$limit", "$lookup", "$unwind", "$project"]
+    assert pipeline[0] == {"$match": {"scheduled_date": {"$gte": "2026-02-01"}}}
+    assert server._calendar_pipeline(None)[0] == {"$match": {}}
+
+
+def test_calendar_joins_content_in_date_order(server, monkeypatch):
+    content = [{"_id": "oid-a", "id": "a", "title": "A"}, {"_id": "oid-b", "id": "b", "title": "B"}]
+    posts = [
+        post("p1", "b", "2026-02-14", "18:00"),
+        post("p2", "a", "2026-02-14", "08:00"),
+        post("p3", "gone", "2026-02-03"),
+        post("p4", "a", "2026-03-01"),
+    ]
+    db = Db(posts, content)
+    monkeypatch.setattr(server, "db", db)
+    response = asyncio.run(server.get_calendar(month="2", year="2026", date_from=None, date_to=None))
+
+    items = json.loads(response.body)["calendar"]
+    # p3's content no longer exists, so the inner join drops it; p4 is next month
+    assert [item["id"] for item in items] == ["p2", "p1"]
+    assert items[0]["content"] == {"id": "a", "title": "A"}
+    assert "_id" not in items[0]
+    assert len(db.pipelines) == 1
+
+
+@pytest.mark.parametrize("missing", [0, 3])
+def test_at_most_the_first_hundred_posts_are_joined(server, monkeypatch, missing):
+    content = [{"id": "c", "title": "C"}]
+    # The first `missing` posts point at deleted content
+    posts = [post(f"p{i:03}", "gone" if i < missing else "c", f"2026-02-{1 + i // 10:02}", f"{i % 10:02}:00") for i in range(120)]
+    monkeypatch.setattr(server, "db", Db(posts, content))
+    response = asyncio.run(server.get_calendar(month=None, year=None, date_from=None, date_to=None))
+
+    items = json.loads(response.body)["calendar"]
+    assert len(items) == server.CALENDAR_LIMIT - missing
+    assert items[-1]["id"] == "p099"
@@ -0,0 +1,65 @@
+import json
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from catalog import Catalog, CatalogError, CatalogStore  # noqa: E402
+
+DATA_FILE = Path(__file__).resolve().parents[1] / "backend" / "catalog_data.json"
+
+
+@pytest.fixture
+def data():
+    return json.loads(DATA_FILE.read_text(encoding="utf-8"))
+
+
+def test_tip_items_spread_across_categories_with_fresh_ids(data):
+    catalog = Catalog(data)
+    items = catalog.tip_items(["lighting", "composition"], 4)
+    assert [item["category"] for item in items] == ["lighting", "lighting", "lighting", "composition"]
+    assert items[0]["tip"] == data["tips"]["lighting"][0]
+    assert items[0]["hashtags"][2] == "#lightingtips"
+    assert len({item["id"] for item in items}) == 4
+    assert catalog.tip_items(["lighting"], 1)[0]["id"] != items[0]["id"]
+
+
+def test_unknown_lookups_fall_back_like_the_routes(data):
+    catalog = Catalog(data)
+    assert catalog.hook_records("nope") == catalog.hooks_by_type["curiosity"]
+    assert catalog.reel_records(None)[0].item() == data["reel_ideas"]["trending"][0]
+    assert catalog.client_magnet_templates("value") == tuple(data["client_magnets"]["portfolio_templates"])
+    assert catalog.client_magnet_templates("testimonial")[0] == data["client_magnets"]["testimonial_templates"][0]
+
+
+def test_prebuilt_lookups_by_month_and_content_type(data):
+    catalog = Catalog(data)
+    month = next(iter(data["seasonal"]))
+    assert [r.idea for r in catalog.seasonal_by_month[month]] == data["seasonal"][month]
+    assert set(catalog.records_by_content_type) == {"carousel", "post", "reel"}
+    assert len(catalog.responses) > len(data["niche_hashtags"]) + len(data["cta_templates"])
+
+
+def test_missing_sections_are_rejected(data):
+    del data["tips"]
+    with pytest.raises(CatalogError, match="tips"):
+        Catalog(data)
+
+
+def test_reload_swaps_and_keeps_old_catalog_on_bad_data(tmp_path, data):
+    path = tmp_path / "catalog.json"
+    path.write_text(json.dumps(data), encoding="utf-8")
+    store = CatalogStore(path)
+    first = store.current
+
+    data["niches"].append("newborn")
+    path.write_text(json.dumps(data), encoding="utf-8")
+    second = store.reload()
+    assert second is store.current is not first
+    assert "newborn" in second.niches and "newborn" not in first.niches
+
+    path.write_text("{not json", encoding="utf-8")
+    with pytest.raises(CatalogError):
+        store.reload()
+    assert store.current is second
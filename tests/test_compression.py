@@ -0,0 +1,89 @@
+import asyncio
+import gzip
+import json
+
+import pytest
+
+from compression import CompressionMiddleware, CompressionStats, available_codecs, negotiate
+
+BIG_JSON = json.dumps({"content": [{"title": f"Post {i}", "caption": "Golden hour " * 10} for i in range(200)]}).encode()
+
+
+def make_app(body_chunks, content_type=b"application/json", status=200, extra_headers=()):
+    async def app(scope, receive, send):
+        headers = [(b"content-type", content_type), *extra_headers]
+        if len(body_chunks) == 1:
+            headers.append((b"content-length", str(len(body_chunks[0])).encode()))
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        for i, chunk in enumerate(body_chunks):
+            await send({"type": "http.response.body", "body": chunk, "more_body": i < len(body_chunks) - 1})
+    return app
+
+
+def run(app, accept_encoding="gzip", **options):
+    stats = CompressionStats()
+    middleware = CompressionMiddleware(app, stats=stats, codecs=[c for c in available_codecs() if c.name == "gzip"], **options)
+    scope = {"type": "http", "path": "/api/content", "headers": [(b"accept-encoding", accept_encoding.encode())]}
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    asyncio.run(middleware(scope, receive, send))
+    headers = dict(messages[0]["headers"])
+    body = b"".join(m.get("body", b"") for m in messages[1:])
+    return messages[0]["status"], headers, body, stats
+
+
+def test_large_json_is_gzipped_and_counted():
+    status, headers, body, stats = run(make_app([BIG_JSON]))
+    assert headers[b"content-encoding"] == b"gzip"
+    assert headers[b"vary"] == b"Accept-Encoding"
+    assert int(headers[b"content-length"]) == len(body)
+    assert gzip.decompress(body) == BIG_JSON
+    route = stats.snapshot()["routes"]["/api/content"]
+    assert route["bytes_in"] == len(BIG_JSON) and route["bytes_out"] == len(body)
+
+
+def test_streamed_body_is_compressed_incrementally():
+    chunks = [BIG_JSON[:5000], BIG_JSON[5000:9000], BIG_JSON[9000:]]
+    _, headers, body, _ = run(make_app(chunks))
+    assert b"content-length" not in headers
+    assert gzip.decompress(body) == BIG_JSON
+
+
+def test_large_body_offloaded_to_thread_still_correct():
+    _, headers, body, _ = run(make_app([BIG_JSON]), offload_size=1)
+    assert gzip.decompress(body) == BIG_JSON
+
+
+@pytest.mark.parametrize("app, reason", [
+    (make_app([b'{"ok": true}']), "below_minimum"),
+    (make_app([b"\x89PNG" * 1000], content_type=b"image/png"), "content_type"),
+    (make_app([b"data: x\n\n" * 500], content_type=b"text/event-stream"), "event_stream"),
+    (make_app([BIG_JSON], extra_headers=[(b"content-encoding", b"gzip")]), "already_encoded"),
+])
+def test_skipped_responses_pass_through(app, reason):
+    _, headers, body, stats = run(app)
+    assert b"content-encoding" not in headers or reason == "already_encoded"
+    assert stats.skipped == {reason: 1}
+
+
+def test_no_acceptable_encoding_leaves_response_alone():
+    _, headers, body, stats = run(make_app([BIG_JSON]), accept_encoding="identity")
+    assert body == BIG_JSON and b"content-encoding" not in headers
+
+
+def test_negotiate_respects_q_values_and_server_preference():
+    codecs = available_codecs()
+    assert negotiate("gzip;q=0, br;q=0", [c for c in codecs if c.name == "gzip"]) is None
+    assert negotiate("*", codecs).name == codecs[0].name
+    assert negotiate("gzip, deflate", codecs).name == "gzip"
+
+
+def test_strong_etag_weakened_when_encoded():
+    _, headers, _, _ = run(make_app([BIG_JSON], extra_headers=[(b"etag", b'"abc"')]))
+    assert headers[b"etag"] == b'W/"abc"'
@@ -0,0 +1,71 @@
+from hashtag_engine import HashtagEngine, HashtagStats, normalize_tags
+
+
+def engine_with(posts):
+    engine = HashtagEngine()
+    for tags, niche in posts:
+        engine.record(tags, niche)
+    return engine
+
+
+POSTS = [
+    (["#wedding", "#goldenhour", "#bridetobe"], "wedding"),
+    (["#wedding", "#goldenhour", "#elopement"], "wedding"),
+    (["#wedding", "#bridetobe"], "wedding"),
+    (["#wedding", "#newborn"], "portrait"),
+    (["#newborn", "#babyphotography"], "portrait"),
+]
+
+
+def test_normalize_tags():
+    assert normalize_tags(["GoldenHour", "#goldenhour", " #Love ", "", None, "#"]) == ["#goldenhour", "#love"]
+
+
+def test_seed_cooccurrence_ranks_first_and_seed_is_excluded():
+    engine = engine_with(POSTS)
+    result = engine.recommend("wedding", ["goldenhour"], {"small": 2, "medium": 2}, [])
+    tags = [(entry["tag"], entry["slot"], entry["tier"]) for entry in result["hashtags"]]
+    # #wedding is this corpus' "mega" tag, so it only tops up a thin tier
+    assert tags == [("#elopement", "small", "small"), ("#bridetobe", "medium", "medium"), ("#wedding", "small", "mega")]
+    assert result["placeholders"] == {"medium": 1}
+    assert result["unmatched_seed"] == []
+
+
+def test_unfillable_slots_become_placeholders():
+    engine = engine_with(POSTS)
+    result = engine.recommend("wedding", [], {"medium": 2, "location": 5, "branded": 2}, [])
+    assert result["placeholders"] == {"location": 5, "branded": 2}
+    assert len(result["hashtags"]) == 2
+
+
+def test_thin_tiers_are_topped_up_then_reported():
+    engine = engine_with(POSTS[:1])
+    result = engine.recommend("wedding", [], {"mega": 3}, ["#weddingday"])
+    assert [entry["slot"] for entry in result["hashtags"]] == ["mega", "mega", "mega"]
+    result = engine.recommend("wedding", [], {"mega": 10}, [])
+    assert result["placeholders"] == {"mega": 7}
+
+
+def test_changes_move_counts_and_deletes_reverse_them():
+    engine = engine_with(POSTS)
+    before = {"hashtags": ["#wedding", "#goldenhour", "#bridetobe"], "niche": "wedding"}
+    engine.record_change(before, {**before, "status": "scheduled"})
+    assert engine.stats.uses["#goldenhour"] == 2
+    engine.record_change(before, {"hashtags": ["#wedding", "#sunset"]})
+    assert engine.stats.uses["#goldenhour"] == 1
+    assert engine.stats.cooccurrence["#wedding"]["#sunset"] == 1
+    engine.record_change({"hashtags": ["#wedding", "#sunset"], "niche": "wedding"}, None)
+    assert engine.stats.uses["#sunset"] == 0
+    assert engine.stats.niche_posts["wedding"] == 2
+
+
+def test_load_replays_writes_made_meanwhile():
+    engine = HashtagEngine()
+    engine.begin_load()
+    engine.record(["#live"], "event")
+    fresh = HashtagStats()
+    fresh.apply_docs([{"hashtags": ["#Stored", "#live"], "niche": "event"}], "hashtags")
+    engine.finish_load(fresh)
+    assert engine.ready
+    assert engine.stats.uses["#live"] == 2
+    assert engine.stats.uses["#stored"] == 1
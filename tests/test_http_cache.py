@@ -0,0 +1,36 @@
+import pytest
+
+pytest.importorskip("fastapi")
+
+from http_cache import PreparedBody, accepts_gzip, etag_matches, http_date  # noqa: E402
+
+
+def test_etag_matches_uses_weak_comparison():
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('W/"abc", "def"', '"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches('"abd"', '"abc"')
+    assert not etag_matches(None, '"abc"')
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip, deflate, br", True),
+    ("br;q=1.0, gzip;q=0.5", True),
+    ("gzip;q=0", False),
+    ("*", True),
+    ("br", False),
+    (None, False),
+])
+def test_accepts_gzip(header, expected):
+    assert accepts_gzip(header) is expected
+
+
+def test_gzip_and_identity_bodies_have_distinct_etags():
+    prepared = PreparedBody(b'{"tips": "' + b"x" * 1000 + b'"}')
+    assert prepared.gzipped is not None
+    assert prepared.etag != prepared.gzip_etag
+
+
+def test_http_date_treats_naive_timestamps_as_utc():
+    assert http_date("2026-01-02T03:04:05") == "Fri, 02 Jan 2026 03:04:05 GMT"
+    assert http_date("not a date") is None
@@ -0,0 +1,34 @@
+import io
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+
+from image_variants import render_variants  # noqa: E402
+
+ORIENTATION = 0x0112
+
+
+def jpeg(width, height, orientation=None):
+    image = Image.new("RGB", (width, height), "white")
+    exif = Image.Exif()
+    if orientation:
+        exif[ORIENTATION] = orientation
+    out = io.BytesIO()
+    image.save(out, format="JPEG", exif=exif.tobytes())
+    return out.getvalue()
+
+
+def test_exif_orientation_is_applied_before_resizing():
+    # A 1200x800 sensor image tagged "rotate 90" is a portrait photo
+    rendered = render_variants(jpeg(1200, 800, orientation=6), ["thumb_320", "webp_640"])
+    assert (rendered["thumb_320"]["width"], rendered["thumb_320"]["height"]) == (320, 480)
+    assert (rendered["webp_640"]["width"], rendered["webp_640"]["height"]) == (640, 960)
+    with Image.open(io.BytesIO(rendered["thumb_320"]["data"])) as thumb:
+        assert thumb.size == (320, 480)
+        assert thumb.getexif().get(ORIENTATION) in (None, 1)
+
+
+def test_untagged_images_keep_their_shape_and_are_not_upscaled():
+    rendered = render_variants(jpeg(200, 100), ["thumb_320"])
+    assert (rendered["thumb_320"]["width"], rendered["thumb_320"]["height"]) == (200, 100)
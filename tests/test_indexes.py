@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("pymongo")
+
+from indexes import INDEXES, QUERY_SHAPES, _plan_stages, explain_query_shapes  # noqa: E402
+
+# Winning plans as MongoDB reports them
+CLASSIC_INDEXED = {
+    "stage": "PROJECTION_SIMPLE",
+    "inputStage": {"stage": "FETCH", "inputStage": {"stage": "IXSCAN", "indexName": "id_unique"}},
+}
+CLASSIC_OR = {
+    "stage": "SUBPLAN",
+    "inputStage": {"stage": "FETCH", "inputStage": {"stage": "OR", "inputStages": [
+        {"stage": "IXSCAN", "indexName": "created_id_desc"},
+        {"stage": "IXSCAN", "indexName": "created_id_desc"},
+    ]}},
+}
+CLASSIC_SCAN_AND_SORT = {
+    "stage": "SORT",
+    "sortPattern": {"created_at": -1},
+    "inputStage": {"stage": "COLLSCAN", "direction": "forward"},
+}
+# 7.0+ slot-based engine: the tree sits under queryPlan, next to the slot plan
+SBE_INDEXED = {
+    "queryPlan": {"stage": "FETCH", "planNodeId": 2, "inputStage": {"stage": "IXSCAN", "planNodeId": 1}},
+    "slotBasedPlan": {"slots": "...", "stages": "[2] nlj ..."},
+}
+
+
+def test_plan_stages_walks_classic_and_sbe_trees():
+    assert _plan_stages(CLASSIC_INDEXED) == ["PROJECTION_SIMPLE", "FETCH", "IXSCAN"]
+    assert _plan_stages(CLASSIC_OR) == ["SUBPLAN", "FETCH", "OR", "IXSCAN", "IXSCAN"]
+    assert _plan_stages(CLASSIC_SCAN_AND_SORT) == ["SORT", "COLLSCAN"]
+    assert _plan_stages(SBE_INDEXED) == ["FETCH", "IXSCAN"]
+    assert _plan_stages({}) == []
+
+
+class Cursor:
+    def __init__(self, plan, sorts):
+        self.plan = plan
+        self.sorts = sorts
+
+    def sort(self, sort):
+        self.sorts.append(sort)
+        return self
+
+    async def explain(self):
+        return {"queryPlanner": {"winningPlan": self.plan}, "executionStats": {}}
+
+
+class Collection:
+    def __init__(self, name, plans, sorts):
+        self.name = name
+        self.plans = plans
+        self.sorts = sorts
+
+    def find(self, query, projection):
+        return Cursor(self.plans.get(self.name, CLASSIC_INDEXED), self.sorts)
+
+
+class Db:
+    def __init__(self, plans):
+        self.plans = plans
+        self.sorts = []
+
+    def __getitem__(self, name):
+        return Collection(name, self.plans, self.sorts)
+
+
+def test_explain_reports_collection_scans_and_in_memory_sorts():
+    db = Db({"content_ideas": CLASSIC_SCAN_AND_SORT, "jobs": SBE_INDEXED})
+    report = asyncio.run(explain_query_shapes(db))
+
+    assert [entry["route"] for entry in report] == [shape[0] for shape in QUERY_SHAPES]
+    assert len(db.sorts) == sum(1 for shape in QUERY_SHAPES if shape[3])
+    flagged = {entry["route"] for entry in report if entry["collection_scan"]}
+    assert flagged == {route for route, collection, _, _ in QUERY_SHAPES if collection == "content_ideas"}
+    assert all(entry["in_memory_sort"] == entry["collection_scan"] for entry in report)
+    jobs = next(entry for entry in report if entry["route"] == "GET /jobs/{id}")
+    assert jobs["stages"] == ["FETCH", "IXSCAN"] and jobs["filter"] == {"id": "probe"}
+
+
+def test_every_query_shape_has_indexes_on_its_collection():
+    assert {collection for _, collection, _, _ in QUERY_SHAPES} <= set(INDEXES)
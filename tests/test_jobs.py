@@ -0,0 +1,129 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("pymongo")
+pytest.importorskip("requests")
+
+import jobs  # noqa: E402
+from jobs import JobQueue, check_callback_url, dedup_key  # noqa: E402
+
+
+class JobCollection:
+    """Just enough of a motor collection for one job document at a time."""
+
+    def __init__(self, doc):
+        self.doc = doc
+
+    def _project(self, projection):
+        return {k: v for k, v in self.doc.items() if projection.get(k, 1)}
+
+    async def find_one(self, query, projection, sort=None):
+        def matches(value, condition):
+            if isinstance(condition, dict):
+                return value is not None and value >= condition["$gte"]
+            return value == condition
+
+        if all(matches(self.doc.get(k), v) for k, v in query.items()):
+            return self._project(projection)
+        return None
+
+    async def find_one_and_update(self, query, update, projection, return_document):
+        if self.doc["id"] != query["id"]:
+            return None
+        for k, v in update.get("$set", {}).items():
+            self.doc[k] = v
+        for k in update.get("$unset", {}):
+            self.doc.pop(k, None)
+        for k, v in update.get("$addToSet", {}).items():
+            if v not in self.doc.setdefault(k, []):
+                self.doc[k].append(v)
+        return self._project(projection)
+
+
+def job_doc(**fields):
+    key = dedup_key("image", "openai", {"prompt": "x"})
+    return {"id": "job-1", "kind": "image", "provider": "openai", "params": {"prompt": "x"},
+            "status": "running", "dedup_key": key, "active_key": key, "attempts": 1,
+            "callback_urls": ["https://first.example/hook"], **fields}
+
+
+def queue(collection):
+    q = JobQueue(collection, {"openai": 1})
+
+    async def handler(params):
+        return {}
+
+    q.register("image", handler)
+    return q
+
+
+@pytest.fixture
+def posted(monkeypatch):
+    calls = []
+
+    def post(self, url, job):
+        calls.append((url, job))
+
+    monkeypatch.setattr(JobQueue, "_post_callback", post)
+    monkeypatch.setattr(jobs, "check_callback_url", lambda url: url)
+    return calls
+
+
+def test_dedup_key_ignores_param_order_but_not_values():
+    assert dedup_key("image", "openai", {"a": 1, "b": 2}) == dedup_key("image", "openai", {"b": 2, "a": 1})
+    assert dedup_key("image", "openai", {"a": 1}) != dedup_key("image", "gemini", {"a": 1})
+    assert dedup_key("image", "openai", {"a": 1}) != dedup_key("image", "openai", {"a": 2})
+
+
+@pytest.mark.parametrize("url", [
+    "ftp://8.8.8.8/hook",
+    "file:///etc/passwd",
+    "http://127.0.0.1:8001/api",
+    "http://10.1.2.3/hook",
+    "http://192.168.0.5/hook",
+    "http://169.254.169.254/latest/meta-data",
+    "http://[::1]/hook",
+    "http://[::ffff:127.0.0.1]/hook",
+    "http://[fe80::1]/hook",
+    "http://0.0.0.0/hook",
+    "https:///nohost",
+])
+def test_callback_urls_must_be_public_http(url):
+    with pytest.raises(ValueError):
+        check_callback_url(url)
+
+
+def test_public_callback_url_is_accepted():
+    assert check_callback_url("https://8.8.8.8:8443/hook") == "https://8.8.8.8:8443/hook"
+
+
+def test_duplicate_enqueue_adds_its_callback_and_hides_urls(posted):
+    collection = JobCollection(job_doc())
+    q = queue(collection)
+
+    async def scenario():
+        job, deduplicated = await q.enqueue("image", "openai", {"prompt": "x"}, callback_url="https://second.example/hook")
+        await q._finish(collection.doc, result={"media_id": "m1"})
+        return job, deduplicated
+
+    job, deduplicated = asyncio.run(scenario())
+    assert deduplicated
+    assert "callback_urls" not in job and "active_key" not in job
+    assert [url for url, _ in posted] == ["https://first.example/hook", "https://second.example/hook"]
+    assert all("callback_urls" not in body and body["status"] == "succeeded" for _, body in posted)
+
+
+def test_duplicate_of_a_finished_job_is_called_back_at_once(posted):
+    collection = JobCollection(job_doc(callback_urls=[]))
+    q = queue(collection)
+
+    async def scenario():
+        await q._finish(collection.doc, result={"media_id": "m1"})
+        job, _ = await q.enqueue("image", "openai", {"prompt": "x"}, callback_url="https://late.example/hook")
+        await asyncio.gather(*q._callbacks)
+        return job
+
+    job = asyncio.run(scenario())
+    assert job["status"] == "succeeded"
+    assert [url for url, _ in posted] == ["https://late.example/hook"]
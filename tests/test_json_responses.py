@@ -0,0 +1,59 @@
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from pydantic import BaseModel  # noqa: E402
+
+from json_responses import ORJSONResponse, StdlibJSONResponse, orjson, select_response_class  # noqa: E402
+
+
+class Item(BaseModel):
+    id: uuid.UUID
+    created_at: datetime
+
+
+PAYLOAD = {
+    "item": Item(id=uuid.UUID(int=1), created_at=datetime(2026, 1, 2, 3, 4, 5, tzinfo=timezone.utc)),
+    "caption": "Café ☀️",
+    "tags": {"#solo"},
+}
+
+
+def test_stdlib_response_encodes_native_types():
+    assert StdlibJSONResponse(PAYLOAD).body == (
+        '{"item":{"id":"00000000-0000-0000-0000-000000000001","created_at":"2026-01-02T03:04:05+00:00"},'
+        '"caption":"Café ☀️","tags":["#solo"]}'
+    ).encode()
+
+
+@pytest.mark.skipif(orjson is None, reason="orjson not installed")
+def test_orjson_response_matches_stdlib_bytes():
+    assert ORJSONResponse(PAYLOAD).body == StdlibJSONResponse(PAYLOAD).body
+
+
+def test_default_response_class_is_fastapis_own():
+    assert select_response_class("stdlib") is JSONResponse
+    assert select_response_class("") is JSONResponse
+    if orjson is not None:
+        assert select_response_class("ORJSON") is ORJSONResponse
+
+
+def test_default_output_is_unchanged():
+    # A content page as stored: ISO strings, nested lists, non-ASCII text
+    page = {"content": [{"id": "a", "caption": "Café ☀️", "hashtags": ["#solo"], "created_at": "2026-01-02T03:04:05+00:00"}],
+            "next_cursor": None}
+    response_class = select_response_class("stdlib")
+    assert response_class(page).body == JSONResponse(page).body
+    with pytest.raises(ValueError):
+        response_class({"score": float("nan")})
+
+
+def test_stdlib_response_matches_starlette_settings():
+    page = {"caption": "Café ☀️", "counts": [1, 2.5]}
+    assert StdlibJSONResponse(page).body == JSONResponse(page).body
+    with pytest.raises(ValueError):
+        StdlibJSONResponse({"score": float("inf")})
@@ -0,0 +1,86 @@
+import asyncio
+
+import llm_cache
+from llm_cache import LlmResponseCache, MemoryCacheBackend, cache_directives, cache_key
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_cache_key_ignores_incidental_whitespace_only():
+    key = cache_key("model", "You are  helpful.", "Write a\n  caption", {"temperature": 0.7})
+    assert key == cache_key("model", " You are helpful. ", "Write a caption", {"temperature": 0.7})
+    assert key != cache_key("model", "You are helpful.", "Write a caption!", {"temperature": 0.7})
+    assert key != cache_key("other-model", "You are helpful.", "Write a caption", {"temperature": 0.7})
+    assert key != cache_key("model", "You are helpful.", "Write a caption", {"temperature": 0.2})
+    assert cache_key("model", "s", "p") == cache_key("model", "s", "p", {})
+
+
+def test_cache_directives():
+    assert cache_directives("No-Cache, max-age=0") == {"no-cache", "max-age"}
+    assert cache_directives(" no-store ,") == {"no-store"}
+    assert cache_directives(None) == set()
+
+
+def test_memory_backend_expires_entries(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(llm_cache.time, "monotonic", clock)
+    backend = MemoryCacheBackend()
+    run(backend.set("k", "v", ttl=10))
+    clock.now += 9.9
+    assert run(backend.get("k")) == "v"
+    clock.now += 0.1
+    assert run(backend.get("k")) is None
+    assert len(backend) == 0
+
+
+def test_memory_backend_evicts_least_recently_used():
+    backend = MemoryCacheBackend(max_entries=2)
+    run(backend.set("a", "1", ttl=60))
+    run(backend.set("b", "2", ttl=60))
+    assert run(backend.get("a")) == "1"  # b is now the oldest
+    run(backend.set("c", "3", ttl=60))
+    assert run(backend.get("b")) is None
+    assert (run(backend.get("a")), run(backend.get("c"))) == ("1", "3")
+
+
+def test_zero_ttl_endpoints_are_never_cached():
+    cache = LlmResponseCache(ttls={"ideas": 0, "tips": 60})
+    run(cache.set("ideas", "k1", "ideas response"))
+    run(cache.set("tips", "k2", "tips response"))
+    assert run(cache.get("ideas", "k1")) is None
+    assert run(cache.get("tips", "k2")) == "tips response"
+    assert llm_cache.ENDPOINT_TTLS["ideas"] == 0
+
+
+def test_shared_hits_fill_the_local_cache_and_shared_failures_are_misses():
+    class Shared:
+        def __init__(self, value=None, fail=False):
+            self.value, self.fail = value, fail
+
+        async def get(self, key):
+            if self.fail:
+                raise ConnectionError("down")
+            return self.value
+
+        async def set(self, key, value, ttl):
+            if self.fail:
+                raise ConnectionError("down")
+
+    cache = LlmResponseCache(shared=Shared("from another worker"), ttls={"caption": 60})
+    assert run(cache.get("caption", "k")) == "from another worker"
+    assert run(cache.local.get("k")) == "from another worker"
+
+    broken = LlmResponseCache(shared=Shared(fail=True), ttls={"caption": 60})
+    run(broken.set("caption", "k", "v"))
+    assert run(broken.get("caption", "missing")) is None
+    assert broken.stats["caption"] == {"hits": 0, "misses": 1, "bypassed": 0}
@@ -0,0 +1,190 @@
+import asyncio
+import sys
+import types
+
+import pytest
+
+pytest.importorskip("requests")
+
+from llm_cache import LlmResponseCache  # noqa: E402
+from llm_gateway import LlmGateway, ModelProfile, is_retryable  # noqa: E402
+
+PROFILE = ModelProfile("gemini", "test-model", timeout=1.0, max_retries=2)
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def gateway(**kwargs):
+    kwargs.setdefault("profiles", {"text": PROFILE})
+    return LlmGateway(api_key="key", backoff_base=0, **kwargs)
+
+
+class ProviderError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+def failing(*errors, result="ok"):
+    calls = []
+
+    async def make_call():
+        calls.append(1)
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return result
+
+    return make_call, calls
+
+
+@pytest.fixture
+def fake_sdk(monkeypatch):
+    """Stands in for emergentintegrations, which the gateway imports on first use."""
+    sent = []
+
+    class UserMessage:
+        def __init__(self, text):
+            self.text = text
+
+    class LlmChat:
+        def __init__(self, api_key, session_id, system_message):
+            self.system_message = system_message
+
+        def with_model(self, provider, model):
+            return self
+
+        async def send_message(self, message):
+            sent.append((self.system_message, message.text))
+            return f"response to {message.text}"
+
+    chat_module = types.ModuleType("emergentintegrations.llm.chat")
+    chat_module.LlmChat, chat_module.UserMessage = LlmChat, UserMessage
+    for name in ("emergentintegrations", "emergentintegrations.llm"):
+        monkeypatch.setitem(sys.modules, name, types.ModuleType(name))
+    monkeypatch.setitem(sys.modules, "emergentintegrations.llm.chat", chat_module)
+    return sent
+
+
+def test_only_transient_failures_are_retryable():
+    assert is_retryable(asyncio.TimeoutError())
+    assert is_retryable(ConnectionError("reset"))
+    assert is_retryable(ProviderError(429)) and is_retryable(ProviderError(503)) and is_retryable(ProviderError(408))
+    assert not is_retryable(ProviderError(401)) and not is_retryable(ProviderError(400))
+    assert not is_retryable(ValueError("bad prompt"))
+
+
+def test_transient_failures_are_retried_up_to_max_retries():
+    llm = gateway()
+    make_call, calls = failing(ConnectionError("reset"), ProviderError(502))
+    assert run(llm._call(PROFILE, make_call)) == "ok"
+    assert len(calls) == 3
+    assert llm.stats == {"calls": 3, "retries": 2, "failures": 0, "timeouts": 0, "streams": 0}
+
+    make_call, calls = failing(*[ProviderError(500)] * 3)
+    with pytest.raises(ProviderError):
+        run(llm._call(PROFILE, make_call))
+    assert len(calls) == 3
+    assert llm.stats["failures"] == 1
+
+
+def test_permanent_failures_are_raised_without_retrying():
+    llm = gateway()
+    make_call, calls = failing(ProviderError(401))
+    with pytest.raises(ProviderError):
+        run(llm._call(PROFILE, make_call))
+    assert len(calls) == 1
+    assert (llm.stats["retries"], llm.stats["failures"]) == (0, 1)
+
+
+def test_slow_calls_time_out_and_count_as_timeouts():
+    llm = gateway()
+    profile = ModelProfile("gemini", "test-model", timeout=0.01, max_retries=1)
+
+    async def slow():
+        await asyncio.sleep(1)
+
+    with pytest.raises(asyncio.TimeoutError):
+        run(llm._call(profile, slow))
+    assert (llm.stats["calls"], llm.stats["timeouts"], llm.stats["retries"]) == (2, 2, 1)
+
+
+def test_concurrency_is_capped_by_the_semaphore():
+    async def scenario():
+        llm = gateway(max_concurrency=2)
+        active, peak = 0, 0
+
+        async def make_call():
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            return "ok"
+
+        await asyncio.gather(*(llm._call(PROFILE, make_call) for _ in range(6)))
+        return peak
+
+    assert run(scenario()) == 2
+
+
+def test_complete_caches_and_coalesces(fake_sdk):
+    async def scenario():
+        llm = gateway(cache=LlmResponseCache(ttls={"tips": 60}))
+        first = await asyncio.gather(*(llm.complete("tips", "system", "prompt") for _ in range(3)))
+        again = await llm.complete("tips", "system", "  prompt ")
+        fresh = await llm.complete("tips", "system", "prompt", cache_control="no-cache")
+        return first, again, fresh
+
+    first, again, fresh = run(scenario())
+    assert first == ["response to prompt"] * 3
+    assert again == fresh == "response to prompt"
+    # One coalesced call for the three, none for the cache hit, one for no-cache
+    assert fake_sdk == [("system", "prompt"), ("system", "prompt")]
+
+
+def test_a_slow_stream_consumer_does_not_hold_a_concurrency_slot(monkeypatch):
+    import llm_gateway
+
+    async def provider_stream(*args, session=None):
+        for delta in ("a", "b", "c"):
+            await asyncio.sleep(0)
+            yield delta
+
+    monkeypatch.setattr(llm_gateway, "stream_text", provider_stream)
+
+    async def scenario():
+        llm = gateway(max_concurrency=1, stream_api_keys={"gemini": "direct-key"})
+        stream = llm.stream("caption", "system", "prompt")
+        first = await stream.__anext__()
+        # The client has not read further, but the provider is done: the slot is free
+        other = await asyncio.wait_for(llm._call(PROFILE, failing()[0]), timeout=1)
+        rest = [delta async for delta in stream]
+        return first, other, rest
+
+    assert run(scenario()) == ("a", "ok", ["b", "c"])
+
+
+def test_stream_errors_after_the_first_delta_are_not_retried(monkeypatch):
+    import llm_gateway
+
+    attempts = []
+
+    async def provider_stream(*args, session=None):
+        attempts.append(1)
+        yield "partial"
+        raise ConnectionError("dropped")
+
+    monkeypatch.setattr(llm_gateway, "stream_text", provider_stream)
+
+    async def scenario():
+        llm = gateway(stream_api_keys={"gemini": "direct-key"})
+        received = []
+        with pytest.raises(ConnectionError):
+            async for delta in llm.stream("caption", "system", "prompt"):
+                received.append(delta)
+        return received
+
+    assert run(scenario()) == ["partial"]
+    assert len(attempts) == 1
@@ -0,0 +1,73 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from llm_parser import JsonArrayStream, LlmParseError, extract_json, parse_array, strip_trailing_commas
+
+CORPUS = json.loads((Path(__file__).parent / "fixtures" / "llm_responses.json").read_text())
+
+
+@pytest.mark.parametrize("case", CORPUS, ids=[case["name"] for case in CORPUS])
+def test_parse_array_corpus(case):
+    if case["expected_titles"] is None:
+        with pytest.raises(LlmParseError):
+            parse_array(case["text"])
+    else:
+        items = parse_array(case["text"])
+        assert [item["title"] for item in items] == case["expected_titles"]
+
+
+@pytest.mark.parametrize("case", [c for c in CORPUS if c["expected_titles"]], ids=lambda c: c["name"])
+def test_stream_matches_full_parse_at_any_chunking(case):
+    if case["name"] in ("wrapped_in_object", "single_object"):
+        pytest.skip("streaming only handles top-level arrays")
+    for chunk_size in (1, 3, 17, len(case["text"])):
+        stream = JsonArrayStream()
+        elements = []
+        for i in range(0, len(case["text"]), chunk_size):
+            elements.extend(stream.feed(case["text"][i:i + chunk_size]))
+        titles = [e["title"] for e in elements if isinstance(e, dict)]
+        assert titles == case["expected_titles"], chunk_size
+
+
+def test_stream_emits_first_element_before_array_closes():
+    stream = JsonArrayStream()
+    assert stream.feed('Here:\n[{"title": "A"}') == []
+    assert stream.feed(', {"ti') == [{"title": "A"}]
+    assert stream.feed('tle": "B"}]') == [{"title": "B"}]
+    assert stream.closed
+
+
+def test_extract_json_object_with_prose():
+    assert extract_json('Caption below.\n{"caption": "Hi", "hashtags": ["#a",]}\nEnjoy!') == {
+        "caption": "Hi", "hashtags": ["#a"]
+    }
+
+
+def test_strip_trailing_commas_leaves_strings_alone():
+    assert strip_trailing_commas('{"a": ",]", "b": [1,],}') == '{"a": ",]", "b": [1]}'
+
+
+def test_parse_array_limit_and_builder_rejections():
+    def build(item):
+        if not isinstance(item.get("hashtags"), list):
+            raise ValueError("hashtags must be a list")
+        return item["title"]
+
+    text = '[{"title": "A", "hashtags": []}, {"title": "B", "hashtags": "#b"}, {"title": "C", "hashtags": []}, {"title": "D", "hashtags": []}]'
+    assert parse_array(text, build, limit=2) == ["A", "C"]
+
+
+def test_parse_array_validates_against_pydantic_model():
+    pydantic = pytest.importorskip("pydantic")
+
+    class PhotographyTip(pydantic.BaseModel):
+        category: str
+        tip: str
+        caption_idea: str
+        hashtags: list
+
+    text = '```json\n[{"category": "lighting", "tip": "Use window light", "caption_idea": "...", "hashtags": []}, {"category": "x"}]\n```'
+    tips = parse_array(text, lambda item: PhotographyTip(**item))
+    assert [t.tip for t in tips] == ["Use window light"]
@@ -0,0 +1,105 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+pytest.importorskip("requests")
+
+import llm_streaming  # noqa: E402
+from llm_streaming import StreamError, gemini_delta, openai_delta, sse_events, stream_text  # noqa: E402
+
+
+def gemini_event(text):
+    return {"candidates": [{"content": {"role": "model", "parts": [{"text": text}]}}]}
+
+
+def sse_lines(events):
+    for event in events:
+        yield f"data: {json.dumps(event)}"
+        yield ""
+
+
+class StreamedResponse:
+    def __init__(self, lines, status=200):
+        self.lines = lines
+        self.status = status
+        self.encoding = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        if self.status >= 400:
+            raise OSError(f"HTTP {self.status}")
+
+    def iter_lines(self, decode_unicode=False):
+        return self.lines
+
+
+def test_sse_events_join_data_lines_and_stop_at_done():
+    lines = ['data: {"a":', "data: 1}", "", ": comment", "data: [DONE]", "", 'data: {"b": 2}', ""]
+    assert list(sse_events(lines)) == [{"a": 1}]
+    assert list(sse_events(['data: {"c": 3}'])) == [{"c": 3}]
+
+
+def test_provider_deltas():
+    assert gemini_delta(gemini_event("Hello")) == "Hello"
+    assert gemini_delta({"candidates": [{"content": {"parts": [{"text": "plan", "thought": True}, {"text": "Hi"}]}}]}) == "Hi"
+    assert gemini_delta({"candidates": [{"finishReason": "STOP"}]}) == ""
+    assert openai_delta({"choices": [{"delta": {"content": "Hey"}}]}) == "Hey"
+    assert openai_delta({"choices": [{"delta": {"role": "assistant"}}]}) == ""
+    with pytest.raises(StreamError, match="quota"):
+        gemini_delta({"error": {"message": "quota exceeded"}})
+
+
+def test_deltas_arrive_before_the_provider_finishes(monkeypatch):
+    first_seen = threading.Event()
+
+    def lines():
+        yield from sse_lines([gemini_event("[{\"title\": ")])
+        # The rest is only sent once the consumer has the first delta
+        assert first_seen.wait(5)
+        yield from sse_lines([gemini_event("\"A\"}]")])
+
+    monkeypatch.setattr(llm_streaming.requests, "post", lambda *args, **kwargs: StreamedResponse(lines()))
+
+    async def scenario():
+        deltas = []
+        async for delta in stream_text("gemini", "gemini-test", "system", "prompt", "key", timeout=5):
+            deltas.append(delta)
+            first_seen.set()
+        return deltas
+
+    assert asyncio.run(scenario()) == ['[{"title": ', '"A"}]']
+
+
+def test_provider_errors_are_raised(monkeypatch):
+    monkeypatch.setattr(llm_streaming.requests, "post", lambda *args, **kwargs: StreamedResponse([], status=429))
+
+    async def scenario():
+        return [delta async for delta in stream_text("openai", "gpt-test", "system", "prompt", "key", timeout=5)]
+
+    with pytest.raises(OSError, match="429"):
+        asyncio.run(scenario())
+
+
+def test_a_shared_session_is_used_when_given():
+    class Session:
+        def __init__(self):
+            self.urls = []
+
+        def post(self, url, **kwargs):
+            self.urls.append(url)
+            return StreamedResponse(sse_lines([{"choices": [{"delta": {"content": "hi"}}]}]))
+
+    session = Session()
+
+    async def scenario():
+        return [delta async for delta in stream_text("openai", "gpt-test", "s", "p", "key", timeout=5, session=session)]
+
+    assert asyncio.run(scenario()) == ["hi"]
+    assert session.urls == [llm_streaming.OPENAI_URL]
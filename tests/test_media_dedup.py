@@ -0,0 +1,200 @@
+import asyncio
+import hashlib
+import io
+
+import pytest
+
+pytest.importorskip("pymongo")
+
+from pymongo.errors import DuplicateKeyError  # noqa: E402
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def matches(doc, query):
+    for key, condition in query.items():
+        if key == "$or":
+            if not any(matches(doc, option) for option in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = doc.get(key)
+            for op, operand in condition.items():
+                if op == "$exists" and (key in doc) != operand:
+                    return False
+                if op == "$gt" and not (value is not None and value > operand):
+                    return False
+                if op == "$lte" and not (value is not None and value <= operand):
+                    return False
+        elif doc.get(key) != condition:
+            return False
+    return True
+
+
+class MediaCollection:
+    """The db.media operations the media routes use, with the unique sha256 index."""
+
+    def __init__(self):
+        self.docs = []
+
+    def _find(self, query):
+        return next((doc for doc in self.docs if matches(doc, query)), None)
+
+    async def insert_one(self, doc):
+        if any(existing["sha256"] == doc["sha256"] for existing in self.docs):
+            raise DuplicateKeyError("E11000 duplicate key sha256")
+        self.docs.append(dict(doc))
+
+    async def find_one(self, query, projection=None):
+        return self._find(query)
+
+    async def find_one_and_update(self, query, update, projection=None, return_document=None):
+        doc = self._find(query)
+        if doc is None:
+            return None
+        for key, amount in update["$inc"].items():
+            doc[key] = doc.get(key, 0) + amount
+        return {key: value for key, value in doc.items() if key != "_id"}
+
+    async def find_one_and_delete(self, query, projection=None):
+        doc = self._find(query)
+        if doc is not None:
+            self.docs.remove(doc)
+        return doc
+
+
+class MediaStore:
+    def __init__(self):
+        self.files = {}
+        self.puts = 0
+
+    def _add(self, data):
+        self.puts += 1
+        file_id = f"file-{self.puts}"
+        self.files[file_id] = data
+        return file_id
+
+    async def put(self, data, filename, content_type):
+        return self._add(data)
+
+    async def put_stream(self, source, filename, content_type, max_bytes):
+        data = await source.read()
+        return self._add(data), len(data), hashlib.sha256(data).hexdigest()
+
+    async def delete(self, file_id):
+        del self.files[file_id]
+
+
+class VariantPipeline:
+    def __init__(self, store):
+        self.media_store = store
+        self.prerendered = []
+
+    def prerender(self, media):
+        self.prerendered.append(media["id"])
+
+    async def render(self, data, names):
+        return {"thumb": {"data": b"thumb"}}
+
+    async def store(self, rendered, filename):
+        return {name: {"file_id": await self.media_store.put(variant["data"], filename, "image/webp")} for name, variant in rendered.items()}
+
+
+class Db:
+    def __init__(self):
+        self.media = MediaCollection()
+
+
+@pytest.fixture
+def api(server, monkeypatch):
+    db, store = Db(), MediaStore()
+    pipeline = VariantPipeline(store)
+    monkeypatch.setattr(server, "db", db)
+    monkeypatch.setattr(server, "media_store", store)
+    monkeypatch.setattr(server, "variant_pipeline", pipeline)
+    return server, db, store, pipeline
+
+
+def upload(server, data, filename="photo.jpg"):
+    from starlette.datastructures import Headers, UploadFile
+
+    file = UploadFile(io.BytesIO(data), filename=filename, headers=Headers({"content-type": "image/jpeg"}))
+    return run(server.upload_media(file))
+
+
+def test_uploading_the_same_bytes_twice_stores_them_once(api):
+    server, db, store, pipeline = api
+    first = upload(server, b"jpeg bytes")
+    second = upload(server, b"jpeg bytes", filename="copy.jpg")
+
+    assert (first["deduplicated"], first["ref_count"]) == (False, 1)
+    assert (second["deduplicated"], second["ref_count"]) == (True, 2)
+    assert second["id"] == first["id"] and second["media_url"] == first["media_url"]
+    assert len(store.files) == 1 and len(db.media.docs) == 1
+    assert db.media.docs[0]["ref_count"] == 2
+    # Thumbnails are only rendered for bytes that were actually stored
+    assert pipeline.prerendered == [first["id"]]
+
+    other = upload(server, b"other bytes")
+    assert not other["deduplicated"] and len(store.files) == 2
+
+
+def test_delete_drops_the_file_only_with_the_last_reference(api):
+    server, db, store, _ = api
+    media_id = upload(server, b"jpeg bytes")["id"]
+    upload(server, b"jpeg bytes")
+    upload(server, b"jpeg bytes")
+
+    assert run(server.delete_media(media_id))["ref_count"] == 2
+    assert run(server.delete_media(media_id))["ref_count"] == 1
+    assert len(store.files) == 1
+
+    assert run(server.delete_media(media_id)) == {"message": "Media deleted successfully", "ref_count": 0}
+    assert store.files == {} and db.media.docs == []
+
+    with pytest.raises(server.HTTPException) as missing:
+        run(server.delete_media(media_id))
+    assert missing.value.status_code == 404
+
+
+def test_generated_images_are_stored_deduplicated_and_linked_like_uploads(api):
+    server, db, store, _ = api
+    media = run(server._store_generated_media(b"png bytes", "image/png", "generated-wedding"))
+
+    assert (media["media_type"], media["ref_count"], media["size"]) == ("ai_generated", 1, len(b"png bytes"))
+    assert store.files[media["file_id"]] == b"png bytes"
+    # Thumbnails are rendered from the same bytes and stored next to them
+    assert store.files[media["variants"]["thumb"]["file_id"]] == b"thumb"
+    assert db.media.docs[0]["id"] == media["id"]
+
+    again = run(server._store_generated_media(b"png bytes", "image/png", "generated-wedding"))
+    assert (again["id"], again["ref_count"]) == (media["id"], 2)
+    assert len(store.files) == 2
+
+    # An upload of the same bytes takes a reference on the generated media
+    uploaded = upload(server, b"png bytes")
+    assert uploaded["deduplicated"] and (uploaded["id"], uploaded["ref_count"]) == (media["id"], 3)
+    request = server.ImageGenerateRequest(prompt="beach", niche="wedding")
+    result = server._generated_image_result(request, again, "beach, wedding", None)
+    assert result["media_id"] == uploaded["id"] and result["media_url"] == uploaded["media_url"]
+    assert result["thumbnails"] == {"thumb": server._media_url(media["id"], "thumb")}
+
+
+def test_a_generated_image_that_loses_the_insert_race_reuses_the_winner(api, monkeypatch):
+    server, db, store, _ = api
+    winner = upload(server, b"png bytes")
+    reuse = server._reuse_media
+    calls = []
+
+    async def reuse_after_race(sha256):
+        # The first lookup ran before the concurrent upload inserted its document
+        calls.append(sha256)
+        return None if len(calls) == 1 else await reuse(sha256)
+
+    monkeypatch.setattr(server, "_reuse_media", reuse_after_race)
+    media = run(server._store_generated_media(b"png bytes", "image/png", "generated-wedding"))
+
+    assert (media["id"], media["ref_count"]) == (winner["id"], 2)
+    # The losing copy and its thumbnail were removed again
+    assert list(store.files.values()) == [b"png bytes"]
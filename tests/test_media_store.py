@@ -0,0 +1,32 @@
+import pytest
+
+pytest.importorskip("motor")
+
+from media_store import RangeNotSatisfiable, parse_range_header  # noqa: E402
+
+
+def test_explicit_and_open_ended_ranges():
+    assert parse_range_header("bytes=0-99", 1000) == (0, 99)
+    assert parse_range_header("bytes=500-", 1000) == (500, 999)
+    # An end past the file is clamped
+    assert parse_range_header("bytes=900-5000", 1000) == (900, 999)
+
+
+def test_suffix_ranges_take_the_last_bytes():
+    assert parse_range_header("bytes=-100", 1000) == (900, 999)
+    assert parse_range_header("bytes=-5000", 1000) == (0, 999)
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range_header("bytes=-0", 1000)
+
+
+@pytest.mark.parametrize("header", ["bytes=1000-", "bytes=1000-1200", "bytes=500-100", "bytes=-10"])
+def test_unsatisfiable_ranges_raise_with_the_size(header):
+    size = 0 if header == "bytes=-10" else 1000
+    with pytest.raises(RangeNotSatisfiable) as excinfo:
+        parse_range_header(header, size)
+    assert excinfo.value.size == size
+
+
+@pytest.mark.parametrize("header", [None, "", "items=0-10", "bytes=0-10,20-30", "bytes=abc-def"])
+def test_whole_file_is_sent_for_other_units_multi_range_and_garbage(header):
+    assert parse_range_header(header, 1000) is None
@@ -0,0 +1,59 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from near_duplicates import NearDuplicateIndex  # noqa: E402
+
+CAPTION = "Golden hour with Sam and Alex on the cliffs at Big Sur. The light, the wind, the laughter. Book your engagement session today!"
+
+
+def test_near_duplicates_match_and_distinct_texts_do_not():
+    index = NearDuplicateIndex()
+    index.add("content", "c1", CAPTION)
+    index.add("content", "c2", "Five lighting tips for moody newborn portraits at home in winter")
+
+    rewrite = CAPTION.replace("today!", "today 💛 #bigsur #goldenhour")
+    assert index.match(rewrite) == {"source": "content", "id": "c1", "similarity": 1.0}
+    assert index.match("A rainy city street shoot with umbrellas and neon reflections downtown") is None
+
+
+def test_updates_and_removals_are_incremental():
+    index = NearDuplicateIndex()
+    index.add("content", "c1", CAPTION)
+    index.add("content", "c1", "Completely new words about a baby shower in the garden")
+    assert index.match(CAPTION) is None
+    assert len(index) == 1
+    index.remove("content", "c1")
+    assert len(index) == 0
+    assert index.match("Completely new words about a baby shower in the garden") is None
+
+
+def test_unique_flags_repeats_within_one_response():
+    index = NearDuplicateIndex()
+    index.add("idea", "i1", CAPTION)
+    results = index.unique([CAPTION, "Behind the scenes of a housewarming shoot", "Behind the scenes of a housewarming shoot!"])
+    assert results[0]["id"] == "i1"
+    assert results[1] is None
+    assert results[2] == {"source": "response", "index": 1, "similarity": 1.0}
+
+
+def test_load_skips_keys_written_during_the_load():
+    index = NearDuplicateIndex()
+    index.begin_load()
+    stale = index.signatures([CAPTION, "An old caption about a family picnic"])
+    index.remove("content", "c1")  # deleted while the load was reading
+    loaded = index.load([("content", "c1", stale[0]), ("content", "c2", stale[1])])
+    index.finish_load()
+    assert loaded == 1
+    assert index.match(CAPTION) is None
+    assert index.ready
+
+
+def test_compaction_keeps_lookups_correct():
+    index = NearDuplicateIndex()
+    for i in range(3000):
+        index.add("content", i, f"caption number {i} about session {i * 7} in the park")
+    for i in range(2500):
+        index.remove("content", i)
+    assert len(index) == 500
+    assert index.match("caption number 2999 about session 20993 in the park")["id"] == 2999
@@ -0,0 +1,30 @@
+import base64
+
+import pytest
+
+from pagination import decode_cursor, encode_cursor
+
+
+def test_cursor_round_trips_and_is_url_safe():
+    doc = {"created_at": "2026-01-02T03:04:05.678901+00:00", "id": "a1b2-c3d4", "title": "ignored"}
+    cursor = encode_cursor(doc)
+    assert "=" not in cursor and "+" not in cursor and "/" not in cursor
+    assert decode_cursor(cursor) == (doc["created_at"], doc["id"])
+
+
+def raw_cursor(text):
+    return base64.urlsafe_b64encode(text.encode()).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("cursor", [
+    "!!not-base64!!",
+    raw_cursor("not json"),
+    raw_cursor('"ab"'),
+    raw_cursor('["2026-01-01"]'),
+    raw_cursor('["2026-01-01", 5]'),
+    raw_cursor('{"created_at": "2026-01-01", "id": "x"}'),
+    base64.urlsafe_b64encode(b"\xff\xfe").decode(),
+])
+def test_malformed_cursors_are_rejected(cursor):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        decode_cursor(cursor)
@@ -0,0 +1,21 @@
+import pytest
+
+pytest.importorskip("motor")
+
+from rollups import content_delta  # noqa: E402
+
+
+def test_insert_and_delete_move_total_status_and_niche():
+    doc = {"status": "draft", "niche": "wedding"}
+    assert content_delta(None, doc) == {"total": 1, "status.draft": 1, "niche.wedding": 1}
+    assert content_delta(doc, None) == {"total": -1, "status.draft": -1, "niche.wedding": -1}
+
+
+def test_update_only_moves_what_changed():
+    before = {"status": "draft", "niche": "wedding"}
+    assert content_delta(before, {"status": "scheduled", "niche": "wedding"}) == {"status.draft": -1, "status.scheduled": 1}
+    assert content_delta(before, dict(before)) == {}
+
+
+def test_values_are_made_safe_as_field_names():
+    assert content_delta(None, {"status": "$set", "niche": "fine.art"}) == {"total": 1, "status.set": 1, "niche.fine_art": 1}
@@ -0,0 +1,63 @@
+from datetime import date
+
+import pytest
+
+pytest.importorskip("pymongo")
+
+from search import (  # noqa: E402
+    FACET_SCAN_MAX, SOURCES, _facet_result, build_pipeline, build_scheduled_pipeline, date_range, normalize_hashtags,
+)
+
+
+def test_normalize_hashtags():
+    assert normalize_hashtags("wedding, #GoldenHour,, #") == ["#wedding", "#GoldenHour"]
+    assert normalize_hashtags(None) == []
+
+
+def test_date_range_includes_the_whole_last_day():
+    assert date_range(date(2026, 1, 1), date(2026, 1, 31)) == {"$gte": "2026-01-01", "$lt": "2026-02-01"}
+    assert date_range(None, None) is None
+    with pytest.raises(ValueError):
+        date_range(date(2026, 2, 1), date(2026, 1, 1))
+
+
+def test_text_search_matches_first_and_sorts_by_score():
+    pipeline = build_pipeline(
+        "content", q="golden hour", hashtags=["#love"],
+        filters={"niche": "wedding", "status": None, "content_type": "reel"}, offset=40, limit=20
+    )
+    match, sort, scan, facet = pipeline
+    assert match["$match"] == {
+        "$text": {"$search": "golden hour"}, "hashtags": {"$all": ["#love"]},
+        "niche": "wedding", "media_type": "reel",
+    }
+    assert list(sort["$sort"]) == ["score", "created_at", "id"]
+    assert scan == {"$limit": FACET_SCAN_MAX + 1}
+    facets = facet["$facet"]
+    assert facets["results"][:2] == [{"$skip": 40}, {"$limit": 20}]
+    assert facets["content_type"] == [{"$sortByCount": "$media_type"}]
+    assert set(facets) == {"results", "total", "niche", "status", "content_type"}
+
+
+def test_ideas_reject_filters_they_do_not_have():
+    assert build_pipeline("ideas", hashtags=["#a"])[0]["$match"] == {"suggested_hashtags": {"$all": ["#a"]}}
+    with pytest.raises(ValueError, match="status"):
+        build_pipeline("ideas", filters={"status": "draft"})
+
+
+def test_scheduled_posts_join_their_content_for_facets():
+    pipeline = build_scheduled_pipeline(["c1"], status="pending", dates={"$gte": "2026-01-01"})
+    assert pipeline[0]["$match"] == {"content_id": {"$in": ["c1"]}, "status": "pending", "scheduled_date": {"$gte": "2026-01-01"}}
+    # Capped before the join, so at most FACET_SCAN_MAX + 1 posts are looked up
+    assert pipeline[2] == {"$limit": FACET_SCAN_MAX + 1}
+    assert pipeline[3]["$lookup"]["foreignField"] == "id"
+    assert pipeline[-1]["$facet"]["niche"] == [{"$sortByCount": "$content.niche"}]
+
+
+def test_facet_input_is_capped_and_reported():
+    assert [stage for stage in build_pipeline("content", scan_max=None) if "$limit" in stage] == []
+    raw = {"results": [], "total": [{"count": 101}], "niche": [{"_id": "wedding", "count": 101}], "status": [], "content_type": []}
+    capped = _facet_result(raw, SOURCES["content"], scan_max=100)
+    assert (capped["total"], capped["capped"]) == (100, True)
+    exact = _facet_result(raw, SOURCES["content"], scan_max=1000)
+    assert (exact["total"], exact["capped"]) == (101, False)
@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_concurrent_callers_share_one_execution():
+    async def scenario():
+        flight = SingleFlight()
+        release = asyncio.Event()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await release.wait()
+            return "response"
+
+        waiters = [asyncio.ensure_future(flight.do("caption", "k", work)) for _ in range(5)]
+        await asyncio.sleep(0)
+        release.set()
+        return await asyncio.gather(*waiters), calls, flight
+
+    results, calls, flight = run(scenario())
+    assert results == ["response"] * 5
+    assert len(calls) == 1
+    assert flight.stats["caption"] == {"executed": 1, "coalesced": 4}
+    assert flight.snapshot()["in_flight"] == 0
+
+
+def test_errors_reach_every_caller_and_the_next_call_runs_again():
+    async def scenario():
+        flight = SingleFlight()
+        attempts = []
+
+        async def failing():
+            attempts.append(1)
+            await asyncio.sleep(0)
+            raise RuntimeError("provider down")
+
+        outcomes = await asyncio.gather(
+            flight.do("ideas", "k", failing), flight.do("ideas", "k", failing), return_exceptions=True
+        )
+
+        async def working():
+            return "ok"
+
+        return outcomes, attempts, await flight.do("ideas", "k", working)
+
+    outcomes, attempts, retried = run(scenario())
+    assert [str(outcome) for outcome in outcomes] == ["provider down", "provider down"]
+    assert len(attempts) == 1
+    assert retried == "ok"
+
+
+def test_a_cancelled_caller_does_not_cancel_the_shared_work():
+    async def scenario():
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def work():
+            await release.wait()
+            return "done"
+
+        first = asyncio.ensure_future(flight.do("tips", "k", work))
+        second = asyncio.ensure_future(flight.do("tips", "k", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert run(scenario()) == "done"
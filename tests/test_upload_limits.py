@@ -0,0 +1,79 @@
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from fastapi import HTTPException  # noqa: E402
+
+from upload_limits import RequestSizeLimitMiddleware  # noqa: E402
+
+
+def scope(path, headers=()):
+    return {"type": "http", "method": "POST", "path": path, "headers": list(headers)}
+
+
+def body_messages(*chunks):
+    messages = [{"type": "http.request", "body": chunk, "more_body": i < len(chunks) - 1} for i, chunk in enumerate(chunks)]
+
+    async def receive():
+        return messages.pop(0)
+
+    return receive
+
+
+class BodyReader:
+    """Inner app that reads the whole body, like FastAPI parsing a form."""
+
+    def __init__(self):
+        self.called = False
+        self.body = b""
+
+    async def __call__(self, scope, receive, send):
+        self.called = True
+        while True:
+            message = await receive()
+            self.body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+
+
+def run(middleware, request_scope, receive):
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(middleware(request_scope, receive, send))
+    return sent
+
+
+def test_declared_length_over_the_limit_is_rejected_unread():
+    inner = BodyReader()
+    middleware = RequestSizeLimitMiddleware(inner, max_bytes=10, path_prefixes=["/api/media"])
+    sent = run(middleware, scope("/api/media/upload", [(b"content-length", b"11")]), body_messages(b"x" * 11))
+    assert not inner.called
+    assert sent[0]["status"] == 413
+    assert json.loads(sent[1]["body"])["detail"] == "Request body exceeds 10 bytes"
+
+
+def test_chunked_body_is_cut_off_once_it_crosses_the_limit():
+    inner = BodyReader()
+    middleware = RequestSizeLimitMiddleware(inner, max_bytes=10, path_prefixes=["/api/media"])
+    with pytest.raises(HTTPException) as excinfo:
+        run(middleware, scope("/api/media/upload"), body_messages(b"x" * 6, b"x" * 6, b"x" * 6))
+    assert excinfo.value.status_code == 413
+    assert inner.body == b"x" * 6
+
+
+def test_bodies_within_the_limit_and_other_paths_pass_through():
+    inner = BodyReader()
+    middleware = RequestSizeLimitMiddleware(inner, max_bytes=10, path_prefixes=["/api/media"])
+    run(middleware, scope("/api/media/upload", [(b"content-length", b"10")]), body_messages(b"x" * 4, b"x" * 6))
+    assert inner.body == b"x" * 10
+
+    other = BodyReader()
+    middleware = RequestSizeLimitMiddleware(other, max_bytes=10, path_prefixes=["/api/media"])
+    run(middleware, scope("/api/content/bulk", [(b"content-length", b"50")]), body_messages(b"x" * 50))
+    assert other.body == b"x" * 50
@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("pymongo")
+
+from pymongo.errors import AutoReconnect, BulkWriteError  # noqa: E402
+
+from write_behind import WriteBehindBuffer  # noqa: E402
+
+
+class InsertResult:
+    def __init__(self, ids):
+        self.inserted_ids = ids
+
+
+class RecordingCollection:
+    """Collects insert_many batches; fails the first ``transient_failures`` calls."""
+
+    def __init__(self, transient_failures=0, reject_titles=()):
+        self.batches = []
+        self.transient_failures = transient_failures
+        self.reject_titles = set(reject_titles)
+
+    async def insert_many(self, docs, ordered=True):
+        assert ordered is False
+        if self.transient_failures:
+            self.transient_failures -= 1
+            raise AutoReconnect("connection reset")
+        accepted = [d for d in docs if d["title"] not in self.reject_titles]
+        self.batches.append(accepted)
+        if len(accepted) < len(docs):
+            raise BulkWriteError({"nInserted": len(accepted), "writeErrors": [{"errmsg": "E11000 duplicate key"}]})
+        return InsertResult([object() for _ in docs])
+
+
+def ideas(n, start=0):
+    return [{"title": f"Idea {i}"} for i in range(start, start + n)]
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_stop_drains_everything_in_batches():
+    async def scenario():
+        collection = RecordingCollection()
+        counted = []
+
+        async def on_inserted(count):
+            counted.append(count)
+
+        buffer = WriteBehindBuffer(collection, "ideas", max_batch=4, flush_interval=60, on_inserted=on_inserted)
+        buffer.start()
+        await buffer.add(ideas(3))
+        await buffer.add(ideas(7, start=3))
+        snapshot = await buffer.stop()
+        return collection, counted, snapshot
+
+    collection, counted, snapshot = run(scenario())
+    assert [len(b) for b in collection.batches] == [4, 4, 2]
+    assert sum(counted) == 10
+    assert snapshot["accepted"] == snapshot["inserted"] == 10
+    assert snapshot["pending"] == snapshot["dropped"] == snapshot["failed"] == 0
+
+
+def test_add_returns_before_the_write():
+    async def scenario():
+        collection = RecordingCollection()
+        buffer = WriteBehindBuffer(collection, "ideas", flush_interval=60)
+        buffer.start()
+        await buffer.add(ideas(2))
+        written_before_stop = len(collection.batches)
+        await buffer.stop()
+        return written_before_stop, collection
+
+    written_before_stop, collection = run(scenario())
+    assert written_before_stop == 0
+    assert len(collection.batches) == 1
+
+
+def test_transient_failures_are_retried_and_rejections_counted():
+    async def scenario():
+        collection = RecordingCollection(transient_failures=2, reject_titles={"Idea 1"})
+        buffer = WriteBehindBuffer(collection, "ideas", flush_interval=60, retry_backoff=0)
+        buffer.start()
+        await buffer.add(ideas(3))
+        return await buffer.stop()
+
+    snapshot = run(scenario())
+    assert snapshot["inserted"] == 2
+    assert snapshot["failed"] == 1
+    assert snapshot["dropped"] == 0
+    assert "duplicate key" in snapshot["last_error"]
+
+
+def test_gives_up_after_max_retries_and_reports_dropped():
+    async def scenario():
+        collection = RecordingCollection(transient_failures=10)
+        buffer = WriteBehindBuffer(collection, "ideas", max_retries=2, retry_backoff=0)
+        await buffer.add(ideas(3))  # not started: written through
+        return buffer.snapshot()
+
+    snapshot = run(scenario())
+    assert snapshot["accepted"] == snapshot["dropped"] == 3
+    assert snapshot["inserted"] == 0